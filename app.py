@@ -0,0 +1,63 @@
+import io
+
+import pandas as pd
+from flask import Flask, jsonify, request
+from flask_cors import CORS
+
+from my_project import logger
+from my_project.pipeline.prediction import PredictionPipeline
+
+
+app = Flask(__name__)
+CORS(app)
+
+# Load the model once at startup, every request shares it through the batcher
+predictor = PredictionPipeline()
+
+
+def _parse_request() -> pd.DataFrame:
+    """Accept CSV bodies or JSON rows (a single object, a list, or {"instances": [...]})."""
+    if request.mimetype == "text/csv":
+        return pd.read_csv(io.StringIO(request.get_data(as_text=True)))
+
+    payload = request.get_json(force=True)
+    if isinstance(payload, dict) and "instances" in payload:
+        payload = payload["instances"]
+    if isinstance(payload, dict):
+        payload = [payload]
+
+    # Positional rows are taken in schema order
+    if payload and not isinstance(payload[0], dict):
+        return pd.DataFrame(payload, columns=predictor.feature_columns)
+    return pd.DataFrame(payload)
+
+
+@app.route("/health", methods=["GET"])
+def health():
+    return jsonify({"status": "ok", "model_path": str(predictor.model_path)})
+
+
+@app.route("/predict", methods=["POST"])
+def predict():
+    try:
+        df = _parse_request()
+        preds = predictor.predict(df)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.exception(f"Prediction failed: {e}")
+        return jsonify({"error": "prediction failed"}), 500
+
+    if request.mimetype == "text/csv":
+        body = pd.DataFrame({"prediction": preds}).to_csv(index=False)
+        return app.response_class(body, mimetype="text/csv")
+    return jsonify({"predictions": preds.tolist()})
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return jsonify(predictor.stats.snapshot())
+
+
+if __name__ == "__main__":
+    app.run(host="0.0.0.0", port=8080, threaded=True)
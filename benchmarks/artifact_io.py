@@ -0,0 +1,59 @@
+"""
+Benchmark read/write time of the tabular artifact formats used between stages.
+
+Usage:
+    python benchmarks/artifact_io.py --rows 1000000
+
+The wine dataset is tiled up to --rows and written/read through
+utils.common.save_dataframe/load_dataframe in every supported format.
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from my_project.utils.common import load_dataframe, read_yaml, save_dataframe
+from my_project.constants import SCHEMA_FILE_PATH
+
+
+def best_of(fn, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CSV vs columnar artifacts")
+    parser.add_argument("--source", type=Path, default=Path("artifacts/data_ingestion/winequality-red.csv"))
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    schema = dict(read_yaml(SCHEMA_FILE_PATH).columns)
+    base = pd.read_csv(args.source)
+    df = pd.concat([base] * (args.rows // len(base) + 1), ignore_index=True).iloc[:args.rows]
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for suffix in (".csv", ".feather", ".parquet"):
+            path = Path(tmp_dir) / f"data{suffix}"
+            write_s = best_of(lambda: save_dataframe(path, df, schema=schema), args.repeats)
+            read_s = best_of(lambda: load_dataframe(path, schema=schema), args.repeats)
+            rows.append({
+                "format": suffix.lstrip("."),
+                "write_s": round(write_s, 4),
+                "read_s": round(read_s, 4),
+                "size_mb": round(path.stat().st_size / 1e6, 2),
+            })
+
+    print(f"\n{len(df):,} rows x {df.shape[1]} columns (best of {args.repeats})")
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -7,19 +7,42 @@ logging_str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 
 # Use absolute path for logs directory (relative to this file)
 log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
-os.makedirs(log_dir, exist_ok=True)
 log_file = os.path.join(log_dir, 'my_project.log')
 
-logging.basicConfig(
-    level=logging.INFO,
-    format=logging_str,
-    handlers=[
-        logging.FileHandler(log_file, encoding='utf-8'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+
+class _LazyLogHandler(logging.Handler):
+    """
+    Creates the file + stdout handlers on the first logged record, so importing
+    the package creates no directory and opens no file (cold start of the CLI
+    and server workers), then forwards every record to them.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.targets = None
+
+    def emit(self, record):
+        if self.targets is None:
+            os.makedirs(log_dir, exist_ok=True)
+            formatter = logging.Formatter(logging_str)
+            self.targets = [logging.FileHandler(log_file, encoding='utf-8'), logging.StreamHandler(sys.stdout)]
+            for handler in self.targets:
+                handler.setFormatter(formatter)
+        for handler in self.targets:
+            handler.handle(record)
+
+    def close(self):
+        for handler in self.targets or []:
+            handler.close()
+        super().close()
+
+
+# Same effect as logging.basicConfig(level=INFO, handlers=[file, stdout]), deferred
+_root = logging.getLogger()
+if not _root.handlers:
+    _root.setLevel(logging.INFO)
+    _root.addHandler(_LazyLogHandler())
 
 logger = logging.getLogger(__name__)
-logger.info("Initializing my_project package")
 
-__version__ = "0.1.0"
\ No newline at end of file
+__version__ = "0.1.0"
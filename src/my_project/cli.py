@@ -1,14 +1,288 @@
 # src/my_project/cli.py
+"""
+mlp: command line entry point of the pipeline.
 
+    mlp run [--force] [--from STAGE] [--until STAGE] [--jobs N] [--profile P]
+                               the pipeline graph, independent stages in parallel
+    mlp <stage> [--force] [--profile P]
+                               one stage: ingest | validate | transform | train | evaluate | benchmark
+    mlp score [--input PATH] [--output PATH] [--workers N]
+                               batch predictions for a file of any size
+    mlp startup                check cold start times against the config.yaml budgets
+    mlp sync-tracking          upload offline MLflow runs to the tracking server
+
+Stage modules (and with them pandas, sklearn, xgboost, mlflow, dagshub) are
+imported only once the chosen subcommand runs, so `mlp --help` and the
+serving path start without them.
+"""
 import argparse
+import importlib
+import json
+import subprocess
+import sys
+import time
+
+
+# (subcommand, stage name, module, pipeline class)
+STAGES = [
+    ("ingest", "Data Ingestion Stage", "my_project.pipeline.stage_01_data_ingestion", "DataIngestionTrainingPipeline"),
+    ("validate", "Data Validation Stage", "my_project.pipeline.stage_02_datavalidation", "DataValidationTrainingPipeline"),
+    ("transform", "Data Transformation Stage", "my_project.pipeline.stage_03_data_transformation", "DataTransformationTrainingPipeline"),
+    ("train", "Model Trainer Stage", "my_project.pipeline.stage_04_model_trainer", "ModelTrainerPipeline"),
+    ("evaluate", "Model Evaluation Stage", "my_project.pipeline.stage_05_model_evaluation", "ModelEvaluationTrainingPipeline"),
+    ("benchmark", "Model Benchmark Stage", "my_project.pipeline.stage_06_model_benchmark", "ModelBenchmarkPipeline"),
+]
+
+# --profile choices (config.yaml instrumentation.profiler)
+PROFILERS = ("cprofile", "pyinstrument")
+
+# Commands timed by `mlp startup`, each in a fresh interpreter
+STARTUP_CHECKS = {
+    "cli_help": [sys.executable, "-m", "my_project.cli", "--help"],
+    "serving": [
+        sys.executable, "-c",
+        "import json, sys; from my_project.pipeline.prediction import PredictionPipeline; PredictionPipeline(); "
+        "print(json.dumps(sorted(m for m in ('pandas', 'sklearn', 'xgboost', 'mlflow', 'dagshub') if m in sys.modules)))",
+    ],
+}
+
+
+def load_stage(module_name: str, class_name: str):
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def run_stage(stage_name, pipeline_class, force=False, profiler=None, profile_dir=None, **kwargs):
+    """Helper to run a pipeline stage with logging, instrumentation and error handling."""
+    from my_project import logger
+    from my_project.utils.profiling import instrument, profile_stage
+
+    logger.info(f"===== Stage {stage_name} started =====")
+    try:
+        pipeline = pipeline_class(force=force, **kwargs)
+        with instrument(stage_name, kind="stage"), profile_stage(stage_name, profiler, profile_dir):
+            result = pipeline.main()
+        logger.info(f"===== Stage {stage_name} completed =====\n\nx==========x")
+        return result
+    except Exception as e:
+        logger.exception(f"Error in {stage_name}: {e}")
+        raise e
+
+
+def build_graph(config):
+    """Pipeline graph of every stage, from the artifacts each one declares."""
+    from my_project.pipeline.dag import PipelineGraph
+
+    nodes = []
+    for command, _, module_name, class_name in STAGES:
+        nodes += load_stage(module_name, class_name).dag_nodes(config, command)
+    return PipelineGraph(nodes)
+
+
+def _profile_settings(config, args) -> dict:
+    """run_stage profiler settings: --profile, else config.yaml instrumentation.profiler."""
+    instrumentation_config = config.get_instrumentation_config()
+    return {
+        "profiler": args.profile or instrumentation_config.profiler,
+        "profile_dir": instrumentation_config.profile_dir,
+    }
+
+
+def _export_run_report(config):
+    from my_project.utils.profiling import export_run_report
+
+    export_run_report(config.get_instrumentation_config(), config.get_tracking_config())
+
+
+def cmd_run(args):
+    from my_project import logger
+    from my_project.config.configuration import ConfigurationManager
+    from my_project.pipeline.dag import print_timing_report
+    from my_project.pipeline.stage_05_model_evaluation import init_dagshub
+
+    config = ConfigurationManager()
+    pipeline_config = config.get_pipeline_config()
+    profile = _profile_settings(config, args)
+    graph = build_graph(config)
+    names = graph.select(start=args.start, until=args.until)
+    # --- Initialize DagsHub and MLflow ---
+    init_dagshub()
+
+    logger.info(f"Starting the data pipeline: {', '.join(names)}")
+    try:
+        report = graph.run(
+            names,
+            run_node=lambda node, force: run_stage(
+                node.stage_name, node.pipeline_class, force=force, **profile, **node.kwargs
+            ),
+            max_workers=args.jobs or pipeline_config.max_workers,
+            exclusive=pipeline_config.exclusive,
+            force=args.force,
+            report_file=pipeline_config.timing_report,
+        )
+    finally:
+        _export_run_report(config)
+    print_timing_report(report)
+    logger.info("All pipeline stages completed successfully!")
+
+
+def cmd_stage(args):
+    from my_project.config.configuration import ConfigurationManager
+    from my_project.pipeline.stage_05_model_evaluation import init_dagshub
+
+    _, stage_name, module_name, class_name = next(stage for stage in STAGES if stage[0] == args.command)
+    config = ConfigurationManager()
+    if args.command == "evaluate" or config.get_instrumentation_config().mlflow:
+        # --- Initialize DagsHub and MLflow ---
+        init_dagshub()
+
+    kwargs = {}
+    if args.command == "benchmark":
+        kwargs["overrides"] = {
+            "thread_counts": tuple(args.threads) if args.threads else None,
+            "batch_sizes": tuple(args.batch_sizes) if args.batch_sizes else None,
+            "baseline_file": args.baseline,
+            "fail_on_regression": args.fail_on_regression,
+        }
+    try:
+        run_stage(stage_name, load_stage(module_name, class_name), force=args.force,
+                  **_profile_settings(config, args), **kwargs)
+    finally:
+        _export_run_report(config)
+
+
+def cmd_sync_tracking(args):
+    from my_project.config.configuration import ConfigurationManager
+    from my_project.pipeline.stage_05_model_evaluation import init_dagshub
+    from my_project.utils.tracking import sync_offline_runs
+
+    if not args.tracking_uri:
+        init_dagshub(offline=False)
+    tracking_config = ConfigurationManager().get_tracking_config()
+    uploaded = sync_offline_runs(tracking_config, tracking_uri=args.tracking_uri)
+    print(f"Synced {len(uploaded)} offline runs of '{tracking_config.experiment_name}'")
+
+
+def cmd_score(args):
+    from my_project.config.configuration import ConfigurationManager
+    from my_project.pipeline.stage_05_model_evaluation import init_dagshub
+    from my_project.pipeline.stage_07_batch_prediction import STAGE_NAME, BatchPredictionPipeline
+    from my_project.utils.common import resolve_n_jobs
+
+    config = ConfigurationManager()
+    if config.get_instrumentation_config().mlflow:
+        # --- Initialize DagsHub and MLflow ---
+        init_dagshub()
+
+    overrides = {
+        "input_path": args.input,
+        "output_path": args.output,
+        "n_workers": resolve_n_jobs(args.workers) if args.workers else None,
+        "chunksize": args.chunksize,
+        "dtype": args.dtype,
+        "use_compiled": args.use_compiled,
+        "drop_invalid": args.drop_invalid,
+        "passthrough_columns": tuple(args.passthrough) if args.passthrough else None,
+    }
+    try:
+        run_stage(STAGE_NAME, BatchPredictionPipeline, overrides=overrides, **_profile_settings(config, args))
+    finally:
+        _export_run_report(config)
+
+
+def _time_command(command, repeats: int) -> tuple:
+    """Best wall time (ms) of a command over `repeats` runs, and its last stdout."""
+    timings, stdout = [], ""
+    for _ in range(repeats):
+        start = time.perf_counter()
+        completed = subprocess.run(command, capture_output=True, text=True)
+        timings.append((time.perf_counter() - start) * 1000.0)
+        if completed.returncode != 0:
+            raise RuntimeError(f"{' '.join(command[:3])} failed:\n{completed.stderr[-2000:]}")
+        stdout = completed.stdout
+    return min(timings), stdout
+
+
+def cmd_startup(args):
+    from my_project.constants import CONFIG_FILE_PATH
+    from my_project.utils.common import read_yaml
+
+    budgets = read_yaml(CONFIG_FILE_PATH).get("startup", {}) or {}
+    repeats = int(args.repeats or budgets.get("repeats", 3))
+
+    report, over_budget = {}, []
+    for name, command in STARTUP_CHECKS.items():
+        elapsed_ms, stdout = _time_command(command, repeats)
+        budget_ms = budgets.get(f"{name}_ms")
+        report[name] = {"ms": round(elapsed_ms, 1), "budget_ms": budget_ms}
+        if name == "serving":
+            report[name]["heavy_modules"] = json.loads(stdout.strip().splitlines()[-1])
+        if budget_ms is not None and elapsed_ms > budget_ms:
+            over_budget.append(name)
+
+        status = "over budget" if name in over_budget else "ok"
+        print(f"{name:10} {elapsed_ms:8.1f} ms  (budget {budget_ms} ms)  {status}")
+
+    if args.json:
+        print(json.dumps(report, indent=4))
+    if over_budget:
+        print(f"Cold start over budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="mlp", description="End-to-end ML pipeline")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the pipeline graph, independent stages in parallel")
+    run_parser.add_argument("--force", action="store_true", help="Rerun every stage, ignoring the stage cache")
+    run_parser.add_argument("--from", dest="start", metavar="STAGE", help="start at this stage (and run everything downstream)")
+    run_parser.add_argument("--until", metavar="STAGE", help="stop after this stage (and what it needs)")
+    run_parser.add_argument("--jobs", type=int, help="stages run at the same time (default: config.yaml pipeline.max_workers)")
+    run_parser.add_argument("--profile", choices=PROFILERS, help="dump a profile of every stage")
+    run_parser.set_defaults(handler=cmd_run)
+
+    for command, stage_name, _, _ in STAGES:
+        stage_parser = subparsers.add_parser(command, help=f"Run the {stage_name}")
+        stage_parser.add_argument("--force", action="store_true", help="Rerun even if nothing changed")
+        stage_parser.add_argument("--profile", choices=PROFILERS, help="dump a profile of the stage")
+        stage_parser.set_defaults(handler=cmd_stage)
+        if command == "benchmark":
+            stage_parser.add_argument("--threads", type=int, nargs="+", help="thread counts (-1 = all cores)")
+            stage_parser.add_argument("--batch-sizes", type=int, nargs="+", help="rows per predict call")
+            stage_parser.add_argument("--baseline", help="benchmark report to compare against")
+            stage_parser.add_argument("--fail-on-regression", action="store_true", default=None)
+
+    score_parser = subparsers.add_parser("score", help="Batch predictions for a csv / feather / parquet input")
+    score_parser.add_argument("--input", help="file or dataset directory to score (default: config.yaml batch_prediction.input_path)")
+    score_parser.add_argument("--output", help="predictions artifact; its suffix picks the format")
+    score_parser.add_argument("--workers", type=int, help="processes predicting chunks (-1 = all cores)")
+    score_parser.add_argument("--chunksize", type=int, help="rows per chunk")
+    score_parser.add_argument("--compiled", action="store_true", default=None, dest="use_compiled",
+                              help="predict with the compiled form of tree models instead of the native model")
+    score_parser.add_argument("--dtype", choices=("auto", "float32", "float64"),
+                              help="precision of the preprocessed feature blocks (auto: float32 for tree models)")
+    score_parser.add_argument("--drop-invalid", action="store_true", default=None,
+                              help="skip rows with missing / non-numeric features instead of failing")
+    score_parser.add_argument("--passthrough", nargs="+", help="input columns kept next to the predictions")
+    score_parser.add_argument("--profile", choices=PROFILERS, help="dump a profile of the scoring run")
+    score_parser.set_defaults(handler=cmd_score)
+
+    startup_parser = subparsers.add_parser("startup", help="Measure cold start times against their budgets")
+    startup_parser.add_argument("--repeats", type=int, help="runs per check (best is kept)")
+    startup_parser.add_argument("--json", action="store_true", help="also print the report as JSON")
+    startup_parser.set_defaults(handler=cmd_startup)
+
+    sync_parser = subparsers.add_parser("sync-tracking", help="Upload offline MLflow runs to the tracking server")
+    sync_parser.add_argument("--tracking-uri", help="server to upload to (default: DagsHub / config.yaml tracking.tracking_uri)")
+    sync_parser.set_defaults(handler=cmd_sync_tracking)
+
+    return parser
+
 
-def main():
-    parser = argparse.ArgumentParser(description="MLP CLI Tool")
-    parser.add_argument("--greet", type=str, help="Your name to greet")
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.handler(args)
 
-    args = parser.parse_args()
 
-    if args.greet:
-        print(f"Hello, {args.greet}! Welcome to the MLP CLI.")
-    else:
-        print("Welcome to the MLP CLI. Use --greet to receive a personalized greeting.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
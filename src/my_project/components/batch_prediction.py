@@ -0,0 +1,219 @@
+# components of offline batch prediction
+import json
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from my_project import logger
+from my_project.components.model_registry import ModelRegistry, load_model
+from my_project.entity.config_entity import BatchPredictionConfig
+from my_project.utils.common import DataFrameWriter, iter_dataframe_chunks
+from my_project.utils.profiling import instrument, record_rows
+
+
+# Seconds between progress lines
+_PROGRESS_SECONDS = 10.0
+
+# Model of a pool worker, loaded once per process by _init_worker
+_worker = {}
+
+
+def _preprocessor(model):
+    """Preprocessing steps in front of the estimator of a native Pipeline (None without any)."""
+    steps = getattr(model, "steps", None)
+    return model[:-1] if steps and len(steps) > 1 else None
+
+
+def _estimator(model):
+    """The part of a model that predicts preprocessed blocks: compiled trees or the last Pipeline step."""
+    steps = getattr(model, "steps", None)
+    return steps[-1][1] if steps else model
+
+
+def _splits_in_float32(estimator) -> bool:
+    """Tree models (sklearn trees and forests, XGBoost) compare features in float32 anyway."""
+    if type(estimator).__module__.startswith("xgboost") or hasattr(estimator, "predict_transformed"):
+        return True
+    from sklearn.tree import BaseDecisionTree
+    trees = np.ravel(getattr(estimator, "estimators_", [estimator]))
+    return len(trees) > 0 and all(isinstance(tree, BaseDecisionTree) for tree in trees)
+
+
+def _predict_block(estimator, x: np.ndarray, feature_columns: list) -> np.ndarray:
+    if hasattr(estimator, "predict_transformed"):
+        return estimator.predict_transformed(x)
+    if hasattr(estimator, "feature_names_in_"):
+        # Fitted on a DataFrame (no preprocessing step), keep the feature names to avoid sklearn warnings
+        x = pd.DataFrame(x, columns=feature_columns, copy=False)
+    return estimator.predict(x)
+
+
+def _init_worker(model_path: str, mmap_mode, feature_columns: list) -> None:
+    # Memory-mapped: every worker shares the model pages through the page cache
+    _worker["estimator"] = _estimator(load_model(model_path, mmap_mode=mmap_mode))
+    _worker["feature_columns"] = feature_columns
+
+
+def _predict_in_worker(x: np.ndarray) -> np.ndarray:
+    return _predict_block(_worker["estimator"], x, _worker["feature_columns"])
+
+
+class BatchPrediction:
+    """
+    Scores a file (or dataset directory) of any size with the served model,
+    chunk by chunk: every chunk is checked against the schema features,
+    turned into one contiguous block and predicted, and its predictions are
+    appended to the output artifact as they come. With n_workers > 1 chunks
+    are predicted in a process pool, at most 2 per worker in flight, and
+    written in input order.
+
+    The model's preprocessing runs here, in float64 on every chunk; only
+    its output is cast to the block dtype. With dtype=auto that is float32
+    for tree models, the precision they split on, so no raw value is
+    rounded across a split threshold, and float64 for everything else
+    (linear models), so the predictions match the served model either way.
+    The estimator then gets the blocks: the native model by default (its
+    compiled predict is far faster on large blocks than the NumPy
+    traversal), or the compiled form with use_compiled, always in float32.
+    """
+
+    def __init__(self, config: BatchPredictionConfig):
+        self.config = config
+        self.feature_columns = list(config.feature_columns)
+
+        self.model_path = ModelRegistry(config.registry_file).serving_model_path(
+            fallback=config.model_path, use_compiled=config.use_compiled
+        )
+        self.compiled = self.model_path.is_dir()
+        # Memory-mapped here too: the chunks are preprocessed in this process
+        self.model = self._load()
+        self.preprocessor = None if self.compiled else _preprocessor(self.model)
+        if self.compiled or (config.dtype == "auto" and _splits_in_float32(_estimator(self.model))):
+            self.block_dtype = np.dtype(np.float32)
+        else:
+            self.block_dtype = np.dtype(np.float64 if config.dtype == "auto" else config.dtype)
+
+    def _load(self):
+        logger.info(f"Loading model for batch prediction from: [{self.model_path}]")
+        model = load_model(self.model_path, mmap_mode=self.config.mmap_mode)
+        if self.compiled and model.feature_names and model.feature_names != self.feature_columns:
+            raise ValueError(f"Compiled model features {model.feature_names} do not match the schema")
+        return model
+
+    def prepare(self, chunk: pd.DataFrame) -> tuple:
+        """
+        Validate a chunk against the schema features. Returns the contiguous
+        block of preprocessed features and the passthrough columns of the
+        rows kept; rows with missing or non-numeric features fail the run
+        unless drop_invalid.
+        """
+        missing = [column for column in self.feature_columns if column not in chunk.columns]
+        if missing:
+            raise ValueError(f"Input is missing schema columns: {missing}")
+
+        features = chunk[self.feature_columns]
+        non_numeric = [c for c in self.feature_columns if not pd.api.types.is_numeric_dtype(features[c])]
+        if non_numeric:
+            features = features.copy()
+            features[non_numeric] = features[non_numeric].apply(pd.to_numeric, errors="coerce")
+
+        invalid = features.isna().any(axis=1).to_numpy()
+        dropped = int(invalid.sum())
+        if dropped:
+            if not self.config.drop_invalid:
+                first = chunk.index[np.argmax(invalid)]
+                raise ValueError(f"{dropped} rows have missing or non-numeric feature values (first: row {first}); "
+                                 f"set drop_invalid to skip them")
+            features = features[~invalid]
+            chunk = chunk[~invalid]
+
+        x = features.to_numpy(dtype=np.float64)
+        if self.compiled:
+            block = self.model.transform(x)
+        else:
+            if self.preprocessor is not None:
+                x = self.preprocessor.transform(x)
+            block = np.ascontiguousarray(x, dtype=self.block_dtype)
+        passthrough = chunk[list(self.config.passthrough_columns)].reset_index(drop=True)
+        return block, passthrough, dropped
+
+    def _write(self, writer: DataFrameWriter, passthrough: pd.DataFrame, predictions: np.ndarray) -> None:
+        passthrough[self.config.prediction_column] = np.asarray(predictions, dtype=np.float64)
+        writer.write(passthrough)
+        record_rows(len(passthrough))
+
+    @instrument()
+    def predict(self) -> dict:
+        """Score input_path into output_path; returns the run report (rows, rows/s, ...)."""
+        columns = self.feature_columns + [c for c in self.config.passthrough_columns if c not in self.feature_columns]
+        chunks = iter_dataframe_chunks(self.config.input_path, chunksize=self.config.chunksize, columns=columns)
+        rows, dropped, n_chunks = 0, 0, 0
+        start = last_progress = time.perf_counter()
+
+        def progress(n_rows: int) -> None:
+            nonlocal rows, last_progress
+            rows += n_rows
+            now = time.perf_counter()
+            if now - last_progress >= _PROGRESS_SECONDS:
+                logger.info(f"Scored {rows:,} rows ({rows / (now - start):,.0f} rows/s)")
+                last_progress = now
+
+        with DataFrameWriter(self.config.output_path) as writer:
+            if self.config.n_workers > 1:
+                with ProcessPoolExecutor(
+                    max_workers=self.config.n_workers,
+                    mp_context=get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(str(self.model_path), self.config.mmap_mode, self.feature_columns),
+                ) as executor:
+                    in_flight = deque()
+                    for chunk in chunks:
+                        block, passthrough, chunk_dropped = self.prepare(chunk)
+                        dropped += chunk_dropped
+                        n_chunks += 1
+                        in_flight.append((executor.submit(_predict_in_worker, block), passthrough))
+                        # Bounded read-ahead keeps memory flat however large the input is
+                        while len(in_flight) >= 2 * self.config.n_workers:
+                            future, passthrough = in_flight.popleft()
+                            self._write(writer, passthrough, future.result())
+                            progress(len(passthrough))
+                    while in_flight:
+                        future, passthrough = in_flight.popleft()
+                        self._write(writer, passthrough, future.result())
+                        progress(len(passthrough))
+            else:
+                estimator = _estimator(self.model)
+                for chunk in chunks:
+                    block, passthrough, chunk_dropped = self.prepare(chunk)
+                    dropped += chunk_dropped
+                    n_chunks += 1
+                    self._write(writer, passthrough, _predict_block(estimator, block, self.feature_columns))
+                    progress(len(passthrough))
+
+        seconds = time.perf_counter() - start
+        report = {
+            "input": str(self.config.input_path),
+            "output": str(self.config.output_path),
+            "model": str(self.model_path),
+            "rows": rows,
+            "rows_dropped": dropped,
+            "chunks": n_chunks,
+            "seconds": round(seconds, 3),
+            "rows_per_s": round(rows / max(seconds, 1e-9), 1),
+            "n_workers": self.config.n_workers,
+            "chunksize": self.config.chunksize,
+            "compiled": self.compiled,
+            "dtype": self.block_dtype.name,
+        }
+        if self.config.report_file:
+            Path(self.config.report_file).parent.mkdir(parents=True, exist_ok=True)
+            with open(self.config.report_file, "w") as f:
+                json.dump(report, f, indent=4)
+        logger.info(f"Scored {rows:,} rows in {seconds:.2f} s ({report['rows_per_s']:,.0f} rows/s), "
+                    f"{dropped} invalid rows dropped, predictions at {self.config.output_path}")
+        return report
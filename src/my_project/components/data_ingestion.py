@@ -1,34 +1,321 @@
+import asyncio
+import glob
+import gzip
 import os
-import urllib.request as request
+import shutil
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from urllib import request
+
+import pandas as pd
 
 from my_project import logger
-from my_project.utils.common import get_size
+from my_project.utils.common import DataFrameWriter, get_size
+from my_project.utils.download import ChunkedDownloader, DownloadCache, RemoteUnchanged, sha256_file
+from my_project.utils.profiling import instrument, record_rows
 from my_project.entity.config_entity import DataIngestionConfig
 
+# Compressed CSV suffixes that can be decompressed on the fly
+_CSV_SUFFIXES = (".csv", ".csv.gz", ".csv.zst")
+
+
+def _member_stem(name: str) -> str:
+    """'data/winequality-red.csv.gz' -> 'winequality-red'"""
+    name = Path(name).name
+    for suffix in (".gz", ".zst", ".csv"):
+        if name.lower().endswith(suffix):
+            name = name[: -len(suffix)]
+    return name
+
+
+def _decompress(fileobj, name: str):
+    """Wrap a binary stream in the decompressor matching its suffix."""
+    if name.lower().endswith(".gz"):
+        return gzip.GzipFile(fileobj=fileobj)
+    if name.lower().endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("Reading .zst files requires the 'zstandard' package") from None
+        return zstandard.ZstdDecompressor().stream_reader(fileobj)
+    return fileobj
+
+
 class DataIngestion:
     def __init__(self, config: DataIngestionConfig):
         self.config = config
 
+    def _downloader(self) -> ChunkedDownloader:
+        return ChunkedDownloader(
+            chunk_size=self.config.chunk_size_mb << 20,
+            n_workers=self.config.download_workers,
+            max_retries=self.config.max_retries,
+        )
+
+    @instrument()
     def download_file(self) -> None:
-        """Downloads the dataset from the source URL if not already present."""
+        """
+        Makes the dataset archive available at local_data_file.
+        With a cache_dir configured the archive comes from a URL/ETag keyed
+        content cache, so an unchanged source is never fetched twice even
+        though ingestion removes local_data_file afterwards.
+        """
         local_path = Path(self.config.local_data_file)
 
-        if not local_path.exists():
-            logger.info(f"Downloading file from: [{self.config.source_URL}] to: [{local_path}]")
+        if local_path.exists():
+            if not self.config.sha256 or sha256_file(local_path) == self.config.sha256.lower():
+                logger.info(f"File already exists at: [{local_path}] (size: {get_size(local_path)} bytes)")
+                return
+            logger.warning(f"Checksum mismatch for existing [{local_path}], downloading again")
+            local_path.unlink()
+
+        logger.info(f"Downloading file from: [{self.config.source_URL}] to: [{local_path}]")
+        try:
+            if self.config.cache_dir:
+                cache = DownloadCache(self.config.cache_dir, self._downloader())
+                cached = cache.fetch(self.config.source_URL, expected_sha256=self.config.sha256)
+                # Hard link when possible so the cached copy costs no extra disk
+                try:
+                    os.link(cached, local_path)
+                except OSError:
+                    shutil.copyfile(cached, local_path)
+            else:
+                self._downloader().download(
+                    self.config.source_URL, local_path, expected_sha256=self.config.sha256
+                )
+            logger.info(f"File downloaded successfully. Size: {get_size(local_path)} bytes")
+        except Exception as e:
+            logger.error(f"Failed to download file from {self.config.source_URL}: {e}")
+            raise
+
+    def _remote_sources(self) -> list:
+        if self.config.sources:
+            return [source for source, _ in self._resolve_sources() if "://" in source]
+        return [self.config.source_URL] if "://" in str(self.config.source_URL) else []
+
+    def source_state(self, previous: dict = None) -> dict:
+        """
+        Validators of the remote sources (ETag, Last-Modified, size) from a
+        1-byte probe of each, so the stage fingerprint changes when a source
+        does. A source that cannot be reached keeps its `previous` validators:
+        offline reruns still skip, and the download cache serves its copy.
+        Local sources are fingerprinted by content (local_sources).
+        """
+        previous = previous or {}
+        downloader = self._shard_downloader()
+
+        def probe(url: str) -> tuple:
             try:
-                request.urlretrieve(self.config.source_URL, local_path)
-                logger.info(f"File downloaded successfully. Size: {get_size(local_path)} bytes")
+                info = downloader.probe(url)
+            except RemoteUnchanged:
+                return url, previous.get(url)
             except Exception as e:
-                logger.error(f"Failed to download file from {self.config.source_URL}: {e}")
-                raise
-        else:
-            logger.info(f"File already exists at: [{local_path}] (size: {get_size(local_path)} bytes)")
+                if url in previous:
+                    logger.warning(f"Could not reach {url} ({e}), assuming it is unchanged")
+                    return url, previous[url]
+                logger.warning(f"Could not reach {url} ({e})")
+                return url, None
+            return url, {key: info[key] for key in ("etag", "last_modified", "size")}
+
+        urls = self._remote_sources()
+        if not urls:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(len(urls), self.config.max_connections)) as pool:
+            return dict(pool.map(probe, urls))
+
+    def local_sources(self) -> list:
+        """Local source files, whose digests are part of the stage fingerprint."""
+        if self.config.sources:
+            return [Path(source) for source, _ in self._resolve_sources() if "://" not in source]
+        return [] if "://" in str(self.config.source_URL) else [Path(self.config.source_URL)]
+
+    @contextmanager
+    def _open_members(self, archive: Path):
+        """Yield (name, binary stream) for every CSV member of a zip, or the file itself."""
+        streams = []
+        try:
+            if zipfile.is_zipfile(archive):
+                zip_ref = zipfile.ZipFile(archive, "r")
+                streams.append(zip_ref)
+                names = [n for n in zip_ref.namelist() if n.lower().endswith(_CSV_SUFFIXES)]
+                members = [(n, _decompress(zip_ref.open(n), n)) for n in names]
+            else:
+                raw = archive.open("rb")
+                streams.append(raw)
+                members = [(archive.name, _decompress(raw, archive.name))]
+            streams.extend(stream for _, stream in members)
+            yield members
+        finally:
+            for stream in reversed(streams):
+                stream.close()
+
+    def _coerce_chunk(self, chunk: pd.DataFrame, name: str) -> pd.DataFrame:
+        """
+        Convert a raw CSV chunk to the schema dtypes. Unparseable numbers become
+        nulls (and are logged) instead of failing the whole ingest, so that
+        data validation reports them as missing values. Integer columns holding
+        nulls use the nullable Int64 dtype, which maps to the same Arrow type.
+        """
+        for column, dtype in (self.config.schema or {}).items():
+            if column not in chunk.columns:
+                continue
+            if pd.api.types.is_numeric_dtype(pd.api.types.pandas_dtype(dtype)):
+                values = pd.to_numeric(chunk[column], errors="coerce")
+                bad = int(values.isna().sum() - chunk[column].isna().sum())
+                if bad:
+                    logger.warning(f"{name}: {bad} unparseable value(s) in column '{column}' set to null")
+                if pd.api.types.is_integer_dtype(dtype) and values.isna().any():
+                    dtype = "Int64"
+                chunk[column] = values.astype(dtype)
+            else:
+                chunk[column] = chunk[column].astype(dtype)
+        return chunk
+
+    def _stream_archive(self, archive: Path, out_dir: Path, prefix: str = "") -> list:
+        """Stream every CSV member of `archive` into out_dir/<prefix><member><output_format>."""
+        expected = list(self.config.schema or {})
+        written = []
+        try:
+            with self._open_members(archive) as members:
+                if not members:
+                    raise ValueError(f"No CSV members found in {archive}")
+                for name, stream in members:
+                    target = out_dir / f"{prefix}{_member_stem(name)}{self.config.output_format}"
+                    with DataFrameWriter(target) as writer:
+                        for chunk in pd.read_csv(stream, chunksize=self.config.chunksize, low_memory=False):
+                            if writer.rows == 0:
+                                missing = [c for c in expected if c not in chunk.columns]
+                                if missing:
+                                    logger.warning(f"{name}: columns missing from header: {missing}")
+                            writer.write(self._coerce_chunk(chunk, name))
+                    record_rows(writer.rows)
+                    written.append(target)
+        except zipfile.BadZipFile as e:
+            logger.error(f"Invalid zip file: {archive} ({e})")
+            raise
+        except Exception as e:
+            logger.error(f"Error while streaming {archive}: {e}")
+            raise
+        return written
 
-    def unzip_and_clean(self) -> None:
-        """Unzips the dataset and removes the original zip file."""
+    def stream_and_convert(self) -> list:
+        """
+        Decompresses each CSV member of the archive chunk by chunk straight into
+        a typed artifact (unzip_dir/<member>.<output_format>), without writing
+        the uncompressed CSV. Returns the written paths.
+        """
+        local_path = Path(self.config.local_data_file)
+        unzip_dir = Path(self.config.unzip_dir)
+
+        logger.info(f"Streaming [{local_path}] into {self.config.output_format} artifacts in [{unzip_dir}]")
+        written = self._stream_archive(local_path, unzip_dir)
+
+        self._remove_archive(local_path)
+        logger.info(f"Data ingestion completed. Typed data available at: {[str(p) for p in written]}")
+        return written
+
+    # --- sharded feeds ---
+    def _resolve_sources(self) -> list:
+        """Expand local globs; URLs are kept as they are. Returns [(source, sha256)] in a stable order."""
+        resolved = []
+        for source, sha256 in self.config.sources:
+            if "://" in source:
+                resolved.append((source, sha256))
+                continue
+            matches = sorted(glob.glob(source)) or ([source] if Path(source).exists() else [])
+            if not matches:
+                raise FileNotFoundError(f"No files match ingestion source: {source}")
+            resolved.extend((match, sha256) for match in matches)
+        return resolved
+
+    def _fetch_shard(self, index: int, source: str, sha256: str, cache: DownloadCache) -> tuple:
+        """Local path of one shard and whether it is a temporary download to remove afterwards."""
+        if "://" not in source:
+            if sha256 and sha256_file(Path(source)) != sha256.lower():
+                raise ValueError(f"Checksum mismatch for {source}")
+            return Path(source), False
+        if cache is not None:
+            return cache.fetch(source, expected_sha256=sha256), False
+
+        name = source.split("?", 1)[0].rstrip("/").rsplit("/", 1)[-1]
+        target = Path(self.config.dataset_dir) / ".downloads" / f"{index:05d}-{name}"
+        self._shard_downloader().download(source, target, expected_sha256=sha256)
+        return target, True
+
+    def _shard_downloader(self) -> ChunkedDownloader:
+        # Concurrency comes from fetching shards side by side, one connection each
+        return ChunkedDownloader(
+            chunk_size=self.config.chunk_size_mb << 20,
+            n_workers=1,
+            max_retries=self.config.max_retries,
+        )
+
+    async def _ingest_shard(self, index: int, source: str, sha256: str, cache, semaphore, progress: dict) -> list:
+        async with semaphore:
+            path, temporary = await asyncio.to_thread(self._fetch_shard, index, source, sha256, cache)
+        # The connection slot is free again: convert while other shards keep downloading
+        written = await asyncio.to_thread(
+            self._stream_archive, path, Path(self.config.dataset_dir), f"part-{index:05d}-"
+        )
+        if temporary:
+            path.unlink()
+        progress["done"] += 1
+        logger.info(f"Shard {progress['done']}/{progress['total']} ingested: {source}")
+        return written
+
+    async def _ingest_sources(self, sources: list) -> list:
+        semaphore = asyncio.Semaphore(self.config.max_connections)
+        cache = DownloadCache(self.config.cache_dir, self._shard_downloader()) if self.config.cache_dir else None
+        progress = {"done": 0, "total": len(sources)}
+        results = await asyncio.gather(*(
+            self._ingest_shard(index, source, sha256, cache, semaphore, progress)
+            for index, (source, sha256) in enumerate(sources)
+        ))
+        return [path for written in results for path in written]
+
+    @instrument()
+    def ingest_sources(self) -> list:
+        """
+        Fetches every configured shard concurrently (at most max_connections
+        downloads at a time) and streams each one into dataset_dir as soon as it
+        lands, producing a partitioned dataset of part-NNNNN-<member> files.
+        Returns the written partition paths.
+        """
+        dataset_dir = Path(self.config.dataset_dir)
+        dataset_dir.mkdir(parents=True, exist_ok=True)
+        sources = self._resolve_sources()
+
+        logger.info(f"Ingesting {len(sources)} shard(s) into [{dataset_dir}] "
+                    f"with up to {self.config.max_connections} concurrent downloads")
+        written = asyncio.run(self._ingest_sources(sources))
+
+        # Drop partitions left over from an earlier, larger feed
+        for stale in set(dataset_dir.glob(f"part-*{self.config.output_format}")) - set(written):
+            stale.unlink()
+        shutil.rmtree(dataset_dir / ".downloads", ignore_errors=True)
+
+        logger.info(f"Data ingestion completed. {len(written)} partition(s) available at: [{dataset_dir}]")
+        return written
+
+    @instrument()
+    def ingest(self) -> list:
+        """Unpacks the downloaded archive according to extract_mode."""
+        if self.config.extract_mode == "stream":
+            return self.stream_and_convert()
+        if self.config.extract_mode == "extract":
+            return self.unzip_and_clean()
+        raise ValueError(f"Unknown extract_mode '{self.config.extract_mode}', use 'extract' or 'stream'")
+
+    def _remove_archive(self, local_path: Path) -> None:
+        try:
+            local_path.unlink()
+            logger.info(f"Deleted zip file: [{local_path}]")
+        except Exception as e:
+            logger.warning(f"Could not delete zip file {local_path}: {e}")
+
+    def unzip_and_clean(self) -> list:
+        """Unzips the dataset, removes the original zip file and returns the extracted paths."""
         local_path = Path(self.config.local_data_file)
         unzip_dir = Path(self.config.unzip_dir)
 
@@ -36,6 +323,7 @@ class DataIngestion:
         try:
             with zipfile.ZipFile(local_path, "r") as zip_ref:
                 zip_ref.extractall(unzip_dir)
+                extracted = [unzip_dir / name for name in zip_ref.namelist() if not name.endswith("/")]
             logger.info("Unzipping completed successfully.")
         except zipfile.BadZipFile as e:
             logger.error(f"Invalid zip file: {local_path} ({e})")
@@ -45,9 +333,6 @@ class DataIngestion:
             raise
 
         # Clean up zip file only after successful extraction
-        try:
-            local_path.unlink()
-            logger.info(f"Deleted zip file: [{local_path}]")
-        except Exception as e:
-            logger.warning(f"Could not delete zip file {local_path}: {e}")
+        self._remove_archive(local_path)
         logger.info(f"Data ingestion completed. Unzipped data available at: [{unzip_dir}]")
+        return extracted
@@ -0,0 +1,149 @@
+# components of the train/validation/test splitter
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from my_project import logger
+from my_project.utils.quantile_sketch import KLLSketch
+
+
+# Split labels returned by DataSplitter.assign, in this order
+SPLITS = ("train", "validation", "test")
+TRAIN, VALIDATION, TEST = range(len(SPLITS))
+
+
+class DataSplitter:
+    """
+    Assigns rows to train/validation/test one chunk at a time, so the data
+    never has to fit in memory and every row's split is reproducible.
+
+    hash:       a row's split comes from a seeded hash of its key columns, so
+                it never changes between reruns, chunk sizes or appended data.
+    stratified: within each `stratify_column` value, a row's split comes from
+                the same seeded hash of its key columns compared against the
+                split fractions, so every stratum gets its share (in
+                expectation, binomial spread for small strata) and a row's
+                split never depends on the other rows: appending, removing
+                or reordering data moves none of them.
+    time:       rows at/after cutoffs["test"] go to test, rows in
+                [cutoffs["validation"], cutoffs["test"]) to validation. Without
+                explicit cutoffs they are estimated from time quantiles by fit().
+    """
+
+    def __init__(
+        self,
+        strategy: str = "hash",
+        test_size: float = 0.2,
+        validation_size: float = 0.0,
+        seed: int = 42,
+        key_columns: Optional[list] = None,
+        stratify_column: Optional[str] = None,
+        time_column: Optional[str] = None,
+        cutoffs: Optional[dict] = None,
+    ):
+        if strategy not in ("hash", "stratified", "time"):
+            raise ValueError(f"Unknown split strategy '{strategy}', use 'hash', 'stratified' or 'time'")
+        if not 0 < test_size + validation_size < 1:
+            raise ValueError("test_size + validation_size must be between 0 and 1")
+        if strategy == "stratified" and not stratify_column:
+            raise ValueError("The stratified split needs a stratify_column")
+        if strategy == "time" and not time_column:
+            raise ValueError("The time split needs a time_column")
+
+        self.strategy = strategy
+        self.test_size = test_size
+        self.validation_size = validation_size
+        self.seed = seed
+        self.key_columns = list(key_columns) if key_columns else None
+        self.stratify_column = stratify_column
+        self.time_column = time_column
+        self.cutoffs = dict(cutoffs) if cutoffs else None
+        # hash_pandas_object takes a 16 character key
+        self._hash_key = f"{seed:016d}"[-16:]
+
+    @property
+    def has_validation(self) -> bool:
+        if self.strategy == "time" and self.cutoffs:
+            return self.cutoffs.get("validation") is not None
+        return self.validation_size > 0
+
+    @property
+    def needs_fit(self) -> bool:
+        return self.strategy == "time" and not self.cutoffs
+
+    # --- helpers ---
+    def _by_fraction(self, u: np.ndarray) -> np.ndarray:
+        """Map uniform values in [0, 1) to split labels."""
+        labels = np.full(len(u), TRAIN, dtype=np.int8)
+        labels[u < self.test_size + self.validation_size] = VALIDATION
+        labels[u < self.test_size] = TEST
+        return labels
+
+    def _hash_uniform(self, frame: pd.DataFrame) -> np.ndarray:
+        hashes = pd.util.hash_pandas_object(frame, index=False, hash_key=self._hash_key).to_numpy()
+        # Top 53 bits -> exactly representable floats in [0, 1)
+        return (hashes >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+    def _time_values(self, values: pd.Series) -> pd.Series:
+        if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_datetime64_any_dtype(values):
+            return values
+        return pd.to_datetime(values)
+
+    def _cutoff(self, name: str, like: pd.Series):
+        value = self.cutoffs.get(name)
+        if value is None:
+            return None
+        return pd.Timestamp(value) if pd.api.types.is_datetime64_any_dtype(like) else value
+
+    # --- fitting (time strategy without explicit cutoffs) ---
+    def fit(self, chunks: Iterable[pd.DataFrame]) -> "DataSplitter":
+        """Estimate time cutoffs from the time column quantiles in one streaming pass."""
+        if not self.needs_fit:
+            return self
+
+        sketch, is_datetime, tz = KLLSketch(k=1000, seed=self.seed), False, None
+        for chunk in chunks:
+            values = self._time_values(chunk[self.time_column])
+            if pd.api.types.is_datetime64_any_dtype(values):
+                is_datetime, tz = True, getattr(values.dt, "tz", None)
+                values = values.dropna().dt.as_unit("ns").astype("int64")
+            sketch.update(values.to_numpy(dtype=np.float64))
+
+        qs = [1 - self.test_size - self.validation_size, 1 - self.test_size]
+        validation_start, test_start = sketch.quantiles(qs)
+        if is_datetime:
+            validation_start, test_start = (pd.Timestamp(int(v), tz=tz) for v in (validation_start, test_start))
+        self.cutoffs = {"validation": validation_start if self.validation_size > 0 else None, "test": test_start}
+        logger.info(f"Time split cutoffs estimated from '{self.time_column}' quantiles: {self.cutoffs}")
+        return self
+
+    # --- assignment ---
+    def assign(self, chunk: pd.DataFrame) -> np.ndarray:
+        """Split label (TRAIN / VALIDATION / TEST) for every row of `chunk`, in order."""
+        if self.strategy == "hash":
+            return self._by_fraction(self._hash_uniform(chunk[self.key_columns or list(chunk.columns)]))
+        if self.strategy == "stratified":
+            return self._assign_stratified(chunk)
+        return self._assign_time(chunk)
+
+    def _assign_stratified(self, chunk: pd.DataFrame) -> np.ndarray:
+        key_columns = self.key_columns or list(chunk.columns)
+        strata = chunk[self.stratify_column].astype(str).to_numpy()
+        labels = np.empty(len(chunk), dtype=np.int8)
+        for stratum in pd.unique(strata):
+            # Per row, not per arrival position: the split of a row depends on its content alone
+            rows = np.flatnonzero(strata == stratum)
+            labels[rows] = self._by_fraction(self._hash_uniform(chunk.iloc[rows][key_columns]))
+        return labels
+
+    def _assign_time(self, chunk: pd.DataFrame) -> np.ndarray:
+        if self.cutoffs is None:
+            raise RuntimeError("Call fit() first or configure explicit time cutoffs")
+        values = self._time_values(chunk[self.time_column])
+        labels = np.full(len(chunk), TRAIN, dtype=np.int8)
+        validation_start = self._cutoff("validation", values)
+        if validation_start is not None:
+            labels[(values >= validation_start).to_numpy()] = VALIDATION
+        labels[(values >= self._cutoff("test", values)).to_numpy()] = TEST
+        return labels
@@ -1,35 +1,97 @@
 # components of data transformation
-import os
-import pandas as pd
-from sklearn.model_selection import train_test_split
+from contextlib import ExitStack
+from pathlib import Path
+
+import numpy as np
+import yaml
+
 from my_project import logger
+from my_project.components.data_splitter import SPLITS, DataSplitter
+from my_project.components.feature_preprocessor import FeaturePreprocessor
+from my_project.utils.common import DataFrameWriter, iter_dataframe_chunks, save_binary
+from my_project.utils.profiling import instrument, record_rows
 from my_project.entity.config_entity import DataTransformationConfig
 
 class DataTransformation:
     def __init__(self, config: DataTransformationConfig):
         self.config = config
 
-    def initiate_data_transformation(self):
+    def _chunks(self):
+        return iter_dataframe_chunks(self.config.data_path, chunksize=self.config.chunksize, schema=self.config.schema)
+
+    @instrument()
+    def initiate_data_transformation(self) -> dict:
+        """
+        Splits the validated data chunk by chunk into train/test (and
+        optionally validation) artifacts, then fits the feature preprocessor
+        on train. Returns {artifact name: path}.
+        """
         logger.info("Data Transformation started")
-        
-        # Load data
-        df = pd.read_csv(self.config.data_path)
 
-        # Split into train and test
-        train_df, test_df = train_test_split(df, test_size=0.2, random_state=42)
-        
+        splitter = DataSplitter(**self.config.split)
+        if splitter.needs_fit:
+            splitter.fit(self._chunks())
+
+        paths = {
+            "train": self.config.train_data_path,
+            "validation": self.config.validation_data_path,
+            "test": self.config.test_data_path,
+        }
+        if not splitter.has_validation:
+            del paths["validation"]
+
+        # Assign and append every chunk as it is read
+        with ExitStack() as stack:
+            writers = {
+                name: stack.enter_context(
+                    DataFrameWriter(path, schema=self.config.schema, export_csv=self.config.export_csv)
+                )
+                for name, path in paths.items()
+            }
+            for chunk in self._chunks():
+                labels = splitter.assign(chunk)
+                for label, name in enumerate(SPLITS):
+                    if name in writers:
+                        writers[name].write(chunk[labels == np.int8(label)])
+
         # Print or log shapes
-        print("Train shape:", train_df.shape)
-        print("Test shape:", test_df.shape)
-        logger.info(f"Train shape: {train_df.shape}, Test shape: {test_df.shape}")
-        
-        # Define file paths
-        train_path = os.path.join(self.config.root_dir, "train.csv")
-        test_path = os.path.join(self.config.root_dir, "test.csv")
-
-        # Save transformed data
-        train_df.to_csv(train_path, index=False)
-        test_df.to_csv(test_path, index=False)
-        
+        shapes = {name: writer.rows for name, writer in writers.items()}
+        record_rows(sum(shapes.values()))
+        print("Split rows:", shapes)
+        logger.info(f"{splitter.strategy} split rows: {shapes}")
+
+        paths["preprocessor"] = self.fit_preprocessor()
+
         logger.info(f"Transformed data saved at {self.config.root_dir}")
-        return train_path, test_path
+        return paths
+
+    def _clip_bounds(self) -> dict:
+        """Per-column IQR bounds recorded by data validation."""
+        report_path = self.config.validation_report
+        if not report_path or not Path(report_path).exists():
+            logger.warning(f"Validation report {report_path} not found, features will not be clipped")
+            return {}
+        with open(report_path, "r") as f:
+            report = yaml.safe_load(f) or {}
+        return report.get("iqr_bounds", {})
+
+    def fit_preprocessor(self) -> Path:
+        """Fit the FeaturePreprocessor on the train split (chunk by chunk) and save it."""
+        settings = dict(self.config.preprocessing or {})
+        features = [column for column in self.config.schema if column != self.config.target_column]
+        bounds = self._clip_bounds() if settings.get("clip_to_iqr", False) else {}
+        preprocessor = FeaturePreprocessor(
+            clip_bounds={column: bounds[column] for column in features if column in bounds} or None,
+            log_columns=list(settings.get("log_columns") or []),
+            scale=settings.get("scale", True),
+        )
+
+        for chunk in iter_dataframe_chunks(
+            self.config.train_data_path, chunksize=self.config.chunksize, columns=features
+        ):
+            preprocessor.partial_fit(chunk)
+
+        save_binary(self.config.preprocessor_path, preprocessor)
+        logger.info(f"Preprocessor fitted on {preprocessor.n_samples_seen_} train rows "
+                    f"(log1p: {list(preprocessor.log_columns)}, clipped: {sorted(preprocessor.clip_bounds or {})})")
+        return self.config.preprocessor_path
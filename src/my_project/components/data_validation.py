@@ -4,8 +4,14 @@ import pandas as pd
 import yaml
 import numpy as np
 from pathlib import Path
-from typing import Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List
 from my_project import logger
+from my_project.utils.common import (
+    DataFrameWriter, dataset_files, expand_glob, iter_dataframe_chunks, load_dataframe, save_dataframe,
+)
+from my_project.utils.profiling import instrument, record_rows
+from my_project.utils.quantile_sketch import KLLSketch
 
 from my_project.entity.config_entity import DataValidationConfig
 
@@ -27,67 +33,391 @@ class DataValidation:
         with open(self.config.all_schema, "r") as f:
             self.schema: Dict[str, Any] = yaml.safe_load(f)
 
-    def _detect_outliers(self, df: pd.DataFrame, column: str):
-        """Return dict of outliers {index: value} and list of indices using IQR method."""
-        Q1 = df[column].quantile(0.25)
-        Q3 = df[column].quantile(0.75)
-        IQR = Q3 - Q1
-        lower_bound = Q1 - 1.5 * IQR
-        upper_bound = Q3 + 1.5 * IQR
+    def _outlier_bounds(self, q1: np.ndarray, q3: np.ndarray, columns) -> pd.DataFrame:
+        """Per-column q1, q3 and IQR bounds."""
+        iqr = q3 - q1
+        return pd.DataFrame(
+            {"q1": q1, "q3": q3, "lower_bound": q1 - 1.5 * iqr, "upper_bound": q3 + 1.5 * iqr},
+            index=pd.Index(columns),
+        )
 
-        outlier_mask = (df[column] < lower_bound) | (df[column] > upper_bound)
-        outliers = df.loc[outlier_mask, column]
-        return outliers.to_dict(), outliers.index.tolist()
+    def _outlier_mask(self, values: np.ndarray, stats: pd.DataFrame) -> np.ndarray:
+        return (values < stats["lower_bound"].to_numpy()) | (values > stats["upper_bound"].to_numpy())
 
+    def _detect_outliers(self, df: pd.DataFrame):
+        """
+        IQR outlier detection over all numeric columns in a single pass.
+        Returns (stats, mask): stats is a per-column frame with q1, q3,
+        lower_bound and upper_bound; mask is a 2-D boolean array of shape
+        (rows, columns).
+        """
+        numeric = df.select_dtypes(include=["float64", "int64"])
+        q1, q3 = numeric.quantile([0.25, 0.75]).to_numpy()
+        stats = self._outlier_bounds(q1, q3, numeric.columns)
+        mask = self._outlier_mask(numeric.to_numpy(dtype=np.float64), stats)
+        return stats, mask
+
+    def _summarize_outliers(self, stats: pd.DataFrame, counts, samples: Dict[str, dict]) -> dict:
+        """Per-column outlier summary: count, quartiles, bounds and a capped sample of rows."""
+        summary = {}
+        for column, count in zip(stats.index, counts):
+            if not count:
+                continue
+            summary[column] = {
+                "count": int(count),
+                **{key: round(float(value), 6) for key, value in stats.loc[column].items()},
+                "sample": samples.get(column, {}),
+            }
+        return summary
+
+    def _collect_samples(self, df: pd.DataFrame, stats: pd.DataFrame, mask: np.ndarray, samples: dict) -> None:
+        """Add flagged rows to `samples`; capped at max_outlier_samples unless report_mode is full."""
+        for j in np.flatnonzero(mask.any(axis=0)):
+            column = stats.index[j]
+            taken = samples.setdefault(column, {})
+            rows = np.flatnonzero(mask[:, j])
+            if self.config.report_mode != "full":
+                rows = rows[:max(self.config.max_outlier_samples - len(taken), 0)]
+            taken.update(zip(df.index[rows].tolist(), df[column].to_numpy()[rows].tolist()))
+
+    def _save_outlier_mask(self, mask: np.ndarray) -> None:
+        """Full outlier mask as .npy so downstream tools can np.load(..., mmap_mode="r") it."""
+        self.config.outlier_mask_file.parent.mkdir(parents=True, exist_ok=True)
+        np.save(self.config.outlier_mask_file, mask)
+        logger.info(f"Outlier mask {mask.shape} saved to {self.config.outlier_mask_file}")
+
+    # --- report helpers shared by the in-memory and streaming modes ---
+    def _add_error(self, report: dict, error: str) -> None:
+        if error not in report["errors"]:
+            report["errors"].append(error)
+
+    def _check_columns(self, columns, report: dict) -> None:
+        expected_columns = set(self.schema.get("columns", {}).keys())
+        actual_columns = set(columns)
+        if expected_columns != actual_columns:
+            self._add_error(report, f"Column mismatch. Expected: {expected_columns}, Found: {actual_columns}")
+
+    def _check_dtypes(self, dtypes, report: dict) -> None:
+        """dtypes: mapping of column -> dtype (e.g. df.dtypes)."""
+        for column, expected_type in self.schema.get("columns", {}).items():
+            if column in dtypes:
+                actual_type = str(dtypes[column])
+                if actual_type not in DTYPE_MAPPING.get(expected_type, [expected_type]):
+                    self._add_error(
+                        report, f"Type mismatch for '{column}': expected {expected_type}, found {actual_type}"
+                    )
+
+    @staticmethod
+    def _unify_dtypes(dtypes: dict, chunk_dtypes: pd.Series) -> dict:
+        """
+        Fold a chunk's dtypes into the running ones the way one full read
+        would infer them: pandas infers every CSV chunk on its own, so a float
+        column holding only whole numbers in one chunk comes out int64 there.
+        """
+        for column, dtype in chunk_dtypes.items():
+            seen = dtypes.get(column, dtype)
+            if seen != dtype:
+                numeric = all(pd.api.types.is_numeric_dtype(t) and not pd.api.types.is_bool_dtype(t) for t in (seen, dtype))
+                dtype = np.result_type(seen, dtype) if numeric else np.dtype(object)
+            dtypes[column] = dtype
+        return dtypes
+
+    def _check_missing(self, missing: pd.Series, report: dict) -> None:
+        missing = missing[missing > 0]
+        for col, count in missing.items():
+            self._add_error(report, f"Missing values in column '{col}': {int(count)}")
+
+    def _record_outliers(self, report: dict, stats: pd.DataFrame, counts, samples: dict, shape) -> None:
+        for column, count in zip(stats.index, counts):
+            if count:
+                report["warnings"].append(f"Column '{column}' has {count} potential outliers")
+
+        # Full mode dumps every outlier row, summary mode keeps a capped sample
+        if self.config.report_mode == "full":
+            report["outliers"] = samples
+        else:
+            report["outliers"] = self._summarize_outliers(stats, counts, samples)
+
+        # Bounds of every numeric column, e.g. for clipping during transformation
+        report["iqr_bounds"] = {
+            column: [round(float(row.lower_bound), 6), round(float(row.upper_bound), 6)]
+            for column, row in stats.iterrows()
+        }
+
+        # The complete row set lives in a compact binary sidecar instead of the YAML
+        report["outlier_mask"] = {
+            "file": str(self.config.outlier_mask_file),
+            "columns": stats.index.tolist(),
+            "shape": list(shape),
+        }
+
+    def _input_files(self) -> List[Path]:
+        """unzip_data_dir may be a file, a directory of data files, or a glob pattern."""
+        path = Path(self.config.unzip_data_dir)
+        files = dataset_files(path) if path.is_dir() else expand_glob(path)
+        if not files:
+            raise FileNotFoundError(f"Data file not found: {self.config.unzip_data_dir}")
+        return files
+
+    # --- per column-group work, run inside the process pool ---
+    def _validate_group(self, path: Path, columns: list, exact: bool) -> dict:
+        """
+        Checks and outlier statistics for one file restricted to `columns`.
+        With exact=True (single input file) the quartiles, mask and samples are
+        final; otherwise KLL sketches are returned so bounds can be merged
+        across files before flagging.
+        """
+        df = load_dataframe(path, columns=columns)
+        result = {
+            "dtypes": df.dtypes.astype(str).to_dict(),
+            "missing": df.isnull().sum(),
+            "n_rows": len(df),
+        }
+        if exact:
+            stats, mask = self._detect_outliers(df)
+            samples = {}
+            self._collect_samples(df, stats, mask, samples)
+            result.update(stats=stats, mask=mask, samples=samples)
+        else:
+            numeric = df.select_dtypes(include=["float64", "int64"])
+            result["sketches"] = {
+                column: KLLSketch(k=self.config.sketch_k).update(numeric[column].to_numpy(dtype=np.float64))
+                for column in numeric.columns
+            }
+        return result
+
+    def _flag_group(self, path: Path, columns: list, stats: pd.DataFrame, offset: int) -> dict:
+        """Outlier mask and samples for one file/column group against merged bounds."""
+        df = load_dataframe(path, columns=columns)
+        df.index = pd.RangeIndex(offset, offset + len(df))
+        mask = self._outlier_mask(df[stats.index].to_numpy(dtype=np.float64), stats)
+        samples = {}
+        self._collect_samples(df[stats.index], stats, mask, samples)
+        return {"mask": mask, "samples": samples}
+
+    # --- validation modes ---
+    def _validate_in_memory(self, report: dict, remove_outliers: bool) -> Path:
+        # Read without forcing dtypes: the type check below is part of validation
+        df = load_dataframe(self._input_files()[0])
+        record_rows(len(df))
+
+        # Validate columns, data types and missing values
+        self._check_columns(df.columns, report)
+        self._check_dtypes(df.dtypes, report)
+        self._check_missing(df.isnull().sum(), report)
+
+        # Outlier detection (IQR method, all columns at once)
+        stats, mask = self._detect_outliers(df)
+        samples = {}
+        self._collect_samples(df, stats, mask, samples)
+        self._save_outlier_mask(mask)
+        self._record_outliers(report, stats, mask.sum(axis=0), samples, mask.shape)
+
+        # Remove outliers if requested (a row goes if any column flags it)
+        outlier_rows = mask.any(axis=1)
+        if remove_outliers and outlier_rows.any():
+            logger.info(f"Removing {int(outlier_rows.sum())} outlier rows")
+            df = df.loc[~outlier_rows]
+
+        # Save the cleaned dataset inside data_validation artifacts (typed by schema when valid)
+        return save_dataframe(
+            self.config.cleaned_data_file,
+            df,
+            schema=None if report["errors"] else self.schema.get("columns"),
+            export_csv=self.config.export_csv,
+        )
+
+    def _validate_streaming(self, report: dict, remove_outliers: bool) -> Path:
+        """
+        Two passes over the input in chunks, so memory is bounded by `chunksize`:
+        1. schema, dtype and null checks per chunk, plus a KLL quartile sketch per column
+        2. outlier flagging against the sketched bounds, writing the mask and the
+           cleaned rows incrementally
+        Quartiles (and so the bounds) are approximate, within the sketch's rank error.
+        """
+        schema_columns = self.schema.get("columns", {})
+        numeric_columns = [
+            column for column, dtype in schema_columns.items()
+            if dtype in DTYPE_MAPPING["int"] + DTYPE_MAPPING["float"] + ["int", "float"]
+        ]
+
+        def chunks():
+            # Chain every input file, numbering rows globally
+            offset = 0
+            for path in self._input_files():
+                for chunk in iter_dataframe_chunks(path, chunksize=self.config.chunksize):
+                    chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+                    offset += len(chunk)
+                    yield chunk
+
+        # --- pass 1: schema checks and quartile sketches ---
+        sketches = {column: KLLSketch(k=self.config.sketch_k) for column in numeric_columns}
+        missing = pd.Series(dtype=np.int64)
+        dtypes = {}
+        n_rows = 0
+        for i, chunk in enumerate(chunks()):
+            if i == 0:
+                self._check_columns(chunk.columns, report)
+            self._unify_dtypes(dtypes, chunk.dtypes)
+            missing = missing.add(chunk.isnull().sum(), fill_value=0)
+            for column in numeric_columns:
+                if column in chunk.columns:
+                    sketches[column].update(chunk[column].to_numpy(dtype=np.float64))
+            n_rows += len(chunk)
+        self._check_dtypes(dtypes, report)
+        self._check_missing(missing, report)
+
+        numeric_columns = [column for column in numeric_columns if sketches[column].count]
+        # (columns, 2) even when no numeric column has values
+        quartiles = np.array(
+            [sketches[column].quantiles([0.25, 0.75]) for column in numeric_columns], dtype=np.float64
+        ).reshape(-1, 2)
+        stats = self._outlier_bounds(quartiles[:, 0], quartiles[:, 1], numeric_columns)
+        record_rows(n_rows)
+        logger.info(f"Pass 1 done: {n_rows} rows, quartiles sketched for {len(numeric_columns)} columns")
+
+        # --- pass 2: flag outliers and stream the cleaned rows out ---
+        shape = (n_rows, len(numeric_columns))
+        self.config.outlier_mask_file.parent.mkdir(parents=True, exist_ok=True)
+        mask_file = np.lib.format.open_memmap(self.config.outlier_mask_file, mode="w+", dtype=bool, shape=shape)
+        counts = np.zeros(len(numeric_columns), dtype=np.int64)
+        samples = {}
+
+        schema = None if report["errors"] else schema_columns
+        with DataFrameWriter(self.config.cleaned_data_file, schema=schema, export_csv=self.config.export_csv) as writer:
+            offset = 0
+            for chunk in chunks():
+                mask = self._outlier_mask(chunk[numeric_columns].to_numpy(dtype=np.float64), stats)
+                mask_file[offset:offset + len(chunk)] = mask
+                counts += mask.sum(axis=0)
+                self._collect_samples(chunk, stats, mask, samples)
+
+                keep = ~mask.any(axis=1) if remove_outliers else np.ones(len(chunk), dtype=bool)
+                writer.write(chunk.loc[keep])
+                offset += len(chunk)
+
+        mask_file.flush()
+        del mask_file
+        logger.info(f"Removed {n_rows - writer.rows} outlier rows" if remove_outliers else "Outliers kept")
+
+        self._record_outliers(report, stats, counts.tolist(), samples, shape)
+        return self.config.cleaned_data_file
+
+    def _merge_samples(self, samples: dict, new_samples: dict) -> None:
+        for column, rows in new_samples.items():
+            taken = samples.setdefault(column, {})
+            if self.config.report_mode != "full":
+                rows = dict(list(rows.items())[:max(self.config.max_outlier_samples - len(taken), 0)])
+            taken.update(rows)
+
+    def _validate_parallel(self, report: dict, remove_outliers: bool) -> Path:
+        """
+        Split the schema columns (and the input files) into tasks for a process
+        pool of n_workers, then merge the per-worker results into one report.
+        A single file is profiled exactly in one round; several files need a
+        second round so every file is flagged against the merged bounds.
+        """
+        files = self._input_files()
+        exact = len(files) == 1
+        schema_order = list(self.schema.get("columns", {}).keys())
+
+        def in_schema_order(columns):
+            return [c for c in schema_order if c in columns] + [c for c in columns if c not in schema_order]
+
+        # Column groups come from each file's header, in schema order
+        tasks = []
+        for file_index, path in enumerate(files):
+            header = list(next(iter_dataframe_chunks(path, chunksize=1)).columns)
+            self._check_columns(header, report)
+            ordered = in_schema_order(header)
+            n_groups = min(self.config.n_workers, len(ordered))
+            for group in np.array_split(np.array(ordered, dtype=object), n_groups):
+                tasks.append((file_index, path, list(group)))
+        logger.info(f"Validating {len(files)} file(s) as {len(tasks)} tasks on {self.config.n_workers} workers")
+
+        with ProcessPoolExecutor(max_workers=self.config.n_workers) as pool:
+            futures = [
+                pool.submit(_validate_group_task, self.config, path, columns, exact)
+                for _, path, columns in tasks
+            ]
+            results = [future.result() for future in futures]
+
+            # --- merge schema checks ---
+            missing = pd.Series(dtype=np.int64)
+            n_rows = [0] * len(files)
+            for (file_index, _, _), result in zip(tasks, results):
+                self._check_dtypes(result["dtypes"], report)
+                missing = missing.add(result["missing"], fill_value=0)
+                n_rows[file_index] = result["n_rows"]
+            self._check_missing(missing, report)
+            record_rows(sum(n_rows))
+            offsets = np.concatenate([[0], np.cumsum(n_rows)]).astype(int)
+
+            # --- merge outlier statistics ---
+            samples = {}
+            if exact:
+                stats = pd.concat([result["stats"] for result in results])
+                mask = np.hstack([result["mask"] for result in results])
+                for result in results:
+                    self._merge_samples(samples, result["samples"])
+            else:
+                sketches = {}
+                for result in results:
+                    for column, sketch in result["sketches"].items():
+                        sketches[column] = sketches[column].merge(sketch) if column in sketches else sketch
+                columns = in_schema_order(list(sketches))
+                quartiles = np.array([sketches[column].quantiles([0.25, 0.75]) for column in columns])
+                stats = self._outlier_bounds(quartiles[:, 0], quartiles[:, 1], columns)
+
+                # Second round: flag every file/column group against the merged bounds
+                flag_futures = []
+                for file_index, path, group in tasks:
+                    group_columns = [c for c in group if c in stats.index]
+                    if group_columns:
+                        future = pool.submit(
+                            _flag_group_task, self.config, path, group_columns,
+                            stats.loc[group_columns], int(offsets[file_index]),
+                        )
+                        flag_futures.append((file_index, group_columns, future))
+
+                # Stitch column groups side by side and files on top of each other
+                mask = np.zeros((int(offsets[-1]), len(stats)), dtype=bool)
+                for file_index, group_columns, future in flag_futures:
+                    flagged = future.result()
+                    rows = slice(offsets[file_index], offsets[file_index + 1])
+                    mask[rows, stats.index.get_indexer(group_columns)] = flagged["mask"]
+                    self._merge_samples(samples, flagged["samples"])
+
+        self._save_outlier_mask(mask)
+        self._record_outliers(report, stats, mask.sum(axis=0), samples, mask.shape)
+
+        # Write the cleaned rows file by file (a row goes if any column flags it)
+        keep = ~mask.any(axis=1) if remove_outliers else np.ones(len(mask), dtype=bool)
+        if remove_outliers:
+            logger.info(f"Removing {int((~keep).sum())} outlier rows")
+        schema = None if report["errors"] else self.schema.get("columns")
+        with DataFrameWriter(self.config.cleaned_data_file, schema=schema, export_csv=self.config.export_csv) as writer:
+            for file_index, path in enumerate(files):
+                df = load_dataframe(path)
+                writer.write(df[keep[offsets[file_index]:offsets[file_index + 1]]])
+        return self.config.cleaned_data_file
+
+    @instrument()
     def validate_data(self, remove_outliers: bool = True) -> bool:
         report = {"status": "success", "errors": [], "warnings": [], "outliers": {}}
 
         try:
-            logger.info("Starting data validation")
-
-            # Check file exists
-            if not self.config.unzip_data_dir.exists():
-                raise FileNotFoundError(f"Data file not found: {self.config.unzip_data_dir}")
-
-            df = pd.read_csv(self.config.unzip_data_dir)
-
-            # Validate columns
-            expected_columns = set(self.schema.get("columns", {}).keys())
-            actual_columns = set(df.columns)
-            if expected_columns != actual_columns:
-                error = f"Column mismatch. Expected: {expected_columns}, Found: {actual_columns}"
-                report["errors"].append(error)
-
-            # Validate data types
-            for column, expected_type in self.schema.get("columns", {}).items():
-                if column in df.columns:
-                    actual_type = str(df[column].dtype)
-                    if actual_type not in DTYPE_MAPPING.get(expected_type, [expected_type]):
-                        error = f"Type mismatch for '{column}': expected {expected_type}, found {actual_type}"
-                        report["errors"].append(error)
-
-            # Missing values check
-            missing = df.isnull().sum()
-            missing = missing[missing > 0]
-            if not missing.empty:
-                for col, count in missing.items():
-                    report["errors"].append(f"Missing values in column '{col}': {count}")
-
-            # Outlier detection (IQR method, per column)
-            all_outlier_indices = set()
-            for column in df.select_dtypes(include=["float64", "int64"]).columns:
-                outlier_dict, outlier_indices = self._detect_outliers(df, column)
-                if outlier_dict:
-                    report["warnings"].append(
-                        f"Column '{column}' has {len(outlier_dict)} potential outliers"
-                    )
-                    report["outliers"][column] = outlier_dict
-                    all_outlier_indices.update(outlier_indices)
+            logger.info(f"Starting data validation ({self.config.mode} mode)")
+
+            # Check the input file(s) exist
+            files = self._input_files()
 
-            # Remove outliers if requested
-            if remove_outliers and all_outlier_indices:
-                logger.info(f"Removing {len(all_outlier_indices)} outlier rows")
-                df = df.drop(index=all_outlier_indices)
+            if self.config.mode == "streaming":
+                cleaned_file = self._validate_streaming(report, remove_outliers)
+            elif len(files) > 1 or self.config.n_workers > 1:
+                cleaned_file = self._validate_parallel(report, remove_outliers)
+            else:
+                cleaned_file = self._validate_in_memory(report, remove_outliers)
 
             # Finalize report
             if report["errors"]:
@@ -95,11 +425,6 @@ class DataValidation:
                 logger.error(f"Validation failed with errors: {report['errors']}")
             else:
                 logger.info("Data validation completed successfully")
-
-            # Save the cleaned dataset inside data_validation artifacts
-            self.config.root_dir.mkdir(parents=True, exist_ok=True)
-            cleaned_file = self.config.root_dir / "cleaned_data.csv"
-            df.to_csv(cleaned_file, index=False)
             logger.info(f"Cleaned data saved to {cleaned_file}")
 
             # Add cleaned file path to report
@@ -121,3 +446,12 @@ class DataValidation:
             yaml.dump(report, f, sort_keys=False)
 
         return report["status"] == "success"
+
+
+# Process-pool entry points (module level so they can be pickled)
+def _validate_group_task(config: DataValidationConfig, path: Path, columns: list, exact: bool) -> dict:
+    return DataValidation(config)._validate_group(path, columns, exact)
+
+
+def _flag_group_task(config: DataValidationConfig, path: Path, columns: list, stats: pd.DataFrame, offset: int) -> dict:
+    return DataValidation(config)._flag_group(path, columns, stats, offset)
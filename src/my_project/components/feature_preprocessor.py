@@ -0,0 +1,94 @@
+# components of feature preprocessing
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.utils.validation import check_is_fitted
+
+
+class FeaturePreprocessor(TransformerMixin, BaseEstimator):
+    """
+    Clip -> log1p -> standardize, fitted once on the training split.
+
+    All fitted state is a handful of float arrays aligned with the feature
+    order, so transform() is a single vectorized pass over a 2-D array and
+    the pickled transformer stays a few hundred bytes.
+
+    clip_bounds:  {column: (lower, upper)}, e.g. the data validation IQR bounds
+    log_columns:  right-skewed columns to log1p (after clipping, floored at 0)
+    scale:        standardize every feature to zero mean / unit variance
+
+    partial_fit() accumulates the scaling moments chunk by chunk, so the
+    transformer can be fitted on data that does not fit in memory.
+    """
+
+    def __init__(self, clip_bounds: Optional[dict] = None, log_columns: Optional[list] = None, scale: bool = True):
+        self.clip_bounds = clip_bounds
+        self.log_columns = log_columns
+        self.scale = scale
+
+    def _init_state(self, columns) -> None:
+        self.feature_names_in_ = np.asarray(list(columns), dtype=object)
+        self.n_features_in_ = len(columns)
+        bounds = self.clip_bounds or {}
+        self.lower_ = np.array([bounds.get(c, (-np.inf, np.inf))[0] for c in columns], dtype=np.float64)
+        self.upper_ = np.array([bounds.get(c, (-np.inf, np.inf))[1] for c in columns], dtype=np.float64)
+        self.log_mask_ = np.isin(self.feature_names_in_, list(self.log_columns or []))
+        # log1p needs values > -1; skewed columns are non-negative, so floor them at 0
+        self.lower_[self.log_mask_] = np.maximum(self.lower_[self.log_mask_], 0.0)
+        self.n_samples_seen_ = 0
+        self.mean_ = np.zeros(self.n_features_in_)
+        self.m2_ = np.zeros(self.n_features_in_)  # sum of squared deviations
+
+    def _to_array(self, X) -> np.ndarray:
+        if isinstance(X, pd.DataFrame):
+            if hasattr(self, "feature_names_in_"):
+                X = X[list(self.feature_names_in_)]
+            return X.to_numpy(dtype=np.float64)
+        return np.asarray(X, dtype=np.float64)
+
+    def _clip_and_log(self, X: np.ndarray) -> np.ndarray:
+        X = np.clip(X, self.lower_, self.upper_)
+        X[:, self.log_mask_] = np.log1p(X[:, self.log_mask_])
+        return X
+
+    def partial_fit(self, X, y=None) -> "FeaturePreprocessor":
+        if not hasattr(self, "feature_names_in_"):
+            columns = X.columns if isinstance(X, pd.DataFrame) else [f"x{i}" for i in range(np.shape(X)[1])]
+            self._init_state(columns)
+
+        X = self._clip_and_log(self._to_array(X))
+        if len(X):
+            # Merge the chunk's mean/M2 into the running moments (Chan et al.)
+            n_a, n_b = self.n_samples_seen_, len(X)
+            mean_b = X.mean(axis=0)
+            m2_b = np.square(X - mean_b).sum(axis=0)
+            delta = mean_b - self.mean_
+            self.n_samples_seen_ = n_a + n_b
+            self.mean_ = self.mean_ + delta * n_b / self.n_samples_seen_
+            self.m2_ = self.m2_ + m2_b + np.square(delta) * n_a * n_b / self.n_samples_seen_
+
+        if self.scale:
+            scale = np.sqrt(self.m2_ / max(self.n_samples_seen_, 1))
+            scale[scale == 0] = 1.0  # constant columns are only centred
+            self.scale_ = scale
+        else:
+            self.scale_ = np.ones(self.n_features_in_)
+        return self
+
+    def fit(self, X, y=None) -> "FeaturePreprocessor":
+        self.__dict__.pop("feature_names_in_", None)
+        return self.partial_fit(X, y)
+
+    def transform(self, X) -> np.ndarray:
+        check_is_fitted(self, "scale_")
+        X = self._clip_and_log(self._to_array(X))
+        if self.scale:
+            X -= self.mean_
+            X /= self.scale_
+        return X
+
+    def get_feature_names_out(self, input_features=None) -> np.ndarray:
+        check_is_fitted(self, "feature_names_in_")
+        return self.feature_names_in_.copy()
@@ -0,0 +1,131 @@
+# components
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from typing import Callable
+
+import numpy as np
+from my_project import logger
+
+
+class LatencyStats:
+    """Thread-safe rolling latency window plus batch-size histogram."""
+
+    def __init__(self, window: int = 10000):
+        self._lock = threading.Lock()
+        self._latencies_ms = deque(maxlen=window)
+        self._batch_sizes = Counter()
+        self._requests = 0
+        self._batches = 0
+
+    def record_request(self, latency_ms: float) -> None:
+        with self._lock:
+            self._latencies_ms.append(latency_ms)
+            self._requests += 1
+
+    def record_batch(self, size: int) -> None:
+        # Bucket by the next power of two so the histogram stays small
+        bucket = 1 << max(size - 1, 0).bit_length()
+        with self._lock:
+            self._batch_sizes[bucket] += 1
+            self._batches += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latencies = np.fromiter(self._latencies_ms, dtype=np.float64)
+            batch_sizes = dict(sorted(self._batch_sizes.items()))
+            requests, batches = self._requests, self._batches
+
+        if latencies.size:
+            p50, p99 = np.percentile(latencies, [50, 99])
+        else:
+            p50 = p99 = 0.0
+
+        return {
+            "requests": requests,
+            "batches": batches,
+            "latency_ms": {"p50": float(p50), "p99": float(p99), "window": int(latencies.size)},
+            "batch_size_histogram": {f"<={k}": v for k, v in batch_sizes.items()},
+        }
+
+
+class MicroBatcher:
+    """
+    Collects concurrent prediction requests into micro-batches.
+
+    Callers block in `predict` while a single worker thread drains the queue,
+    stacks up to `max_batch_size` rows (or whatever arrived within
+    `max_wait_ms`) into one NumPy array and calls `predict_fn` once.
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[np.ndarray], np.ndarray],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0,
+        stats: LatencyStats = None,
+    ):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.stats = stats or LatencyStats()
+
+        self._queue: "queue.Queue[tuple[np.ndarray, Future]]" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def predict(self, rows: np.ndarray, timeout: float = None) -> np.ndarray:
+        """Predict a 2-D block of rows, sharing a batch with concurrent callers."""
+        start = time.perf_counter()
+
+        # Large requests are already batched, send them straight through
+        if len(rows) >= self.max_batch_size:
+            preds = np.asarray(self.predict_fn(rows))
+            self.stats.record_batch(len(rows))
+        else:
+            future = Future()
+            self._queue.put((rows, future))
+            preds = future.result(timeout=timeout)
+
+        self.stats.record_request((time.perf_counter() - start) * 1000.0)
+        return preds
+
+    def _collect(self) -> list:
+        """Block for the first request, then gather more until full or timed out."""
+        batch = [self._queue.get()]
+        n_rows = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait
+
+        while n_rows < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            n_rows += len(item[0])
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            blocks = [rows for rows, _ in batch]
+            try:
+                preds = np.asarray(self.predict_fn(np.vstack(blocks)))
+            except Exception as e:
+                logger.error(f"Batched prediction failed for {len(batch)} requests: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.stats.record_batch(len(preds))
+
+            # Hand each caller back its own slice of the batch
+            offset = 0
+            for rows, future in batch:
+                future.set_result(preds[offset:offset + len(rows)])
+                offset += len(rows)
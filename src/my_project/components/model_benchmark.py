@@ -0,0 +1,228 @@
+# components of the model inference benchmark
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from threadpoolctl import threadpool_limits
+
+from my_project import logger
+from my_project.components.model_registry import ModelRegistry, load_model
+from my_project.entity.config_entity import ModelBenchmarkConfig
+from my_project.utils.common import load_dataframe, resolve_n_jobs
+from my_project.utils.latency import measure_latency
+from my_project.utils.profiling import instrument
+
+
+def _package_version(name: str):
+    try:
+        return __import__(name).__version__
+    except ImportError:
+        return None
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, timeout=5
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _resident_bytes():
+    """Current RSS from /proc on Linux, else the peak RSS from getrusage; None if neither exists."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in bytes on macOS, kilobytes elsewhere
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+def _rss_growth_on_load(path: str, mmap_mode=None):
+    """
+    Resident memory added by unpickling the model, measured in a fresh spawned
+    process (tracemalloc misses buffers that compiled estimators allocate in C,
+    such as sklearn trees). The libraries models are built from are imported
+    first so only the model itself is counted.
+    """
+    import sklearn.ensemble, sklearn.linear_model, sklearn.pipeline  # noqa: F401
+    try:
+        import xgboost  # noqa: F401
+    except ImportError:
+        pass
+
+    before = _resident_bytes()
+    model = load_model(path, mmap_mode)
+    after = _resident_bytes()
+    del model
+    return None if before is None else after - before
+
+
+def _set_threads(model, n_threads: int) -> None:
+    """Point every estimator with an n_jobs knob (RF joblib threads, XGBoost OpenMP) at n_threads."""
+    estimators = [step for _, step in model.steps] if hasattr(model, "steps") else [model]
+    for estimator in estimators:
+        if hasattr(estimator, "get_params") and "n_jobs" in estimator.get_params(deep=False):
+            estimator.set_params(n_jobs=n_threads)
+
+
+class ModelBenchmark:
+    """
+    Inference benchmark of every model in the registry: load time, memory
+    footprint and predict latency percentiles / throughput for each batch
+    size and thread count, on rows of the test split. The JSON report records
+    the environment and commit, and is compared against a baseline report so
+    latency regressions show up before deploy.
+    """
+
+    def __init__(self, config: ModelBenchmarkConfig):
+        self.config = config
+
+    def _batches(self, x: pd.DataFrame) -> dict:
+        """Batches of the configured sizes, tiling the test rows when a batch is larger than the split."""
+        return {
+            size: x.iloc[np.arange(size) % len(x)].reset_index(drop=True)
+            for size in self.config.batch_sizes
+        }
+
+    def _time_predict(self, model, batch: pd.DataFrame) -> dict:
+        # Fit the number of timed calls into the per-case time budget
+        start = time.perf_counter()
+        model.predict(batch)
+        one_call = max(time.perf_counter() - start, 1e-6)
+        repeats = int(np.clip(self.config.max_seconds_per_case / one_call, 5, self.config.repeats))
+
+        timing = measure_latency(model.predict, batch, repeats=repeats, warmup=1)
+        timing["rows_per_s"] = round(len(batch) * 1000.0 / max(timing["mean_ms"], 1e-9), 1)
+        return timing
+
+    def benchmark_model(self, path: Path, batches: dict) -> dict:
+        path = Path(path)
+
+        load_seconds = []
+        for _ in range(3):
+            start = time.perf_counter()
+            model = load_model(path, self.config.mmap_mode)
+            load_seconds.append(time.perf_counter() - start)
+
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+            memory_bytes = executor.submit(_rss_growth_on_load, str(path), self.config.mmap_mode).result()
+
+        # Python and NumPy allocations made while unpickling
+        tracemalloc.start()
+        model = load_model(path, self.config.mmap_mode)
+        traced_bytes, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        threads = {}
+        for n_threads in sorted({resolve_n_jobs(n) for n in self.config.thread_counts}):
+            _set_threads(model, n_threads)
+            with threadpool_limits(limits=n_threads):
+                threads[str(n_threads)] = {
+                    str(size): self._time_predict(model, batch) for size, batch in batches.items()
+                }
+
+        return {
+            "path": str(path),
+            "size_bytes": path.stat().st_size,
+            "load_seconds": round(min(load_seconds), 5),
+            "memory_bytes": memory_bytes,
+            "traced_bytes": traced_bytes,
+            "load_peak_bytes": peak_bytes,
+            "threads": threads,
+        }
+
+    def _environment(self) -> dict:
+        return {
+            "git_commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "sklearn": _package_version("sklearn"),
+            "xgboost": _package_version("xgboost"),
+        }
+
+    def compare(self, report: dict, baseline: dict) -> list:
+        """Cases whose p50 latency grew by more than regression_tolerance over the baseline."""
+        regressions = []
+        for name, result in report["models"].items():
+            old_threads = baseline.get("models", {}).get(name, {}).get("threads", {})
+            for n_threads, sizes in result["threads"].items():
+                for size, timing in sizes.items():
+                    old = old_threads.get(n_threads, {}).get(size)
+                    if not old:
+                        continue
+                    ratio = timing["p50_ms"] / max(old["p50_ms"], 1e-9)
+                    if ratio > 1 + self.config.regression_tolerance:
+                        regressions.append({
+                            "model": name, "threads": int(n_threads), "batch_size": int(size),
+                            "baseline_p50_ms": old["p50_ms"], "p50_ms": timing["p50_ms"],
+                            "ratio": round(ratio, 3),
+                        })
+        return regressions
+
+    @instrument()
+    def run(self) -> dict:
+        test_df = load_dataframe(self.config.test_data_path)
+        x = test_df.drop(columns=[self.config.target_column], errors="ignore")
+        batches = self._batches(x)
+
+        registry = ModelRegistry(self.config.registry_file).load()
+        models = {}
+        for entry in registry["models"]:
+            logger.info(f"Benchmarking {entry['name']} ({entry['path']})")
+            models[entry["name"]] = self.benchmark_model(entry["path"], batches)
+            if entry.get("compiled"):
+                logger.info(f"Benchmarking compiled {entry['name']} ({entry['compiled']['path']})")
+                models[f"{entry['name']}.compiled"] = self.benchmark_model(entry["compiled"]["path"], batches)
+
+        report = {
+            "environment": self._environment(),
+            "data": {"path": str(self.config.test_data_path), "rows": len(x)},
+            "settings": {
+                "batch_sizes": list(self.config.batch_sizes),
+                "thread_counts": sorted({resolve_n_jobs(n) for n in self.config.thread_counts}),
+                "max_repeats": self.config.repeats,
+                "max_seconds_per_case": self.config.max_seconds_per_case,
+                "mmap_mode": self.config.mmap_mode,
+            },
+            "selected": registry.get("selected"),
+            "models": models,
+        }
+
+        baseline_file = self.config.baseline_file
+        if baseline_file and Path(baseline_file).exists():
+            baseline = json.loads(Path(baseline_file).read_text(encoding="utf-8"))
+            report["baseline"] = {"file": str(baseline_file), "git_commit": baseline.get("environment", {}).get("git_commit")}
+            report["regressions"] = self.compare(report, baseline)
+
+        Path(self.config.report_file).parent.mkdir(parents=True, exist_ok=True)
+        with open(self.config.report_file, "w") as f:
+            json.dump(report, f, indent=4)
+        logger.info(f"Benchmark report saved at {self.config.report_file}")
+
+        for regression in report.get("regressions", []):
+            logger.warning(
+                f"⚠️ Latency regression: {regression['model']} batch {regression['batch_size']} "
+                f"x{regression['threads']} threads p50 {regression['baseline_p50_ms']} -> {regression['p50_ms']} ms"
+            )
+        if report.get("regressions") and self.config.fail_on_regression:
+            raise RuntimeError(f"{len(report['regressions'])} latency regressions against {baseline_file}")
+        return report
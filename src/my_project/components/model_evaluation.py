@@ -1,31 +1,32 @@
 # components
 import os
 import json
-import joblib
+import shutil
 import pandas as pd
 import numpy as np
-import mlflow
-import uuid
 from pathlib import Path
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 from my_project import logger
+from my_project.utils.common import load_binary, load_dataframe
+from my_project.components.model_registry import ModelRegistry
+from my_project.utils.profiling import instrument, record_rows
+from my_project.utils.tracking import MLflowTracker
 
-from my_project.entity.config_entity import ModelEvaluationConfig
+from my_project.entity.config_entity import ModelEvaluationConfig, TrackingConfig
 from my_project.config.configuration import ConfigurationManager
 
 class ModelEvaluation:
-    def __init__(self, config: ModelEvaluationConfig = None):
+    def __init__(self, config: ModelEvaluationConfig = None, tracking_config: TrackingConfig = None):
         # If config not passed, create it automatically from ConfigurationManager
         self.config = config or ConfigurationManager().get_model_evaluation_config()
-
-        # --- Create a unique experiment name to avoid deleted experiment errors ---
-        experiment_name = f"model_evaluation_{uuid.uuid4().hex[:6]}"
-        mlflow.set_experiment(experiment_name)
+        # Runs go to one stable experiment (restored if it was deleted)
+        self.tracking_config = tracking_config or ConfigurationManager().get_tracking_config()
 
         # Ensure directories exist
         os.makedirs(self.config.root_dir, exist_ok=True)
         os.makedirs(Path(self.config.metric_file_name).parent, exist_ok=True)
 
+    @instrument()
     def evaluate_model(self):
         """
         Evaluate trained model on test data, log metrics to MLflow (DagsHub-compatible),
@@ -33,17 +34,20 @@ class ModelEvaluation:
         """
         try:
             # Load test data
-            test_df = pd.read_csv(self.config.test_data_path)
+            test_df = load_dataframe(self.config.test_data_path)
             if self.config.target_column not in test_df.columns:
                 raise KeyError(f"Target column '{self.config.target_column}' not found in test data")
 
+            record_rows(len(test_df))
             x_test = test_df.drop(columns=[self.config.target_column])
             y_test = test_df[self.config.target_column]
 
-            # Load trained model
-            if not Path(self.config.model_path).exists():
-                raise FileNotFoundError(f"Model file not found at {self.config.model_path}")
-            model = joblib.load(self.config.model_path)
+            # Load the model selected by the trainer stage
+            selected = ModelRegistry(self.config.registry_file).selected()
+            if not Path(selected["path"]).exists():
+                raise FileNotFoundError(f"Model file not found at {selected['path']}")
+            model = load_binary(selected["path"], mmap_mode="r")
+            logger.info(f"Evaluating selected model {selected['name']} from {selected['path']}")
 
             # Generate predictions
             y_pred = model.predict(x_test)
@@ -56,13 +60,12 @@ class ModelEvaluation:
                 "R2_Score": r2_score(y_test, y_pred)
             }
 
-            # --- LOG METRICS AND PARAMETERS TO MLflow ONLY ---
-            with mlflow.start_run(run_name="model_evaluation"):
-                if self.config.all_params:
-                    for key, value in self.config.all_params.items():
-                        mlflow.log_param(key, value)
-                for key, value in metrics.items():
-                    mlflow.log_metric(key, value)
+            # --- LOG METRICS AND PARAMETERS TO MLflow ---
+            # Buffered and sent with log_batch in the background; the stage does not wait for it
+            with MLflowTracker(self.tracking_config, run_name="model_evaluation") as tracker:
+                tracker.log_params(dict(self.config.all_params or {}))
+                tracker.log_params({"model_name": selected["name"]})
+                tracker.log_metrics(metrics)
 
             # --- SAVE METRICS LOCALLY ---
             with open(self.config.metric_file_name, "w") as f:
@@ -71,7 +74,11 @@ class ModelEvaluation:
             # --- SAVE MODEL LOCALLY AS ARTIFACT ---
             artifact_dir = Path(self.config.root_dir) / "model_artifacts"
             artifact_dir.mkdir(exist_ok=True)
-            joblib.dump(model, artifact_dir / "model.joblib")
+            # Byte copy keeps the uncompressed, mmap-able layout written by the trainer;
+            # renamed into place so processes mapping the previous copy keep their inode
+            tmp_file = artifact_dir / f"model.joblib.{os.getpid()}.tmp"
+            shutil.copyfile(selected["path"], tmp_file)
+            os.replace(tmp_file, artifact_dir / "model.joblib")
 
             logger.info(f"Model evaluation metrics logged and saved: {metrics}")
             logger.info(f"Model saved locally at: {artifact_dir / 'model.joblib'}")
@@ -0,0 +1,103 @@
+# components of the model registry
+import json
+import os
+from pathlib import Path
+from typing import List, Optional
+
+from my_project import logger
+
+
+# Metrics where a lower value is better; everything else is maximized
+LOWER_IS_BETTER = {"mse", "mae", "rmse"}
+
+
+def load_model(path, mmap_mode=None):
+    """Compiled tree models are directories of node arrays, everything else a joblib pickle."""
+    if Path(path).is_dir():
+        from my_project.components.tree_compiler import CompiledTreeModel
+        return CompiledTreeModel.load(path, mmap_mode=mmap_mode)
+    from my_project.utils.common import load_binary
+    return load_binary(path, mmap_mode=mmap_mode)
+
+
+class ModelRegistry:
+    """
+    registry.json written by the trainer stage: one entry per trained model
+    (score, artifact path, data hash, training time, size, predict latency)
+    plus the model picked by the selection policy. Evaluation and serving
+    load the selected model from here instead of a hard-coded path.
+    """
+
+    def __init__(self, registry_file: Path):
+        self.registry_file = Path(registry_file)
+
+    def load(self) -> dict:
+        if not self.registry_file.exists():
+            raise FileNotFoundError(f"Model registry not found at {self.registry_file}, run the trainer stage first")
+        return json.loads(self.registry_file.read_text(encoding="utf-8"))
+
+    def selected(self) -> dict:
+        registry = self.load()
+        return next(entry for entry in registry["models"] if entry["name"] == registry["selected"])
+
+    def selected_model_path(self) -> Optional[Path]:
+        """Path of the selected model, or None when there is no registry yet."""
+        try:
+            return Path(self.selected()["path"])
+        except (FileNotFoundError, StopIteration, KeyError):
+            return None
+
+    def serving_model_path(self, fallback: Path = None, use_compiled: bool = True) -> Path:
+        """The selected model (its compiled form if there is one and use_compiled), else `fallback`."""
+        candidates = []
+        try:
+            selected = self.selected()
+            if use_compiled and selected.get("compiled"):
+                candidates.append(selected["compiled"]["path"])
+            candidates.append(selected["path"])
+        except (FileNotFoundError, StopIteration, KeyError):
+            pass
+        if fallback is not None:
+            candidates.append(fallback)
+
+        for path in candidates:
+            if Path(path).exists():
+                return Path(path)
+        raise FileNotFoundError(f"No selected model in {self.registry_file} and no model at {fallback}")
+
+    @staticmethod
+    def select(entries: List[dict], policy: dict) -> dict:
+        """
+        Best scoring entry among those meeting the policy's limits:
+        max_p99_ms (single-row predict p99), max_batch_ms (batch predict p50),
+        max_size_mb (artifact size).
+        """
+        def within_limits(entry: dict) -> bool:
+            latency = entry["latency"]
+            checks = [
+                (policy.get("max_p99_ms"), latency["single_row"]["p99_ms"]),
+                (policy.get("max_batch_ms"), latency["batch"]["p50_ms"]),
+                (policy.get("max_size_mb"), entry["size_bytes"] / (1 << 20)),
+            ]
+            return all(limit is None or value <= limit for limit, value in checks)
+
+        eligible = [entry for entry in entries if within_limits(entry)]
+        if not eligible:
+            raise ValueError(f"No trained model satisfies the selection policy {policy}")
+
+        sign = -1 if entries[0]["metric"] in LOWER_IS_BETTER else 1
+        return max(eligible, key=lambda entry: sign * entry["score"])
+
+    def write(self, entries: List[dict], policy: dict) -> dict:
+        best = self.select(entries, policy)
+        registry = {
+            "policy": policy,
+            "selected": best["name"],
+            "models": entries,
+        }
+        self.registry_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.registry_file.with_suffix(".tmp")
+        tmp_file.write_text(json.dumps(registry, indent=4, default=str), encoding="utf-8")
+        os.replace(tmp_file, self.registry_file)
+        logger.info(f"Model registry written to {self.registry_file}, selected: {best['name']}")
+        return best
@@ -1,25 +1,74 @@
 import pandas as pd
+import numpy as np
 import os
 import json
+import math
+import time
+import hashlib
 from sklearn.linear_model import ElasticNet
 from sklearn.ensemble import RandomForestRegressor
-from xgboost import XGBRegressor
-from sklearn.model_selection import RandomizedSearchCV
-from sklearn.metrics import r2_score, mean_squared_error, mean_absolute_error
-import joblib
+from sklearn.base import clone
+from sklearn.model_selection import KFold, ParameterGrid, train_test_split
+from sklearn.metrics import get_scorer, r2_score, mean_squared_error, mean_absolute_error
+from sklearn.pipeline import Pipeline
+from joblib import Parallel, delayed
 from my_project import logging
+from my_project.utils.common import load_binary, load_dataframe, save_binary
+from my_project.utils.fit_cache import FitResultCache
+from my_project.utils.profiling import instrument, record_rows
+from my_project.utils.stage_cache import hash_object
 from functools import reduce
 from operator import mul
 
+def _take(values, idx):
+    return values.iloc[idx] if hasattr(values, "iloc") else values[idx]
+
+
+def _fit_and_score(estimator, x, y, train, test, scorer, return_estimator):
+    """Fit one candidate on one CV fold and score it; runs in a joblib worker."""
+    start = time.perf_counter()
+    estimator.fit(_take(x, train), _take(y, train))
+    fit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    score = scorer(estimator, _take(x, test), _take(y, test))
+    result = {"score": float(score), "fit_time": fit_time, "score_time": time.perf_counter() - start}
+    return result, estimator if return_estimator else None
+
+
+def _xgb_regressor():
+    from xgboost import XGBRegressor
+    return XGBRegressor(objective="reg:squarederror")
+
+
+def _is_xgboost(model) -> bool:
+    return type(model).__module__.startswith("xgboost")
+
+
+def _unseen_rows(hashes: np.ndarray, old_hashes: np.ndarray) -> np.ndarray:
+    """
+    Mask of the rows not trained on yet, by content hash. Duplicates count
+    as a multiset: a row is new beyond the number of times it was seen.
+    """
+    order = np.argsort(hashes, kind="stable")
+    sorted_hashes = hashes[order]
+    occurrence = np.arange(len(sorted_hashes)) - np.searchsorted(sorted_hashes, sorted_hashes, side="left")
+    old_sorted = np.sort(old_hashes)
+    seen = np.searchsorted(old_sorted, sorted_hashes, side="right") - np.searchsorted(old_sorted, sorted_hashes, side="left")
+    unseen = np.empty(len(hashes), dtype=bool)
+    unseen[order] = occurrence >= seen
+    return unseen
+
+
 class ModelTrainer:
     def __init__(self, config):
         self.config = config
 
-        # Candidate models
+        # Candidate models; built on demand so xgboost is only imported when it is trained
         self.models = {
-            "elasticnet": ElasticNet(),
-            "randomforest": RandomForestRegressor(),
-            "xgbregressor": XGBRegressor(objective="reg:squarederror"),
+            "elasticnet": ElasticNet,
+            "randomforest": RandomForestRegressor,
+            "xgbregressor": _xgb_regressor,
         }
 
         # Available metrics
@@ -33,46 +82,405 @@ class ModelTrainer:
         sizes = [len(v) for v in params.values()]
         return reduce(mul, sizes, 1)
 
-    def tune_model(self, model, params, x_train, y_train, scoring, n_iter=20):
+    def _search_settings(self):
+        """Search engine settings from params.yaml, with the historical defaults."""
+        search = dict(self.config.search or {})
+        return {
+            "strategy": search.get("strategy", "random"),
+            "n_iter": search.get("n_iter"),
+            "cv": search.get("cv", 3),
+            "halving": dict(search.get("halving", {}) or {}),
+            "early_stopping": dict(search.get("early_stopping", {}) or {}),
+        }
+
+    def _fit_cache(self):
+        return FitResultCache(
+            self.config.fit_cache_dir,
+            max_size_mb=self.config.fit_cache_max_mb,
+            store_estimators=self.config.fit_cache_estimators,
+        )
+
+    def _data_fingerprint(self, x, y):
+        """sha256 of the training matrix and target; part of every fit cache key."""
+        digest = hashlib.sha256()
+        for values in (x, y):
+            digest.update(np.ascontiguousarray(np.asarray(values, dtype=np.float64)).tobytes())
+        return digest.hexdigest()
+
+    def _sample_candidates(self, grid, n):
+        """
+        n combinations of the grid, ranked by a seeded hash of each combination.
+        Unlike a random draw, widening the grid keeps the earlier picks that still
+        rank in the top n, so their cached fold results stay useful.
+        """
+        combinations = list(ParameterGrid(grid))
+        combinations.sort(key=lambda params: hash_object({"seed": 42, **params}))
+        return combinations[:n]
+
+    def _plan_search(self, model, params, n_iter, settings, n_samples):
         """
-        Use RandomizedSearchCV for faster tuning.
-        n_iter = number of random combinations (dynamic)
+        Candidates and rung budgets for the configured strategy:
+        - random:  n_iter sampled combinations, one rung on all rows
+        - halving: successive halving over n_estimators or rows, keeping the
+                   best 1/factor of the candidates after each cheap budget
+        Returns (strategy, candidates, rungs, resource, refit_params); rungs is a
+        list of (n_candidates, budget).
         """
         total_combinations = self._count_total_param_combinations(params)
-        n_iter = min(n_iter, total_combinations)  # avoid warning
-
-        search = RandomizedSearchCV(
-            model,
-            params,
-            n_iter=n_iter,
-            cv=3,
-            scoring=scoring,
-            n_jobs=-1,
+        grid = dict(params)
+        refit_params = {}
+
+        # Grids smaller than n_iter are searched exhaustively, halving would only add noise
+        if settings["strategy"] != "halving" or total_combinations <= n_iter:
+            candidates = self._sample_candidates(grid, n_iter)
+            return "RandomizedSearchCV", candidates, [(len(candidates), None)], None, refit_params
+
+        halving = settings["halving"]
+        resource = halving.get("resource", "n_samples")
+        factor = halving.get("factor", 3)
+
+        # Budget over trees only works for ensembles; everything else halves over rows
+        if resource != "n_samples" and resource not in model.get_params():
+            resource, min_resources, max_resources = "n_samples", "smallest", n_samples
+        elif resource == "n_samples":
+            min_resources, max_resources = halving.get("min_resources", "smallest"), n_samples
+        else:
+            # The resource is searched by the halving itself, not sampled from the grid
+            budgets = grid.pop(resource, None) or [model.get_params()[resource]]
+            max_resources = max(budgets)
+            min_resources = min(halving.get("min_resources", min(budgets)), max_resources)
+            refit_params[resource] = max_resources
+        if min_resources == "smallest":
+            min_resources = 2 * settings["cv"]  # same floor as sklearn uses for regressors
+
+        n_candidates = halving.get("n_candidates", "exhaust")
+        if n_candidates == "exhaust":
+            n_candidates = max(max_resources // min_resources, 1)
+        candidates = self._sample_candidates(grid, n_candidates)
+
+        n_rungs = min(
+            1 + int(math.floor(math.log(max_resources / min_resources, factor) + 1e-9)),
+            1 + int(math.floor(math.log(len(candidates), factor) + 1e-9)),
+        )
+        rungs = [
+            (math.ceil(len(candidates) / factor ** rung), min(int(min_resources * factor ** rung), max_resources))
+            for rung in range(n_rungs)
+        ]
+        return "HalvingRandomSearchCV", candidates, rungs, resource, refit_params
+
+    def _rung_folds(self, folds, budget, n_samples):
+        """Subsample train and test indices of every fold to `budget` rows (seeded by the budget)."""
+        if budget is None or budget >= n_samples:
+            return folds
+        rng = np.random.default_rng(budget)
+        fraction = budget / n_samples
+        return [
+            tuple(np.sort(rng.choice(idx, max(int(len(idx) * fraction), 1), replace=False)) for idx in fold)
+            for fold in folds
+        ]
+
+    def _evaluate_candidates(self, model, candidates, x, y, folds, scoring, cache, base_key, resource_params):
+        """
+        Mean CV score of each candidate. Only the (candidate, fold) pairs missing
+        from the fit cache are fitted, in parallel with the configured n_jobs.
+        Returns (mean scores, fit seconds, number of cached fold results).
+        """
+        scorer = get_scorer(scoring)
+        results, pending = {}, []
+        for i, params in enumerate(candidates):
+            for f, (train, test) in enumerate(folds):
+                key = cache.key(**base_key, params={**params, **resource_params}, fold=f)
+                cached = cache.get(key)
+                if cached is not None:
+                    results[i, f] = cached
+                else:
+                    pending.append((i, f, key))
+
+        fitted = Parallel(n_jobs=self.config.n_jobs)(
+            delayed(_fit_and_score)(
+                clone(model).set_params(**candidates[i], **resource_params),
+                x, y, folds[f][0], folds[f][1], scorer, cache.store_estimators,
+            )
+            for i, f, _ in pending
+        )
+        for (i, f, key), (result, estimator) in zip(pending, fitted):
+            cache.put(key, result, estimator)
+            results[i, f] = result
+
+        scores = np.array([[results[i, f]["score"] for f in range(len(folds))] for i in range(len(candidates))])
+        fit_seconds = sum(results[i, f]["fit_time"] + results[i, f]["score_time"] for i, f, _ in pending)
+        return scores.mean(axis=1), fit_seconds, len(results) - len(pending)
+
+    def _search(self, model, params, x, y, scoring, n_iter, settings):
+        """Run the planned search; returns (best_params, refit_params, summary, cache, base cache key)."""
+        n_samples = len(y)
+        strategy, candidates, rungs, resource, refit_params = self._plan_search(model, params, n_iter, settings, n_samples)
+        folds = list(KFold(n_splits=settings["cv"]).split(x))
+
+        cache = self._fit_cache()
+        base_key = {
+            "model": type(model).__name__,
+            "base_params": model.get_params(),
+            "data": self._data_fingerprint(x, y),
+            "n_folds": settings["cv"],
+            "scoring": scoring,
+        }
+
+        summary_rungs, n_fits, n_cached = [], 0, 0
+        for rung, (n_keep, budget) in enumerate(rungs):
+            if rung:
+                # Successive halving: only the best candidates of the last rung go on
+                order = np.argsort(-scores, kind="stable")[:n_keep]
+                candidates = [candidates[i] for i in order]
+
+            resource_params = {resource: budget} if resource and resource != "n_samples" else {}
+            rung_folds = self._rung_folds(folds, budget if resource == "n_samples" else None, n_samples)
+            key = {**base_key, "budget": budget if resource == "n_samples" else None}
+            scores, fit_seconds, cached = self._evaluate_candidates(
+                model, candidates, x, y, rung_folds, scoring, cache, key, resource_params
+            )
+
+            n_fits += len(candidates) * len(folds)
+            n_cached += cached
+            summary_rungs.append({
+                "rung": rung,
+                "n_candidates": len(candidates),
+                "n_resources": budget,
+                "n_fits": len(candidates) * len(folds),
+                "cached_fits": cached,
+                "fit_seconds": round(float(fit_seconds), 4),
+                "best_score": round(float(scores.max()), 6),
+            })
+
+        cache.evict()
+        best = int(np.argmax(scores))
+        summary = {
+            "strategy": strategy,
+            "best_cv_score": float(scores[best]),
+            "n_fits": n_fits,
+            "cached_fits": n_cached,
+            "rungs": summary_rungs,
+        }
+        return dict(candidates[best]), refit_params, summary, cache, base_key
+
+    def _fit_with_early_stopping(self, model, x_train, y_train, early_stopping):
+        """Find the number of boosting rounds on a validation fold, then refit on all rows."""
+        x_fit, x_val, y_fit, y_val = train_test_split(
+            x_train, y_train,
+            test_size=early_stopping.get("validation_fraction", 0.1),
             random_state=42,
-            error_score="raise"
         )
-        search.fit(x_train, y_train)
-        return search.best_estimator_, search.best_params_
+        probe = clone(model).set_params(early_stopping_rounds=early_stopping.get("rounds", 25))
+        probe.fit(x_fit, y_fit, eval_set=[(x_val, y_val)], verbose=False)
+
+        best_rounds = int(probe.best_iteration) + 1
+        model.set_params(n_estimators=best_rounds)
+        model.fit(x_train, y_train)
+        return best_rounds
+
+    @instrument()
+    def tune_model(self, model, params, x_train, y_train, scoring, n_iter=20):
+        """
+        Tune with the search engine selected in params.yaml (random or halving),
+        reusing cross-validation fold results from the persistent fit cache so
+        repeated or widened searches only fit new combinations.
+        XGBoost can additionally early-stop on a validation fold.
+        n_jobs comes from the config so parallel trainers share the cores.
+        Returns (best_model, best_params, search_summary).
+        """
+        record_rows(len(x_train))
+        settings = self._search_settings()
+        n_iter = settings["n_iter"] or n_iter
+
+        # Parallelism lives in the search; keep each fit single-threaded to avoid oversubscription
+        if "n_jobs" in model.get_params():
+            model.set_params(n_jobs=1)
+
+        start = time.perf_counter()
+        best_params, refit_params, summary, cache, base_key = self._search(
+            model, params, x_train, y_train, scoring, n_iter, settings
+        )
+        summary["search_seconds"] = round(time.perf_counter() - start, 4)
+        best_params = {**best_params, **refit_params}
+
+        # Refit the winner with the whole allocation instead of a single core
+        best_model = clone(model).set_params(**best_params)
+        if "n_jobs" in best_model.get_params():
+            best_model.set_params(n_jobs=self.config.n_jobs)
+
+        start = time.perf_counter()
+        early_stopping = settings["early_stopping"]
+        refit_key = cache.key(**base_key, params=best_params, fold="all")
+        if _is_xgboost(best_model) and early_stopping.get("enabled", False):
+            best_rounds = self._fit_with_early_stopping(best_model, x_train, y_train, early_stopping)
+            best_params["n_estimators"] = best_rounds
+            summary["early_stopping_rounds"] = best_rounds
+        elif (cached_model := cache.get_estimator(refit_key)) is not None:
+            logging.info(f"Reusing the cached refit of {type(best_model).__name__}")
+            if "n_jobs" in cached_model.get_params():
+                cached_model.set_params(n_jobs=self.config.n_jobs)
+            best_model = cached_model
+        else:
+            best_model.fit(x_train, y_train)
+            if cache.store_estimators:
+                cache.put(refit_key, {"fit_time": time.perf_counter() - start}, best_model)
+        summary["refit_seconds"] = round(time.perf_counter() - start, 4)
+
+        return best_model, best_params, summary
+
+    # --- incremental training ---
+    def _state_path(self):
+        return os.path.join(self.config.root_dir, f"{self.config.model_name}_train_state.json")
+
+    def _rows_path(self):
+        return os.path.join(self.config.root_dir, f"{self.config.model_name}_train_rows.npy")
+
+    def _row_hashes(self, df):
+        """
+        Content hash of every row, index ignored: identifies the rows a model
+        was trained on wherever they end up after re-cleaning and re-splitting.
+        """
+        return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+    def _incremental_base(self, train_df):
+        """
+        (previous pipeline, state, new_rows mask) when the model can be
+        updated from the training rows it has not seen yet, else None.
+        Rows are matched by content, not position, so the check holds up when
+        data transformation re-cleans and re-splits the grown dataset; old
+        rows dropped from the new split (e.g. by moved outlier bounds) are
+        tolerated up to max_removed_fraction.
+        """
+        settings = dict(self.config.incremental or {})
+        model_path = os.path.join(self.config.root_dir, f"{self.config.model_name}.pkl")
+        if not settings.get("enabled", False):
+            return None
+        if not all(os.path.exists(p) for p in (model_path, self._state_path(), self._rows_path())):
+            logging.info(f"{self.config.model_name}: no previous model or training rows recorded, training from scratch")
+            return None
 
+        with open(self._state_path()) as f:
+            state = json.load(f)
+        old_hashes = np.load(self._rows_path())
+        hashes = self._row_hashes(train_df)
+        new_rows = _unseen_rows(hashes, old_hashes)
+        n_old, n_new = len(old_hashes), int(new_rows.sum())
+        n_removed = n_old - (len(hashes) - n_new)
+
+        if n_removed > settings.get("max_removed_fraction", 0.01) * n_old:
+            logging.info(f"{self.config.model_name}: {n_removed} of the {n_old} earlier training rows are no longer "
+                         f"in the training set, training from scratch")
+            return None
+        if n_new > settings.get("max_delta_fraction", 0.5) * n_old:
+            logging.info(f"{self.config.model_name}: {n_new} new rows is too large a delta "
+                         f"(max_delta_fraction of {n_old}), training from scratch")
+            return None
+
+        previous = load_binary(model_path)
+        if not isinstance(previous, Pipeline):
+            logging.info(f"{self.config.model_name}: previous artifact has no bundled preprocessor, training from scratch")
+            return None
+        if n_removed:
+            logging.info(f"{self.config.model_name}: {n_removed} earlier training rows left the training set, "
+                         f"keeping what the model learned from them")
+        return previous, state, new_rows
+
+    def update_model(self, previous, state, x_all, y_all, new_rows):
+        """
+        Continue training the previous model on the rows it has not seen (new_rows mask):
+        - XGBoost boosts `xgb_rounds` more rounds on the new rows, starting from the old booster
+          ("auto" scales the existing number of rounds by the new/old row ratio)
+        - RandomForest grows `rf_trees` more trees on the new rows (warm_start)
+        - ElasticNet re-solves on all rows starting from the previous coefficients (warm_start)
+        The preprocessor bundled with the previous model is reused so features keep their scale.
+        Returns (updated_pipeline, params, summary).
+        """
+        settings = dict(self.config.incremental or {})
+        preprocessor, model = previous.named_steps["preprocess"], previous.named_steps["model"]
+        x_new, y_new = x_all[new_rows], y_all[new_rows]
+        n_new, n_old = len(x_new), len(x_all) - len(x_new)
+
+        start = time.perf_counter()
+        if n_new == 0:
+            logging.info(f"{self.config.model_name}: no new rows, keeping the previous model")
+        elif _is_xgboost(model):
+            booster = model.get_booster()
+            rounds = settings.get("xgb_rounds", "auto")
+            if rounds == "auto":
+                # As many rounds per row as the existing booster got, so the update stays proportionate
+                rounds = max(1, round(booster.num_boosted_rounds() * n_new / n_old))
+            model = clone(model).set_params(n_estimators=int(rounds), n_jobs=self.config.n_jobs)
+            model.fit(preprocessor.transform(x_new), y_new, xgb_model=booster)
+        elif isinstance(model, RandomForestRegressor):
+            model.set_params(
+                warm_start=True,
+                n_estimators=model.n_estimators + int(settings.get("rf_trees", 50)),
+                n_jobs=self.config.n_jobs,
+            )
+            model.fit(preprocessor.transform(x_new), y_new)
+        elif isinstance(model, ElasticNet):
+            model.set_params(warm_start=True)
+            model.fit(preprocessor.transform(x_all), y_all)
+        else:
+            raise TypeError(f"Incremental training is not supported for {type(model).__name__}")
+        update_seconds = time.perf_counter() - start
+
+        params = {**state.get("params", {})}
+        if _is_xgboost(model):
+            params["n_estimators"] = model.get_booster().num_boosted_rounds()
+        elif isinstance(model, RandomForestRegressor):
+            params["n_estimators"] = model.n_estimators
+        summary = {
+            "strategy": "incremental",
+            "new_rows": int(n_new),
+            "previous_rows": int(n_old),
+            "update_seconds": round(update_seconds, 4),
+        }
+        logging.info(f"{self.config.model_name}: updated on {n_new} new rows in {update_seconds:.2f}s")
+        return Pipeline([("preprocess", preprocessor), ("model", model)]), params, summary
+
+    def _save_state(self, train_df, params):
+        state = {"rows": len(train_df), "params": params}
+        with open(self._state_path(), "w") as f:
+            json.dump(state, f, indent=4, default=str)
+        np.save(self._rows_path(), self._row_hashes(train_df))
+
+    @instrument()
     def initiate_model_trainer(self):
         logging.info("Loading training and test data")
-        train_df = pd.read_csv(self.config.trained_data_path)
-        test_df = pd.read_csv(self.config.test_data_path)
+        train_df = load_dataframe(self.config.trained_data_path)
+        test_df = load_dataframe(self.config.test_data_path)
+        record_rows(len(train_df) + len(test_df))
 
         target_column = self.config.target_column
         x_train, y_train = train_df.drop(columns=[target_column]), train_df[target_column]
         x_test, y_test = test_df.drop(columns=[target_column]), test_df[target_column]
 
-        logging.info("Training and tuning models")
-        params = self.config.params
-        model = self.models[self.config.model_name]
+        # Only the rows the previous model has not seen are trained on when it can be continued
+        previous = self._incremental_base(train_df)
+        if previous is not None:
+            previous_model, state, new_rows = previous
+            tuned_model, tuned_params, search_summary = self.update_model(previous_model, state, x_train, y_train, new_rows)
+        else:
+            # Preprocess once up front; the search then works on plain arrays
+            preprocessor = load_binary(self.config.preprocessor_path) if self.config.preprocessor_path else None
+            if preprocessor is not None:
+                x_train = preprocessor.transform(x_train)
 
-        # Tune model
-        tuned_model, tuned_params = self.tune_model(
-            model, params, x_train, y_train,
-            scoring=self.config.evaluation_metric,
-            n_iter=30
-        )
+            logging.info("Training and tuning models")
+            params = self.config.params
+            model = self.models[self.config.model_name]()
+
+            # Tune model
+            tuned_model, tuned_params, search_summary = self.tune_model(
+                model, params, x_train, y_train,
+                scoring=self.config.evaluation_metric,
+                n_iter=30
+            )
+
+            # Ship preprocessing and model as one artifact so consumers feed raw features
+            if preprocessor is not None:
+                tuned_model = Pipeline([("preprocess", preprocessor), ("model", tuned_model)])
 
         # Make predictions and evaluate
         preds = tuned_model.predict(x_test)
@@ -83,12 +491,18 @@ class ModelTrainer:
 
         # Save model
         model_path = os.path.join(self.config.root_dir, f"{self.config.model_name}.pkl")
-        joblib.dump(tuned_model, model_path)
+        save_binary(model_path, tuned_model)
 
         # Save best params
         params_file = os.path.join(self.config.root_dir, f"{self.config.model_name}_best_params.json")
         with open(params_file, "w") as f:
-            json.dump({"model_name": self.config.model_name, **tuned_params}, f, indent=4)
+            json.dump(
+                {"model_name": self.config.model_name, **tuned_params, "search": search_summary},
+                f, indent=4, default=str,
+            )
+
+        # Remember which rows this model has seen, for the next incremental run
+        self._save_state(train_df, tuned_params)
 
         logging.info(f"Model saved at: {model_path}")
         logging.info(f"Params saved at: {params_file}")
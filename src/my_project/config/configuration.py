@@ -1,12 +1,19 @@
 from my_project.constants import *
-from my_project.utils.common import read_yaml, create_directories
+from my_project.utils.common import read_yaml, create_directories, resolve_n_jobs, allocate_workers
 from pathlib import Path
 from my_project.entity.config_entity import (
+    StageCacheConfig,
+    PipelineConfig,
     DataIngestionConfig,
     DataValidationConfig,
     DataTransformationConfig,
     ModelTrainerConfig,
     ModelEvaluationConfig,
+    TrackingConfig,
+    InstrumentationConfig,
+    ModelBenchmarkConfig,
+    PredictionConfig,
+    BatchPredictionConfig,
 )
 
 
@@ -26,6 +33,24 @@ class ConfigurationManager:
         # Ensure artifacts root exists
         create_directories([Path(self.config.artifacts_root)])
 
+    # stage cache config
+    def get_stage_cache_config(self) -> StageCacheConfig:
+        config = self.config.stage_cache
+
+        return StageCacheConfig(
+            manifest_file=Path(config.manifest_file),
+        )
+
+    # pipeline graph runner config
+    def get_pipeline_config(self) -> PipelineConfig:
+        config = self.config.get("pipeline", {}) or {}
+
+        return PipelineConfig(
+            timing_report=Path(config.get("timing_report", Path(self.config.artifacts_root) / "pipeline_timing.json")),
+            max_workers=int(config.get("max_workers", 4)),
+            exclusive=tuple(config.get("exclusive", ["benchmark"]) or ()),
+        )
+
     # data ingestion config
     def get_data_ingestion_config(self) -> DataIngestionConfig:
         cfg = self.config.data_ingestion
@@ -38,8 +63,36 @@ class ConfigurationManager:
             source_URL=cfg.source_URL,
             local_data_file=Path(cfg.local_data_file),
             unzip_dir=Path(cfg.unzip_dir),
+            sha256=cfg.get("sha256"),
+            cache_dir=Path(cfg.cache_dir) if cfg.get("cache_dir") else None,
+            download_workers=int(cfg.get("download_workers", 4)),
+            chunk_size_mb=int(cfg.get("chunk_size_mb", 8)),
+            max_retries=int(cfg.get("max_retries", 3)),
+            extract_mode=cfg.get("extract_mode", "stream"),
+            output_format=cfg.get("output_format", ".feather"),
+            chunksize=int(cfg.get("chunksize", 100000)),
+            schema=dict(self.schema.columns),
+            sources=self._ingestion_sources(cfg),
+            dataset_dir=Path(cfg.dataset_dir) if cfg.get("dataset_dir") else root_dir / "dataset",
+            max_connections=int(cfg.get("max_connections", 8)),
         )
 
+    @staticmethod
+    def _ingestion_sources(cfg) -> list:
+        """Shard sources from config.yaml plus the optional manifest, as [source, sha256] pairs."""
+        lines = [str(source) for source in cfg.get("sources") or []]
+        if cfg.get("manifest"):
+            manifest = Path(cfg.manifest)
+            lines += manifest.read_text(encoding="utf-8").splitlines()
+
+        sources = []
+        for line in lines:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                source, *checksum = line.split()
+                sources.append([source, checksum[0] if checksum else None])
+        return sources
+
     # data validation config
     def get_data_validation_config(self) -> DataValidationConfig:
         config = self.config.data_validation
@@ -50,6 +103,15 @@ class ConfigurationManager:
             unzip_data_dir=Path(config.unzip_data_dir),
             report_file=Path(config.root_dir) / config.report_file,
             all_schema=Path(SCHEMA_FILE_PATH),  # 🔥 Pass the schema file path
+            cleaned_data_file=Path(config.root_dir) / config.cleaned_data_file,
+            outlier_mask_file=Path(config.root_dir) / config.outlier_mask_file,
+            export_csv=config.get("export_csv", False),
+            report_mode=config.get("report_mode", "summary"),
+            max_outlier_samples=int(config.get("max_outlier_samples", 10)),
+            mode=config.get("mode", "memory"),
+            chunksize=int(config.get("chunksize", 100000)),
+            sketch_k=int(config.get("sketch_k", 1000)),
+            n_workers=resolve_n_jobs(config.get("n_workers", 1)),
         )
         return data_validation_config
 
@@ -61,13 +123,25 @@ class ConfigurationManager:
         data_transformation_config = DataTransformationConfig(
             root_dir=Path(config.root_dir),
             data_path=Path(config.data_path),
+            train_data_path=Path(config.root_dir) / config.train_file,
+            test_data_path=Path(config.root_dir) / config.test_file,
+            schema=dict(self.schema.columns),
+            validation_data_path=Path(config.root_dir) / config.get("validation_file", "validation.feather"),
+            export_csv=config.get("export_csv", False),
+            chunksize=int(config.get("chunksize", 100000)),
+            split=self.params.get("split", {}),
+            target_column=self.schema.target_column,
+            preprocessor_path=Path(config.root_dir) / config.get("preprocessor_file", "preprocessor.joblib"),
+            validation_report=Path(config.validation_report) if config.get("validation_report") else None,
+            preprocessing=self.params.get("preprocessing", {}),
         )
         return data_transformation_config
 
     # model trainer config
-    def get_model_trainer_configs(self) -> dict[str, ModelTrainerConfig]:
+    def get_model_trainer_configs(self, model_names: list = None) -> dict[str, ModelTrainerConfig]:
         """
         Returns a dictionary of model_name -> ModelTrainerConfig
+        model_names restricts the result (and the core budget split) to those models.
         """
         config = self.config.model_trainer
         schema = self.schema.target_column
@@ -76,7 +150,22 @@ class ConfigurationManager:
         configs = {}
         create_directories([Path(config.root_dir)])
 
-        for model_name, model_params in self.params.models.items():
+        models = {
+            model_name: model_params
+            for model_name, model_params in self.params.models.items()
+            if model_names is None or model_name in model_names
+        }
+
+        # Split the shared core budget between models by their relative fit cost
+        budget = resolve_n_jobs(config.get("n_jobs", -1))
+        weights = {
+            model_name: config.get("cost_weights", {}).get(model_name, 1)
+            for model_name in models.keys()
+        }
+        workers = allocate_workers(weights, budget)
+        fit_cache = config.get("fit_cache", {}) or {}
+
+        for model_name, model_params in models.items():
             model_trainer_config = ModelTrainerConfig(
                 root_dir=Path(config.root_dir),
                 trained_data_path=Path(config.trained_data_path),
@@ -85,13 +174,57 @@ class ConfigurationManager:
                 params=model_params,
                 target_column=schema,
                 evaluation_metric=eval_metric,
+                n_jobs=workers[model_name],
+                search=self.params.get("search", {}),
+                preprocessor_path=Path(config.preprocessor_path) if config.get("preprocessor_path") else None,
+                incremental=self.params.get("incremental", {}),
+                fit_cache_dir=Path(fit_cache.dir) if fit_cache.get("dir") else None,
+                fit_cache_max_mb=float(fit_cache.get("max_size_mb", 512)),
+                fit_cache_estimators=bool(fit_cache.get("store_estimators", False)),
             )
             configs[model_name] = model_trainer_config
 
         return configs
 
+    def get_model_registry_file(self) -> Path:
+        return Path(self.config.model_trainer.registry_file)
+
+    def get_model_compile_params(self) -> dict:
+        """Settings of the tree model export step (config.yaml model_trainer.compile)."""
+        return dict(self.config.model_trainer.get("compile", {}) or {})
+
+    def get_model_selection_params(self) -> dict:
+        """Selection policy limits and latency benchmark settings from params.yaml."""
+        return dict(self.params.get("model_selection", {}) or {})
+
+
+    # tracking config
+    def get_tracking_config(self) -> TrackingConfig:
+        config = self.config.tracking
+
+        if config.get("mode", "online") not in ("online", "offline"):
+            raise ValueError(f"tracking.mode must be online or offline, got {config.mode!r}")
+
+        return TrackingConfig(
+            experiment_name=config.experiment_name,
+            offline_store=Path(config.offline_store),
+            mode=config.get("mode", "online"),
+            tracking_uri=config.get("tracking_uri"),
+            fallback_offline=bool(config.get("fallback_offline", True)),
+            flush_interval_s=float(config.get("flush_interval_s", 2.0)),
+        )
+
+    def get_instrumentation_config(self) -> InstrumentationConfig:
+        config = self.config.get("instrumentation", {}) or {}
+        artifacts_root = Path(self.config.artifacts_root)
+
+        return InstrumentationConfig(
+            report_file=Path(config.get("report_file", artifacts_root / "run_report.json")),
+            profile_dir=Path(config.get("profile_dir", artifacts_root / "profiles")),
+            mlflow=bool(config.get("mlflow", True)),
+            profiler=config.get("profiler"),
+        )
 
-    # model evaluation config
     def get_model_evaluation_config(self) -> ModelEvaluationConfig:
         # Attribute-style access for config
         config = self.config.model_evaluation
@@ -109,7 +242,7 @@ class ConfigurationManager:
         model_evaluation_config = ModelEvaluationConfig(
             root_dir=Path(config.root_dir),
             test_data_path=Path(config.test_data_path),
-            model_path=Path(config.model_path),
+            registry_file=Path(config.registry_file),
             all_params=params,  # now contains meaningful evaluation params
             metric_file_name=Path(config.metric_file_name),
             target_column=schema,
@@ -117,3 +250,80 @@ class ConfigurationManager:
         )
 
         return model_evaluation_config
+
+
+    # model benchmark config
+    def get_model_benchmark_config(self) -> ModelBenchmarkConfig:
+        config = self.config.model_benchmark
+        params = self.params.get("benchmark", {}) or {}
+
+        create_directories([Path(config.root_dir)])
+
+        model_benchmark_config = ModelBenchmarkConfig(
+            root_dir=Path(config.root_dir),
+            registry_file=Path(config.registry_file),
+            test_data_path=Path(config.test_data_path),
+            report_file=Path(config.report_file),
+            target_column=self.schema.target_column,
+            baseline_file=Path(config.baseline_file) if config.get("baseline_file") else None,
+            batch_sizes=tuple(int(size) for size in params.get("batch_sizes", [1, 64, 10000])),
+            thread_counts=tuple(int(n) for n in params.get("thread_counts", [1, -1])),
+            repeats=int(params.get("repeats", 200)),
+            max_seconds_per_case=float(params.get("max_seconds_per_case", 2.0)),
+            regression_tolerance=float(params.get("regression_tolerance", 0.25)),
+            fail_on_regression=bool(params.get("fail_on_regression", False)),
+            mmap_mode=self.config.prediction.get("mmap_mode", "r"),
+        )
+        return model_benchmark_config
+
+
+    # prediction service config
+    def get_prediction_config(self) -> PredictionConfig:
+        config = self.config.prediction
+
+        # Feature order comes from schema.yaml (all columns except the target)
+        feature_columns = [
+            column for column in self.schema.columns.keys()
+            if column != self.schema.target_column
+        ]
+
+        prediction_config = PredictionConfig(
+            registry_file=Path(config.registry_file),
+            model_path=Path(config.model_path),
+            feature_columns=feature_columns,
+            use_compiled=bool(config.get("use_compiled", True)),
+            mmap_mode=config.get("mmap_mode", "r"),
+            max_batch_size=int(config.max_batch_size),
+            max_wait_ms=float(config.max_wait_ms),
+            latency_window=int(config.latency_window),
+        )
+        return prediction_config
+
+    # batch prediction config
+    def get_batch_prediction_config(self) -> BatchPredictionConfig:
+        config = self.config.batch_prediction
+        prediction = self.config.prediction
+
+        # Same feature order as the prediction service: schema columns except the target
+        feature_columns = [
+            column for column in self.schema.columns.keys()
+            if column != self.schema.target_column
+        ]
+
+        batch_prediction_config = BatchPredictionConfig(
+            registry_file=Path(prediction.registry_file),
+            model_path=Path(prediction.model_path),
+            feature_columns=feature_columns,
+            input_path=Path(config.input_path) if config.get("input_path") else None,
+            output_path=Path(config.output_path),
+            report_file=Path(config.report_file) if config.get("report_file") else None,
+            prediction_column=config.get("prediction_column", "prediction"),
+            passthrough_columns=tuple(config.get("passthrough_columns") or ()),
+            chunksize=int(config.get("chunksize", 100000)),
+            n_workers=resolve_n_jobs(config.get("n_workers", 1)),
+            dtype=config.get("dtype", "auto"),
+            drop_invalid=bool(config.get("drop_invalid", False)),
+            use_compiled=bool(config.get("use_compiled", False)),
+            mmap_mode=prediction.get("mmap_mode", "r"),
+        )
+        return batch_prediction_config
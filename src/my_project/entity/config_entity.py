@@ -1,8 +1,22 @@
 # entity
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 
+# stage cache related configuration
+@dataclass(frozen=True)
+class StageCacheConfig:
+    manifest_file: Path
+
+
+# pipeline graph runner related configuration
+@dataclass(frozen=True)
+class PipelineConfig:
+    timing_report: Path
+    max_workers: int = 4  # stages run at the same time when their inputs are ready
+    exclusive: tuple = ("benchmark",)  # stages that run alone (timing measurements)
+
+
 # data ingestion related configuration
 @dataclass(frozen=True)
 class DataIngestionConfig:
@@ -10,7 +24,19 @@ class DataIngestionConfig:
     source_URL: str
     local_data_file: Path
     unzip_dir: Path
-    
+    sha256: str = None
+    cache_dir: Path = None
+    download_workers: int = 4
+    chunk_size_mb: int = 8
+    max_retries: int = 3
+    extract_mode: str = "stream"
+    output_format: str = ".feather"
+    chunksize: int = 100000
+    schema: dict = None
+    sources: list = field(default_factory=list)
+    dataset_dir: Path = None
+    max_connections: int = 8
+
 
 # data validation related configuration
 @dataclass(frozen=True)
@@ -19,7 +45,16 @@ class DataValidationConfig:
     status_file: Path
     unzip_data_dir: Path
     report_file: Path
-    all_schema: Path 
+    all_schema: Path
+    cleaned_data_file: Path
+    outlier_mask_file: Path
+    export_csv: bool = False
+    report_mode: str = "summary"      # summary | full
+    max_outlier_samples: int = 10
+    mode: str = "memory"              # memory | streaming
+    chunksize: int = 100000
+    sketch_k: int = 1000
+    n_workers: int = 1
 
 
 # data transformation related configuration
@@ -27,6 +62,17 @@ class DataValidationConfig:
 class DataTransformationConfig:
     root_dir: Path
     data_path: Path
+    train_data_path: Path
+    test_data_path: Path
+    schema: dict          # column -> dtype from schema.yaml
+    validation_data_path: Path = None
+    export_csv: bool = False
+    chunksize: int = 100000
+    split: dict = field(default_factory=dict)  # DataSplitter settings from params.yaml
+    target_column: str = None
+    preprocessor_path: Path = None
+    validation_report: Path = None
+    preprocessing: dict = field(default_factory=dict)  # FeaturePreprocessor settings from params.yaml
 
 
 # model trainer related configuration
@@ -39,15 +85,91 @@ class ModelTrainerConfig:
     params: dict          # ✅ hyperparameter grid
     target_column: str
     evaluation_metric: str = "r2"   # ✅ default metric
+    n_jobs: int = -1                # cores this model may use during tuning
+    search: dict = field(default_factory=dict)  # search engine settings from params.yaml
+    preprocessor_path: Path = None  # fitted FeaturePreprocessor bundled into the saved model
+    incremental: dict = field(default_factory=dict)  # warm-start settings from params.yaml
+    fit_cache_dir: Path = None      # persistent CV fit-result cache (None = disabled)
+    fit_cache_max_mb: float = 512
+    fit_cache_estimators: bool = False
 
 # entity model evaluation related configuration
 @dataclass
 class ModelEvaluationConfig:
     root_dir: Path
     test_data_path: Path
-    model_path: Path
+    registry_file: Path
     all_params: dict
     metric_file_name: Path
     target_column: str
     mlflow_url: str
-  
\ No newline at end of file
+
+
+# stage / component instrumentation related configuration
+@dataclass(frozen=True)
+class InstrumentationConfig:
+    report_file: Path
+    profile_dir: Path
+    mlflow: bool = True    # also log the numbers as metrics of an MLflow run
+    profiler: str = None   # opt-in per-stage dump: cprofile | pyinstrument
+
+
+# experiment tracking related configuration
+@dataclass(frozen=True)
+class TrackingConfig:
+    experiment_name: str
+    offline_store: Path             # local SQLite MLflow store
+    mode: str = "online"            # online | offline
+    tracking_uri: str = None        # None = MLflow's current URI (DagsHub after init_dagshub)
+    fallback_offline: bool = True   # re-log runs the server fails on to the offline store
+    flush_interval_s: float = 2.0   # values logged within this window go out in one log_batch
+
+
+# entity model benchmark related configuration
+@dataclass(frozen=True)
+class ModelBenchmarkConfig:
+    root_dir: Path
+    registry_file: Path
+    test_data_path: Path
+    report_file: Path
+    target_column: str
+    baseline_file: Path = None
+    batch_sizes: tuple = (1, 64, 10000)
+    thread_counts: tuple = (1, -1)
+    repeats: int = 200
+    max_seconds_per_case: float = 2.0
+    regression_tolerance: float = 0.25
+    fail_on_regression: bool = False
+    mmap_mode: str = "r"  # load models as the prediction service does
+
+
+# batch prediction related configuration
+@dataclass(frozen=True)
+class BatchPredictionConfig:
+    registry_file: Path
+    model_path: Path
+    feature_columns: list
+    input_path: Path
+    output_path: Path
+    report_file: Path = None
+    prediction_column: str = "prediction"
+    passthrough_columns: tuple = ()  # input columns copied next to the predictions (e.g. ids)
+    chunksize: int = 100000
+    n_workers: int = 1               # > 1 predicts chunks in a process pool
+    dtype: str = "auto"              # preprocessed block precision: auto = float32 for tree models, else float64
+    drop_invalid: bool = False       # skip rows with missing / non-numeric features instead of failing
+    use_compiled: bool = False       # native predict is faster on large blocks than the compiled traversal
+    mmap_mode: str = "r"
+
+
+# prediction service related configuration
+@dataclass(frozen=True)
+class PredictionConfig:
+    registry_file: Path
+    model_path: Path
+    feature_columns: list
+    use_compiled: bool = True  # serve the compiled form of tree models when the registry has one
+    mmap_mode: str = "r"       # memory-map model arrays (None = load private copies)
+    max_batch_size: int = 64
+    max_wait_ms: float = 2.0
+    latency_window: int = 10000
@@ -0,0 +1,230 @@
+# src/my_project/pipeline/dag.py
+"""
+Pipeline graph of the training stages.
+
+Every stage declares the artifacts it consumes and produces (paths from
+config.yaml); a stage depends on the stages producing what it consumes. The
+runner starts each stage as soon as its dependencies are done, so independent
+stages (such as the per-model training branches) overlap and a run takes about
+as long as its critical path instead of the sum of its stages.
+"""
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from my_project import logger
+
+
+@dataclass
+class Node:
+    name: str                # "train:xgbregressor" belongs to group "train" (mlp run --from/--until)
+    stage_name: str
+    pipeline_class: type
+    consumes: list = field(default_factory=list)
+    produces: list = field(default_factory=list)
+    kwargs: dict = field(default_factory=dict)
+
+    @property
+    def group(self) -> str:
+        return self.name.split(":", 1)[0]
+
+
+def _path(path) -> Path:
+    return Path(os.path.normpath(path))
+
+
+def _covers(produced: Path, consumed: Path) -> bool:
+    """A produced file or directory covers a consumed path equal to it or inside it."""
+    return produced == consumed or produced in consumed.parents
+
+
+class PipelineGraph:
+    def __init__(self, nodes: list):
+        self.nodes = {node.name: node for node in nodes}
+        if len(self.nodes) != len(nodes):
+            raise ValueError("Pipeline stage names must be unique")
+
+        # Edges: a node depends on every other node producing one of its inputs
+        self.deps = {name: set() for name in self.nodes}
+        for node in nodes:
+            for consumed in map(_path, node.consumes):
+                for other in nodes:
+                    if other is not node and any(_covers(_path(p), consumed) for p in other.produces):
+                        self.deps[node.name].add(other.name)
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> list:
+        """Node names with dependencies first, ties kept in declaration order."""
+        order, done = [], set()
+        while len(order) < len(self.nodes):
+            ready = [name for name in self.nodes if name not in done and self.deps[name] <= done]
+            if not ready:
+                cycle = sorted(set(self.nodes) - done)
+                raise ValueError(f"Pipeline graph has a dependency cycle between {cycle}")
+            order += ready
+            done.update(ready)
+        return order
+
+    # --- subgraphs ---
+    def _closure(self, names: set, edges) -> set:
+        seen, stack = set(), list(names)
+        while stack:
+            for other in edges(stack.pop()):
+                if other not in seen:
+                    seen.add(other)
+                    stack.append(other)
+        return seen
+
+    def ancestors(self, names) -> set:
+        return self._closure(set(names), lambda name: self.deps[name])
+
+    def descendants(self, names) -> set:
+        return self._closure(set(names), lambda name: [n for n, deps in self.deps.items() if name in deps])
+
+    def match(self, name: str) -> set:
+        """Nodes called `name`, or all nodes of the group `name` (e.g. every train:<model> branch)."""
+        matches = {node.name for node in self.nodes.values() if name in (node.name, node.group)}
+        if not matches:
+            raise ValueError(f"Unknown pipeline stage {name!r}, expected one of {self.order}")
+        return matches
+
+    def select(self, start: str = None, until: str = None) -> list:
+        """Nodes from `start` (and everything downstream) until `until` (and everything upstream), in run order."""
+        selected = set(self.nodes)
+        if start:
+            start_nodes = self.match(start)
+            selected = start_nodes | self.descendants(start_nodes)
+        if until:
+            until_nodes = self.match(until)
+            selected &= until_nodes | self.ancestors(until_nodes)
+        return [name for name in self.order if name in selected]
+
+    def missing_inputs(self, names: list) -> list:
+        """Inputs produced by stages left out of a partial run that do not exist yet."""
+        selected, missing = set(names), []
+        for name in names:
+            for consumed in self.nodes[name].consumes:
+                producers = [
+                    other for other in self.nodes.values()
+                    if any(_covers(_path(p), _path(consumed)) for p in other.produces)
+                ]
+                if producers and not any(p.name in selected for p in producers) and not Path(consumed).exists():
+                    missing.append(str(consumed))
+        return sorted(set(missing))
+
+    # --- execution ---
+    def run(self, names: list, run_node, max_workers: int = 4, exclusive=(), force: bool = False,
+            report_file: Path = None) -> dict:
+        """
+        Run the selected nodes, each as soon as its selected dependencies are
+        done, at most max_workers at a time. Nodes whose group is in
+        `exclusive` run alone (timing-sensitive stages such as the benchmark).
+        After a failure no new node starts; the running ones finish, then the
+        first error is raised. The timing report is saved to report_file
+        (also when a stage failed) and returned.
+        """
+        missing = self.missing_inputs(names)
+        if missing:
+            raise FileNotFoundError(f"Inputs of the selected stages are missing, run the earlier stages first: {missing}")
+
+        selected = set(names)
+        pending, running, done, timings = list(names), {}, set(), {}
+        errors = []
+        t0 = time.perf_counter()
+
+        def execute(node: Node):
+            started = time.perf_counter() - t0
+            try:
+                run_node(node, force)
+            finally:
+                timings[node.name] = {"start": started, "end": time.perf_counter() - t0}
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stage") as executor:
+            while pending or running:
+                for name in [] if errors else list(pending):
+                    node = self.nodes[name]
+                    if not (self.deps[name] & selected) <= done:
+                        continue
+                    solo = node.group in exclusive
+                    if len(running) >= max_workers or (running and solo):
+                        break
+                    if any(self.nodes[other].group in exclusive for other in running.values()):
+                        break
+                    pending.remove(name)
+                    running[executor.submit(execute, node)] = name
+                    if solo:
+                        break
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    if future.exception() is not None:
+                        errors.append((name, future.exception()))
+                    else:
+                        done.add(name)
+
+        report = self.timing_report(names, timings, done, time.perf_counter() - t0, max_workers)
+        if report_file:
+            save_timing_report(report, report_file)
+        if errors:
+            logger.error(f"Pipeline stopped: {', '.join(name for name, _ in errors)} failed")
+            raise errors[0][1]
+        return report
+
+    def critical_path(self, seconds: dict) -> tuple:
+        """Longest chain of dependent nodes by measured seconds: (total seconds, node names)."""
+        best = {}
+        for name in self.order:
+            if name not in seconds:
+                continue
+            deps = [dep for dep in self.deps[name] if dep in best]
+            previous = max(deps, key=lambda dep: best[dep][0], default=None)
+            total, path = best[previous] if previous else (0.0, [])
+            best[name] = (total + seconds[name], path + [name])
+        return max(best.values(), key=lambda item: item[0], default=(0.0, []))
+
+    def timing_report(self, names: list, timings: dict, done: set, wall_seconds: float, max_workers: int) -> dict:
+        seconds = {name: t["end"] - t["start"] for name, t in timings.items()}
+        critical_seconds, critical_path = self.critical_path(seconds)
+        nodes = {}
+        for name in names:
+            timing = timings.get(name)
+            nodes[name] = {
+                "status": "ok" if name in done else "failed" if timing else "not run",
+                "start": round(timing["start"], 3) if timing else None,
+                "end": round(timing["end"], 3) if timing else None,
+                "seconds": round(seconds[name], 3) if timing else None,
+                "depends_on": sorted(self.deps[name] & set(names)),
+            }
+        return {
+            "wall_seconds": round(wall_seconds, 3),
+            "critical_path_seconds": round(critical_seconds, 3),
+            "stage_seconds_sum": round(sum(seconds.values()), 3),
+            "critical_path": critical_path,
+            "max_workers": max_workers,
+            "nodes": nodes,
+        }
+
+
+def save_timing_report(report: dict, path: Path) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=4)
+    logger.info(f"Pipeline timing report saved at {path}")
+
+
+def print_timing_report(report: dict) -> None:
+    print(f"\n⏱️  Pipeline stages (wall {report['wall_seconds']:.2f} s, critical path "
+          f"{report['critical_path_seconds']:.2f} s, sum of stages {report['stage_seconds_sum']:.2f} s):")
+    for name, node in report["nodes"].items():
+        if node["seconds"] is None:
+            print(f"  {name:26} {node['status']}")
+            continue
+        marker = "*" if name in report["critical_path"] else " "
+        print(f"  {name:26} {node['start']:8.2f} -> {node['end']:8.2f}  {node['seconds']:8.2f} s {marker} {node['status']}")
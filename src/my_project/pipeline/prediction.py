@@ -0,0 +1,54 @@
+
+import numpy as np
+import pandas as pd
+
+from my_project.config.configuration import ConfigurationManager
+from my_project.components.micro_batcher import LatencyStats, MicroBatcher
+from my_project.components.model_registry import ModelRegistry, load_model
+from my_project.entity.config_entity import PredictionConfig
+from my_project import logger
+
+
+class PredictionPipeline:
+    """Loads the trained model once and serves micro-batched predictions."""
+
+    def __init__(self, config: PredictionConfig = None):
+        self.config = config or ConfigurationManager().get_prediction_config()
+        self.feature_columns = list(self.config.feature_columns)
+
+        # The registry's selected model (its compiled form if there is one), else the evaluated copy
+        self.model_path = ModelRegistry(self.config.registry_file).serving_model_path(
+            fallback=self.config.model_path, use_compiled=self.config.use_compiled
+        )
+        logger.info(f"Loading model for serving from: [{self.model_path}]")
+        # Both forms are memory-mapped: worker processes share the pages through the page cache.
+        # Compiled models are flat node arrays evaluated with NumPy: sklearn/xgboost are never imported
+        self.model = load_model(self.model_path, mmap_mode=self.config.mmap_mode)
+        self.compiled = self.model_path.is_dir()
+        if self.compiled and self.model.feature_names and self.model.feature_names != self.feature_columns:
+            raise ValueError(f"Compiled model features {self.model.feature_names} do not match the schema")
+
+        self.stats = LatencyStats(window=self.config.latency_window)
+        self.batcher = MicroBatcher(
+            self._predict_array,
+            max_batch_size=self.config.max_batch_size,
+            max_wait_ms=self.config.max_wait_ms,
+            stats=self.stats,
+        )
+
+    def _predict_array(self, x: np.ndarray) -> np.ndarray:
+        if self.compiled:
+            return self.model.predict(x)
+        # Models were fitted on DataFrames, keep the feature names to avoid sklearn warnings
+        frame = pd.DataFrame(x, columns=self.feature_columns)
+        return self.model.predict(frame)
+
+    def to_array(self, df: pd.DataFrame) -> np.ndarray:
+        """Select and order the schema feature columns as a contiguous float array."""
+        missing = [column for column in self.feature_columns if column not in df.columns]
+        if missing:
+            raise ValueError(f"Missing feature columns: {missing}")
+        return np.ascontiguousarray(df[self.feature_columns].to_numpy(dtype=np.float64))
+
+    def predict(self, df: pd.DataFrame) -> np.ndarray:
+        return self.batcher.predict(self.to_array(df))
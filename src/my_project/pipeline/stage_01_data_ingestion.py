@@ -1,5 +1,8 @@
 from my_project.config.configuration import ConfigurationManager
+from my_project.components import data_ingestion as data_ingestion_module
 from my_project.components.data_ingestion import DataIngestion
+from my_project.pipeline.dag import Node
+from my_project.utils.stage_cache import StageCache
 from my_project import logger
 
 
@@ -7,24 +10,52 @@ from my_project import logger
 # Data ingestion pipline
 
 STAGE_NAME = "Data Ingestion Stage"
-logger.info(f"===== Stage {STAGE_NAME} started =====")
 
 class DataIngestionTrainingPipeline:
-    def __init__(self):
-          pass
+    def __init__(self, force: bool = False):
+        self.force = force
+
+    @classmethod
+    def dag_nodes(cls, config: ConfigurationManager, name: str) -> list:
+        data_ingestion_config = config.get_data_ingestion_config()
+        if data_ingestion_config.sources:
+            produces = [data_ingestion_config.dataset_dir]
+        else:
+            produces = [data_ingestion_config.unzip_dir, data_ingestion_config.local_data_file]
+        return [Node(name, STAGE_NAME, cls, consumes=[], produces=produces)]
+
     def main(self):
         config = ConfigurationManager()
         data_ingestion_config = config.get_data_ingestion_config()
-        
+
+        # Skip when the sources (remote ETag / Last-Modified, local file contents),
+        # the source config and the extracted files are unchanged
+        cache = StageCache(config.get_stage_cache_config())
         data_ingestion = DataIngestion(config=data_ingestion_config)
-        data_ingestion.download_file()
-        data_ingestion.unzip_and_clean()
+        sources = data_ingestion.source_state(previous=cache.meta("data_ingestion").get("sources"))
+        key = cache.fingerprint(
+            inputs=data_ingestion.local_sources(),
+            config=data_ingestion_config,
+            code=[data_ingestion_module],
+            extra=sources,
+        )
+        if not self.force and cache.is_fresh("data_ingestion", key):
+            logger.info(f"{STAGE_NAME} is up to date, skipping (use --force to rerun)")
+            return
+
+        if data_ingestion_config.sources:
+            extracted = data_ingestion.ingest_sources()
+        else:
+            data_ingestion.download_file()
+            extracted = data_ingestion.ingest()
+        cache.record("data_ingestion", key, outputs=extracted, meta={"sources": sources})
 
 if __name__ == "__main__":
     try:
+        logger.info(f"===== Stage {STAGE_NAME} started =====")
         pipeline = DataIngestionTrainingPipeline()
         pipeline.main()
         logger.info(f"===== Stage {STAGE_NAME} completed =====")
     except Exception as e:
         logger.exception(e)
-        raise e
\ No newline at end of file
+        raise e
@@ -1,25 +1,63 @@
 from my_project.config.configuration import ConfigurationManager
+from my_project.components import data_validation as data_validation_module
 from my_project.components.data_validation import DataValidation
+from my_project.pipeline.dag import Node
+from my_project.utils.stage_cache import StageCache
 from my_project import logger
 
 STAGE_NAME = "Data Validation Stage"
-logger.info(f"===== Stage {STAGE_NAME} started =====")
 
 class DataValidationTrainingPipeline:
-    def __init__(self):
-          pass
+    def __init__(self, force: bool = False):
+        self.force = force
+
+    @classmethod
+    def dag_nodes(cls, config: ConfigurationManager, name: str) -> list:
+        data_validation_config = config.get_data_validation_config()
+        return [Node(
+            name, STAGE_NAME, cls,
+            consumes=[data_validation_config.unzip_data_dir, data_validation_config.all_schema],
+            produces=[
+                data_validation_config.cleaned_data_file,
+                data_validation_config.outlier_mask_file,
+                data_validation_config.status_file,
+                data_validation_config.report_file,
+            ],
+        )]
+
     def main(self):
         config = ConfigurationManager()
         data_validation_config = config.get_data_validation_config()
-        
+
+        # Skip when the ingested file, schema, config and code are unchanged
+        cache = StageCache(config.get_stage_cache_config())
+        key = cache.fingerprint(
+            inputs=[data_validation_config.unzip_data_dir, data_validation_config.all_schema],
+            config=data_validation_config,
+            code=[data_validation_module],
+        )
+        if not self.force and cache.is_fresh("data_validation", key):
+            logger.info(f"{STAGE_NAME} is up to date, skipping (use --force to rerun)")
+            return
+
         data_validation = DataValidation(config=data_validation_config)
-        data_validation.validate_data()
+        if not data_validation.validate_data():
+            # Not cached: a failed (or crashed) validation reruns next time
+            logger.error(f"{STAGE_NAME} failed, see {data_validation_config.report_file}")
+            return
+        cache.record("data_validation", key, outputs=[
+            data_validation_config.cleaned_data_file,
+            data_validation_config.outlier_mask_file,
+            data_validation_config.status_file,
+            data_validation_config.report_file,
+        ])
 
 if __name__ == "__main__":
     try:
+        logger.info(f"===== Stage {STAGE_NAME} started =====")
         pipeline = DataValidationTrainingPipeline()
         pipeline.main()
         logger.info(f"===== Stage {STAGE_NAME} completed =====")
     except Exception as e:
         logger.exception(e)
-        raise e
\ No newline at end of file
+        raise e
@@ -1,27 +1,60 @@
 from my_project.config.configuration import ConfigurationManager
+from my_project.components import data_splitter as data_splitter_module
+from my_project.components import data_transfromation as data_transformation_module
+from my_project.components import feature_preprocessor as feature_preprocessor_module
 from my_project.components.data_transfromation import DataTransformation
+from my_project.pipeline.dag import Node
+from my_project.utils.stage_cache import StageCache
 from my_project import logger
 
 
 STAGE_NAME = "Data Transformation Stage"
-logger.info(f"===== Stage {STAGE_NAME} started =====")
 
 class DataTransformationTrainingPipeline:
-    def __init__(self):
-          pass
+    def __init__(self, force: bool = False):
+        self.force = force
+
+    @classmethod
+    def dag_nodes(cls, config: ConfigurationManager, name: str) -> list:
+        data_transformation_config = config.get_data_transformation_config()
+        produces = [
+            data_transformation_config.train_data_path,
+            data_transformation_config.test_data_path,
+            data_transformation_config.validation_data_path,
+            data_transformation_config.preprocessor_path,
+        ]
+        return [Node(
+            name, STAGE_NAME, cls,
+            consumes=[data_transformation_config.data_path, data_transformation_config.validation_report],
+            produces=[path for path in produces if path],
+        )]
+
     def main(self):
         config = ConfigurationManager()
         data_transformation_config = config.get_data_transformation_config()
         print(data_transformation_config)
-        
+
+        # Skip re-splitting when the input data, config and code are unchanged
+        cache = StageCache(config.get_stage_cache_config())
+        key = cache.fingerprint(
+            inputs=[data_transformation_config.data_path, data_transformation_config.validation_report],
+            config=data_transformation_config,
+            code=[data_transformation_module, data_splitter_module, feature_preprocessor_module],
+        )
+        if not self.force and cache.is_fresh("data_transformation", key):
+            logger.info(f"{STAGE_NAME} is up to date, skipping (use --force to rerun)")
+            return
+
         data_transformation = DataTransformation(config=data_transformation_config)
-        data_transformation.initiate_data_transformation()
+        paths = data_transformation.initiate_data_transformation()
+        cache.record("data_transformation", key, outputs=list(paths.values()))
 
 if __name__ == "__main__":
     try:
+        logger.info(f"===== Stage {STAGE_NAME} started =====")
         pipeline = DataTransformationTrainingPipeline()
         pipeline.main()
         logger.info(f"===== Stage {STAGE_NAME} completed =====")
     except Exception as e:
         logger.exception(e)
-        raise e  
\ No newline at end of file
+        raise e
@@ -1,45 +1,290 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from dataclasses import asdict
+from pathlib import Path
+
 from my_project.config.configuration import ConfigurationManager
+from my_project.components import model_trainer as model_trainer_module
+from my_project.components.model_registry import ModelRegistry
 from my_project.components.model_trainer import ModelTrainer
+from my_project.components import tree_compiler as tree_compiler_module
+from my_project.components.tree_compiler import check_parity, compile_model, remove_compiled
+from my_project.entity.config_entity import ModelTrainerConfig
+from my_project.pipeline.dag import Node
+from my_project.utils.common import load_binary, load_dataframe
+from my_project.utils.latency import predict_latency
+from my_project.utils.profiling import drain_records, merge_records
+from my_project.utils.stage_cache import StageCache, code_version
 from my_project import logger
 
 STAGE_NAME = "Model Trainer Stage"
-logger.info(f"===== Stage {STAGE_NAME} started =====")
+
+
+def train_single_model(trainer_config: ModelTrainerConfig) -> tuple:
+    """
+    Train one candidate model; runs inside its own worker process.
+    Returns (score, seconds, instrumentation records measured in the worker).
+    """
+    start = time.perf_counter()
+    model_trainer = ModelTrainer(config=trainer_config)
+    score = model_trainer.initiate_model_trainer()
+    return score, time.perf_counter() - start, drain_records()
+
+
+def model_outputs(trainer_config: ModelTrainerConfig) -> list:
+    """Artifacts written by ModelTrainer.initiate_model_trainer for one model."""
+    root_dir = Path(trainer_config.root_dir)
+    return [
+        root_dir / f"{trainer_config.model_name}.pkl",
+        root_dir / f"{trainer_config.model_name}_best_params.json",
+        root_dir / f"{trainer_config.model_name}_train_state.json",
+    ]
+
+
+def registry_entry(trainer_config: ModelTrainerConfig, score: float, train_seconds: float, data_hash: str) -> dict:
+    """Registry record of one trained model; its predict latency is added by add_latency."""
+    model_path = model_outputs(trainer_config)[0]
+    return {
+        "name": trainer_config.model_name,
+        "metric": trainer_config.evaluation_metric,
+        "score": float(score),
+        "path": str(model_path),
+        "data_hash": data_hash,
+        "train_seconds": round(train_seconds, 3),
+        "size_bytes": model_path.stat().st_size,
+    }
+
+
+def add_latency(entry: dict, x_sample, selection: dict) -> dict:
+    """Predict latency of a registered model on raw feature rows."""
+    model = load_binary(entry["path"], mmap_mode="r")
+    entry["latency"] = predict_latency(
+        model, x_sample,
+        batch_rows=int(selection.get("batch_rows", 1000)),
+        repeats=int(selection.get("latency_repeats", 200)),
+    )
+    return entry
+
+
+def export_compiled(entry: dict, x_sample, settings: dict):
+    """
+    Compile the selected tree model to flat node arrays (<model>.compiled/),
+    after checking it predicts like the native model on the test rows.
+    Returns the registry record of the compiled form, or None for models the
+    compiler does not support.
+    """
+    model_path = Path(entry["path"])
+    compiled_path = model_path.with_suffix(".compiled")
+    model = load_binary(model_path, mmap_mode="r")
+    try:
+        compiled = compile_model(model)
+    except TypeError as e:
+        logger.info(f"{entry['name']} is served as is: {e}")
+        return None
+
+    parity = check_parity(model, compiled, x_sample, atol=float(settings.get("parity_atol", 1e-4)))
+    compiled.save(compiled_path)
+    logger.info(f"Compiled {entry['name']} ({compiled.meta['n_trees']} trees, depth {compiled.max_depth}) "
+                f"to {compiled_path}, max abs deviation {parity:.3g}")
+    return {
+        "path": str(compiled_path),
+        "size_bytes": sum(f.stat().st_size for f in compiled_path.iterdir()),
+        "max_abs_deviation": parity,
+        "compiler_version": code_version([tree_compiler_module]),
+        "latency": predict_latency(compiled, x_sample, batch_rows=int(settings.get("batch_rows", 1000))),
+    }
+
+
+def previous_compiled(registry: ModelRegistry, entry: dict):
+    """The compiled record of the last run, while it is newer than its model and the compiler is unchanged."""
+    try:
+        compiled = registry.selected().get("compiled")
+    except (FileNotFoundError, StopIteration, KeyError):
+        return None
+    if not compiled or registry.selected()["path"] != entry["path"] or not Path(compiled["path"]).exists():
+        return None
+    if compiled.get("compiler_version") != code_version([tree_compiler_module]):
+        return None
+    if Path(compiled["path"]).stat().st_mtime < Path(entry["path"]).stat().st_mtime:
+        return None
+    return compiled
+
+
+def remove_stale_models(root_dir: Path, model_names, keep_compiled: str = None) -> None:
+    """Delete artifacts of models that are no longer configured (or selected), so nothing can load them by mistake."""
+    suffixes = (".pkl", "_best_params.json", "_train_state.json", "_train_rows.npy")
+    for path in Path(root_dir).iterdir():
+        if ".compiled" in path.name and not path.name.endswith(".compiled"):
+            continue  # versions behind a compiled model path, removed with it
+        if path.name.endswith(".compiled") and str(path) != keep_compiled:
+            remove_compiled(path)
+            logger.info(f"Removed stale compiled model {path}")
+            continue
+        for suffix in suffixes:
+            if path.name.endswith(suffix) and path.name[: -len(suffix)] not in model_names:
+                path.unlink()
+                logger.info(f"Removed stale model artifact {path}")
+                break
+
 
 class ModelTrainerPipeline:
-    def __init__(self):
-        pass
+    """
+    Trains the candidate models, then selects and publishes the best one.
+
+    models restricts training to those models and select=False skips the
+    selection step: the pipeline graph runs one training branch per model
+    and a final select-only run (models=[]) that picks up their results.
+    """
+
+    def __init__(self, force: bool = False, models: list = None, select: bool = True):
+        self.force = force
+        self.models = models
+        self.select = select
+
+    @classmethod
+    def dag_nodes(cls, config: ConfigurationManager, name: str) -> list:
+        model_trainer_configs = config.get_model_trainer_configs()
+        branches = [
+            Node(
+                f"{name}:{model_name}", f"{STAGE_NAME} ({model_name})", cls,
+                consumes=[trainer_config.trained_data_path, trainer_config.test_data_path, trainer_config.preprocessor_path],
+                produces=model_outputs(trainer_config),
+                kwargs={"models": [model_name], "select": False},
+            )
+            for model_name, trainer_config in model_trainer_configs.items()
+        ]
+        registry_file = config.get_model_registry_file()
+        selection = Node(
+            name, STAGE_NAME, cls,
+            consumes=[output for branch in branches for output in branch.produces],
+            produces=[registry_file],
+            kwargs={"models": []},
+        )
+        return branches + [selection]
 
     def main(self):
         try:
             # Load all model trainer configurations
             config = ConfigurationManager()
             model_trainer_configs = config.get_model_trainer_configs()
+            targets = [name for name in model_trainer_configs if self.models is None or name in self.models]
 
-            results = []
-
+            # Fingerprint each model separately so a params change only retrains that model.
+            # n_jobs is left out: a different core budget gives the same model.
+            cache = StageCache(config.get_stage_cache_config())
+            keys, entries = {}, {}
             for model_name, trainer_config in model_trainer_configs.items():
-                try:
-                    # Pass the ModelTrainerConfig object directly
-                    model_trainer = ModelTrainer(config=trainer_config)
-                    score = model_trainer.initiate_model_trainer()
-                    results.append((model_name, score))
-                except Exception as e:
-                    logger.warning(f"⚠️ Skipping {model_name} due to error: {e}")
+                config_slice = {k: v for k, v in asdict(trainer_config).items() if k != "n_jobs"}
+                keys[model_name] = cache.fingerprint(
+                    inputs=[trainer_config.trained_data_path, trainer_config.test_data_path, trainer_config.preprocessor_path],
+                    config=config_slice,
+                    code=[model_trainer_module],
+                )
+                stage = f"model_trainer/{model_name}"
+                if self.force and model_name in targets:
                     continue
+                if cache.is_fresh(stage, keys[model_name]) and "entry" in cache.meta(stage):
+                    entries[model_name] = cache.meta(stage)["entry"]
+                    if model_name in targets:
+                        logger.info(f"{model_name} is up to date, skipping (use --force to retrain)")
+
+            pending = [name for name in targets if name not in entries]
+            if self.models is None:
+                # Re-split the core budget between the models that actually need training
+                pending_configs = config.get_model_trainer_configs(model_names=pending) if pending else {}
+            else:
+                # A graph branch trains next to the other branches, so it keeps its share of the full split
+                pending_configs = {name: model_trainer_configs[name] for name in pending}
+
+            # Every model trains at the same time, each limited to its share of the core budget.
+            # Graph branches start their worker from a fresh interpreter: forking a process
+            # whose other threads run stages could copy a held lock into the child.
+            mp_context = get_context("spawn") if self.models is not None else None
+            trained = {}
+            with ProcessPoolExecutor(max_workers=len(pending_configs) or 1, mp_context=mp_context) as executor:
+                futures = {
+                    model_name: executor.submit(train_single_model, trainer_config)
+                    for model_name, trainer_config in pending_configs.items()
+                }
+
+                for model_name, future in futures.items():
+                    try:
+                        score, train_seconds, worker_records = future.result()
+                        trained[model_name] = score, train_seconds
+                        merge_records(worker_records)
+                    except Exception as e:
+                        logger.warning(f"⚠️ Skipping {model_name} due to error: {e}")
+                        continue
+
+            sample_config = next(iter(model_trainer_configs.values()))
+            data_hash = cache.digest(sample_config.trained_data_path)
+            for model_name, (score, train_seconds) in trained.items():
+                trainer_config = pending_configs[model_name]
+                entries[model_name] = registry_entry(trainer_config, score, train_seconds, data_hash)
+                cache.record(
+                    f"model_trainer/{model_name}", keys[model_name],
+                    outputs=model_outputs(trainer_config),
+                    meta={"score": float(score), "entry": entries[model_name]},
+                )
+
+            if not self.select:
+                return
+
+            missing = [name for name in model_trainer_configs if name not in entries]
+            if missing:
+                logger.warning(f"⚠️ No up-to-date model for {', '.join(missing)}, selecting among the others")
+
+            # Latency is measured once no model is training any more, one model at a time,
+            # so the numbers are not skewed by other models still training
+            selection = config.get_model_selection_params()
+            x_sample = load_dataframe(sample_config.test_data_path).drop(columns=[sample_config.target_column])
+            for model_name, entry in entries.items():
+                if "latency" not in entry:
+                    add_latency(entry, x_sample, selection)
+                    cache.record(
+                        f"model_trainer/{model_name}", keys[model_name],
+                        outputs=model_outputs(model_trainer_configs[model_name]),
+                        meta={"score": entry["score"], "entry": entry},
+                    )
+
+            # Collect in config order so the results table stays stable
+            results = [entries[name] for name in model_trainer_configs if name in entries]
 
             if results:
                 # Print summary
                 print("\n📊 Model Results:")
-                for name, score in results:
-                    print(f"{name:15} -> {score:.4f}")
+                for entry in results:
+                    latency = entry["latency"]
+                    print(f"{entry['name']:15} -> {entry['score']:.4f}  "
+                          f"p99 {latency['single_row']['p99_ms']:.2f} ms/row, "
+                          f"batch {latency['batch']['p50_ms']:.2f} ms/{latency['batch']['rows']} rows, "
+                          f"{entry['size_bytes'] / 1e6:.1f} MB")
+
+                # Pick the best model allowed by the selection policy and publish it
+                policy = {k: selection.get(k) for k in ("max_p99_ms", "max_batch_ms", "max_size_mb")}
+                best = ModelRegistry.select(results, policy)
+
+                # Export step: tree models are served from their compiled form
+                compile_settings = config.get_model_compile_params()
+                registry = ModelRegistry(config.get_model_registry_file())
+                if compile_settings.get("enabled", True):
+                    compiled = previous_compiled(registry, best) or export_compiled(
+                        best, x_sample, {**selection, **compile_settings}
+                    )
+                    if compiled:
+                        best["compiled"] = compiled
+                        print(f"⚙️  {best['name']} compiled: p99 {compiled['latency']['single_row']['p99_ms']:.2f} ms/row, "
+                              f"{compiled['size_bytes'] / 1e6:.1f} MB")
 
-                # Pick best model
-                best_model, best_score = max(results, key=lambda x: x[1])
-                print(f"\n✅ Best model: {best_model} with score {best_score:.4f}")
+                registry.write(results, policy)
+                print(f"\n✅ Selected model: {best['name']} with score {best['score']:.4f} (policy: {policy})")
             else:
+                best = None
                 print("\n❌ No models were successfully trained. Check configuration and errors above.")
 
-            logger.info(f"===== Stage {STAGE_NAME} completed =====")
+            keep_compiled = best["compiled"]["path"] if best and best.get("compiled") else None
+            remove_stale_models(config.config.model_trainer.root_dir, model_trainer_configs.keys(), keep_compiled)
 
         except Exception as e:
             logger.exception(f"Error in {STAGE_NAME}: {e}")
@@ -47,5 +292,7 @@ class ModelTrainerPipeline:
 
 
 if __name__ == "__main__":
+    logger.info(f"===== Stage {STAGE_NAME} started =====")
     pipeline = ModelTrainerPipeline()
     pipeline.main()
+    logger.info(f"===== Stage {STAGE_NAME} completed =====")
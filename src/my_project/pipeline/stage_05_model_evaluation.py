@@ -1,22 +1,88 @@
+from pathlib import Path
+
 from my_project.config.configuration import ConfigurationManager
+from my_project.components import model_evaluation as model_evaluation_module
 from my_project.components.model_evaluation import ModelEvaluation
+from my_project.components.model_registry import ModelRegistry
+from my_project.pipeline.dag import Node
+from my_project.utils.stage_cache import StageCache
 from my_project import logger
 
 
-# pipeline
-import dagshub
-
-# --- Initialize DagsHub and MLflow ---
-dagshub.init(
-    repo_owner='Francisroyce',
-    repo_name='End-to-End-ML-project-MLflow',
-    mlflow=True
-)
-try:
-    config_manager = ConfigurationManager()
-    model_evaluation_config = config_manager.get_model_evaluation_config()
-    model_evaluation = ModelEvaluation(config=model_evaluation_config)
-    metrics = model_evaluation.evaluate_model()
-    print("Model evaluation metrics:", metrics)
-except Exception as e:
-    print(f"Error during model evaluation: {e}")
\ No newline at end of file
+STAGE_NAME = "Model Evaluation Stage"
+
+
+def init_dagshub(offline: bool = None):
+    """
+    Point MLflow at the DagsHub tracking server; dagshub is imported only when a run actually logs.
+    Skipped in offline tracking mode (unless offline=False, e.g. to sync) and when tracking_uri is set.
+    """
+    tracking_config = ConfigurationManager().get_tracking_config()
+    if offline is None:
+        offline = tracking_config.mode == "offline"
+    if offline or tracking_config.tracking_uri:
+        return
+    try:
+        import dagshub
+    except ImportError:
+        logger.warning("dagshub is not installed, MLflow logs to its default tracking URI")
+        return
+    dagshub.init(
+        repo_owner='Francisroyce',
+        repo_name='End-to-End-ML-project-MLflow',
+        mlflow=True
+    )
+
+
+class ModelEvaluationTrainingPipeline:
+    def __init__(self, force: bool = False):
+        self.force = force
+
+    @classmethod
+    def dag_nodes(cls, config: ConfigurationManager, name: str) -> list:
+        model_evaluation_config = config.get_model_evaluation_config()
+        return [Node(
+            name, STAGE_NAME, cls,
+            consumes=[model_evaluation_config.test_data_path, model_evaluation_config.registry_file],
+            produces=[
+                model_evaluation_config.metric_file_name,
+                Path(model_evaluation_config.root_dir) / "model_artifacts",
+            ],
+        )]
+
+    def main(self):
+        config_manager = ConfigurationManager()
+        model_evaluation_config = config_manager.get_model_evaluation_config()
+
+        # Skip when the test data, registry, selected model file, config and code are unchanged
+        selected_model_path = ModelRegistry(model_evaluation_config.registry_file).selected_model_path()
+        inputs = [model_evaluation_config.test_data_path, model_evaluation_config.registry_file]
+        cache = StageCache(config_manager.get_stage_cache_config())
+        key = cache.fingerprint(
+            inputs=inputs + ([selected_model_path] if selected_model_path else []),
+            config=model_evaluation_config,
+            code=[model_evaluation_module],
+        )
+        if not self.force and cache.is_fresh("model_evaluation", key):
+            logger.info(f"{STAGE_NAME} is up to date, skipping (use --force to rerun)")
+            return
+
+        model_evaluation = ModelEvaluation(
+            config=model_evaluation_config, tracking_config=config_manager.get_tracking_config()
+        )
+        metrics = model_evaluation.evaluate_model()
+        cache.record("model_evaluation", key, outputs=[
+            model_evaluation_config.metric_file_name,
+            Path(model_evaluation_config.root_dir) / "model_artifacts" / "model.joblib",
+        ])
+        return metrics
+
+
+if __name__ == "__main__":
+    # --- Initialize DagsHub and MLflow ---
+    init_dagshub()
+    try:
+        metrics = ModelEvaluationTrainingPipeline().main()
+        print("Model evaluation metrics:", metrics)
+    except Exception as e:
+        print(f"Error during model evaluation: {e}")
@@ -0,0 +1,68 @@
+import sys
+from dataclasses import replace
+
+from my_project.config.configuration import ConfigurationManager
+from my_project.components import model_benchmark as model_benchmark_module
+from my_project.components import tree_compiler as tree_compiler_module
+from my_project.components.model_benchmark import ModelBenchmark
+from my_project.components.model_registry import ModelRegistry
+from my_project.pipeline.dag import Node
+from my_project.utils.stage_cache import StageCache
+from my_project import logger
+
+
+STAGE_NAME = "Model Benchmark Stage"
+
+
+class ModelBenchmarkPipeline:
+    def __init__(self, force: bool = False, overrides: dict = None):
+        self.force = force
+        self.overrides = {k: v for k, v in (overrides or {}).items() if v is not None}
+
+    @classmethod
+    def dag_nodes(cls, config: ConfigurationManager, name: str) -> list:
+        model_benchmark_config = config.get_model_benchmark_config()
+        return [Node(
+            name, STAGE_NAME, cls,
+            consumes=[model_benchmark_config.test_data_path, model_benchmark_config.registry_file],
+            produces=[model_benchmark_config.report_file],
+        )]
+
+    def main(self):
+        config_manager = ConfigurationManager()
+        model_benchmark_config = replace(config_manager.get_model_benchmark_config(), **self.overrides)
+
+        # Skip when the registered models, test data, settings and code are unchanged
+        registry = ModelRegistry(model_benchmark_config.registry_file).load()
+        inputs = [model_benchmark_config.test_data_path, model_benchmark_config.registry_file]
+        inputs += [entry["path"] for entry in registry["models"]]
+        inputs += [entry["compiled"]["path"] for entry in registry["models"] if entry.get("compiled")]
+        if model_benchmark_config.baseline_file:
+            inputs.append(model_benchmark_config.baseline_file)
+
+        cache = StageCache(config_manager.get_stage_cache_config())
+        key = cache.fingerprint(inputs=inputs, config=model_benchmark_config, code=[model_benchmark_module, tree_compiler_module])
+        if not self.force and cache.is_fresh("model_benchmark", key):
+            logger.info(f"{STAGE_NAME} is up to date, skipping (use --force to rerun)")
+            return
+
+        report = ModelBenchmark(config=model_benchmark_config).run()
+        cache.record("model_benchmark", key, outputs=[model_benchmark_config.report_file])
+
+        # Print summary
+        print("\n⏱️  Inference benchmark (p50 ms / rows per s):")
+        for name, result in report["models"].items():
+            memory_bytes = result["memory_bytes"] if result["memory_bytes"] is not None else result["traced_bytes"]
+            print(f"{name:22} load {result['load_seconds'] * 1000:.1f} ms, {memory_bytes / 1e6:.1f} MB")
+            for n_threads, sizes in result["threads"].items():
+                cases = ", ".join(
+                    f"{size}: {timing['p50_ms']:.2f} / {timing['rows_per_s']:,.0f}" for size, timing in sizes.items()
+                )
+                print(f"{'':22} {n_threads:>3} threads  {cases}")
+        return report
+
+
+if __name__ == "__main__":
+    # Same options as `mlp benchmark`
+    from my_project.cli import main as cli_main
+    cli_main(["benchmark", *sys.argv[1:]])
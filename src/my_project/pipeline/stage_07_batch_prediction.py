@@ -0,0 +1,39 @@
+import sys
+from dataclasses import replace
+from pathlib import Path
+
+from my_project.config.configuration import ConfigurationManager
+from my_project.components.batch_prediction import BatchPrediction
+from my_project import logger
+
+
+STAGE_NAME = "Batch Prediction Stage"
+
+
+class BatchPredictionPipeline:
+    def __init__(self, force: bool = False, overrides: dict = None):
+        # Scoring always runs: the input is usually a new file every night
+        self.force = force
+        self.overrides = {k: v for k, v in (overrides or {}).items() if v is not None}
+
+    def main(self):
+        config_manager = ConfigurationManager()
+        batch_prediction_config = replace(config_manager.get_batch_prediction_config(), **self.overrides)
+        if batch_prediction_config.input_path is None:
+            raise ValueError("Nothing to score: set batch_prediction.input_path in config.yaml or pass --input")
+        if not Path(batch_prediction_config.input_path).exists():
+            raise FileNotFoundError(f"Input to score not found: {batch_prediction_config.input_path}")
+
+        logger.info(f"Scoring {batch_prediction_config.input_path} with {batch_prediction_config.n_workers} worker(s)")
+        report = BatchPrediction(config=batch_prediction_config).predict()
+
+        # Print summary
+        print(f"\n📦 Scored {report['rows']:,} rows in {report['seconds']:.2f} s "
+              f"({report['rows_per_s']:,.0f} rows/s) -> {report['output']}")
+        return report
+
+
+if __name__ == "__main__":
+    # Same options as `mlp score`
+    from my_project.cli import main as cli_main
+    cli_main(["score", *sys.argv[1:]])
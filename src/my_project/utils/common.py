@@ -1,7 +1,10 @@
+import glob
+import os
 from pathlib import Path
 from typing import Any, List, Union
 import json
 import joblib
+import pandas as pd
 import yaml
 from box import ConfigBox
 from box.exceptions import BoxValueError
@@ -76,20 +79,33 @@ def load_json(path: Path) -> ConfigBox:
 # -------------------------
 # Binary utilities
 # -------------------------
-@ensure_annotations
+# Binary artifacts are never compressed: joblib then writes every NumPy array
+# inside the pickle as an aligned raw buffer, which load_binary(mmap_mode="r")
+# maps straight from the page cache instead of copying (shared by every process
+# that loads the same file, and only the pages predictions touch are read).
+# Because readers map the file, it is never rewritten in place: the new content
+# goes to a temporary file renamed over the old one, so mapped readers keep the
+# old inode (new weights never show through, a shorter file cannot SIGBUS them).
+# Removed ensure_annotations to avoid TypeError with typing.Any
 def save_binary(path: Path, data: Any) -> None:
     try:
+        path = Path(path)
         path.parent.mkdir(parents=True, exist_ok=True)
-        joblib.dump(data, path)
+        tmp_file = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            joblib.dump(data, tmp_file, compress=0)
+            os.replace(tmp_file, path)
+        finally:
+            tmp_file.unlink(missing_ok=True)
         logger.info(f"Data saved to binary file: '{path}'")
     except Exception as e:
         logger.error(f"Error saving binary file '{path}': {e}")
         raise
 
-@ensure_annotations
-def load_binary(path: Path) -> Any:
+# Removed ensure_annotations to avoid TypeError with typing.Any
+def load_binary(path: Path, mmap_mode: str = None) -> Any:
     try:
-        content = joblib.load(path)
+        content = joblib.load(path, mmap_mode=mmap_mode)
         logger.info(f"Data loaded from binary file: '{path}'")
         return content
     except FileNotFoundError as e:
@@ -99,6 +115,202 @@ def load_binary(path: Path) -> Any:
         logger.error(f"Error loading binary file '{path}': {e}")
         raise ValueError(f"Invalid binary file: {path}") from e
 
+# -------------------------
+# DataFrame artifact utilities
+# -------------------------
+# Tabular artifacts are written in the format given by their suffix.
+# Feather is stored uncompressed so readers can memory-map it.
+ARTIFACT_FORMATS = {
+    ".feather": "feather",
+    ".arrow": "feather",
+    ".parquet": "parquet",
+    ".csv": "csv",
+}
+
+
+def artifact_format(path: Path) -> str:
+    try:
+        return ARTIFACT_FORMATS[Path(path).suffix.lower()]
+    except KeyError:
+        raise ValueError(
+            f"Unsupported artifact format '{Path(path).suffix}' for {path}. "
+            f"Use one of {sorted(ARTIFACT_FORMATS)}"
+        ) from None
+
+
+def _apply_schema(df: pd.DataFrame, schema: dict) -> pd.DataFrame:
+    """Cast the columns listed in schema.yaml to their declared dtypes."""
+    dtypes = {column: dtype for column, dtype in (schema or {}).items() if column in df.columns}
+    return df.astype(dtypes) if dtypes else df
+
+
+def save_dataframe(path: Path, df: pd.DataFrame, schema: dict = None, export_csv: bool = False) -> Path:
+    """Write a DataFrame as a typed artifact (feather/parquet/csv), optionally with a CSV copy."""
+    path = Path(path)
+    fmt = artifact_format(path)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        df = _apply_schema(df, schema).reset_index(drop=True)
+
+        if fmt == "feather":
+            df.to_feather(path, compression="uncompressed")
+        elif fmt == "parquet":
+            df.to_parquet(path, index=False)
+        else:
+            df.to_csv(path, index=False)
+
+        if export_csv and fmt != "csv":
+            df.to_csv(path.with_suffix(".csv"), index=False)
+        logger.info(f"DataFrame {df.shape} saved as {fmt}: '{path}'")
+        return path
+    except Exception as e:
+        logger.error(f"Error saving DataFrame to '{path}': {e}")
+        raise
+
+
+def dataset_files(path: Path) -> List[Path]:
+    """Part files of a partitioned dataset directory, in name order."""
+    return sorted(p for p in Path(path).iterdir() if p.is_file() and p.suffix.lower() in ARTIFACT_FORMATS)
+
+
+def expand_glob(path: Path) -> List[Path]:
+    """A path that exists as itself, else the sorted matches of it as a glob pattern (empty if none)."""
+    path = Path(path)
+    if path.exists():
+        return [path]
+    return sorted(Path(p) for p in glob.glob(str(path)))
+
+
+def load_dataframe(path: Path, schema: dict = None, columns: list = None, memory_map: bool = True) -> pd.DataFrame:
+    """Read a tabular artifact in the format given by its suffix, or every part of a dataset directory."""
+    path = Path(path)
+    if path.is_dir():
+        parts = [_read_dataframe(part, schema, columns, memory_map) for part in dataset_files(path)]
+        if not parts:
+            raise FileNotFoundError(f"No data files in dataset directory: {path}")
+        df = pd.concat(parts, ignore_index=True)
+        logger.info(f"DataFrame {df.shape} loaded from {len(parts)} part(s): '{path}'")
+        return df
+    df = _read_dataframe(path, schema, columns, memory_map)
+    logger.info(f"DataFrame {df.shape} loaded from {artifact_format(path)}: '{path}'")
+    return df
+
+
+def _read_dataframe(path: Path, schema: dict, columns: list, memory_map: bool) -> pd.DataFrame:
+    fmt = artifact_format(path)
+    try:
+        if fmt == "feather":
+            from pyarrow import feather
+            df = feather.read_table(path, columns=columns, memory_map=memory_map).to_pandas()
+        elif fmt == "parquet":
+            df = pd.read_parquet(path, columns=columns, memory_map=memory_map)
+        else:
+            dtypes = {c: t for c, t in (schema or {}).items() if columns is None or c in columns}
+            df = pd.read_csv(path, usecols=columns, dtype=dtypes or None)
+        return _apply_schema(df, schema)
+    except FileNotFoundError as e:
+        logger.error(f"Artifact file not found: {e}")
+        raise
+
+def iter_dataframe_chunks(path: Path, chunksize: int = 100_000, schema: dict = None, columns: list = None):
+    """Yield DataFrames of at most `chunksize` rows without loading the whole artifact (or dataset)."""
+    path = Path(path)
+    if path.is_dir():
+        # Chain the parts, keeping one RangeIndex across the whole dataset
+        offset = 0
+        for part in dataset_files(path):
+            for chunk in iter_dataframe_chunks(part, chunksize, schema, columns):
+                chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+                offset += len(chunk)
+                yield chunk
+        return
+
+    fmt = artifact_format(path)
+
+    if fmt == "csv":
+        dtypes = {c: t for c, t in (schema or {}).items() if columns is None or c in columns}
+        for chunk in pd.read_csv(path, chunksize=chunksize, usecols=columns, dtype=dtypes or None):
+            yield chunk
+        return
+
+    import pyarrow as pa
+    if fmt == "feather":
+        import pyarrow.ipc as ipc
+        reader = ipc.open_file(pa.memory_map(str(path), "r"))
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    else:
+        import pyarrow.parquet as pq
+        batches = pq.ParquetFile(path, memory_map=True).iter_batches(batch_size=chunksize, columns=columns)
+
+    # Re-slice stored batches so every chunk honours `chunksize`
+    offset = 0
+    for batch in batches:
+        if columns is not None and fmt == "feather":
+            batch = batch.select(columns)
+        for start in range(0, batch.num_rows, chunksize):
+            chunk = batch.slice(start, chunksize).to_pandas()
+            chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+            offset += len(chunk)
+            yield _apply_schema(chunk, schema)
+
+
+class DataFrameWriter:
+    """
+    Incrementally append DataFrame chunks to a feather/parquet/csv artifact.
+
+    with DataFrameWriter(path, schema=...) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+    """
+
+    def __init__(self, path: Path, schema: dict = None, export_csv: bool = False):
+        self.path = Path(path)
+        self.fmt = artifact_format(self.path)
+        self.schema = schema
+        self.export_csv = export_csv and self.fmt != "csv"
+        self.rows = 0
+        self._writer = None
+        self._arrow_schema = None
+
+    def __enter__(self) -> "DataFrameWriter":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        for target in (self.path, self.path.with_suffix(".csv") if self.export_csv else None):
+            if target is not None and target.exists():
+                target.unlink()
+        return self
+
+    def write(self, df: pd.DataFrame) -> None:
+        df = _apply_schema(df, self.schema).reset_index(drop=True)
+        header = self.rows == 0
+
+        if self.fmt == "csv":
+            df.to_csv(self.path, mode="a", header=header, index=False)
+        else:
+            import pyarrow as pa
+            if self._writer is None:
+                self._arrow_schema = pa.Schema.from_pandas(df, preserve_index=False)
+                if self.fmt == "feather":
+                    import pyarrow.ipc as ipc
+                    options = ipc.IpcWriteOptions(compression=None)
+                    self._writer = ipc.new_file(str(self.path), self._arrow_schema, options=options)
+                else:
+                    import pyarrow.parquet as pq
+                    self._writer = pq.ParquetWriter(self.path, self._arrow_schema)
+            table = pa.Table.from_pandas(df, schema=self._arrow_schema, preserve_index=False)
+            self._writer.write_table(table)
+
+        if self.export_csv:
+            df.to_csv(self.path.with_suffix(".csv"), mode="a", header=header, index=False)
+        self.rows += len(df)
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._writer is None and self.fmt != "csv":
+            # Nothing written: still leave a valid (empty) artifact behind
+            save_dataframe(self.path, pd.DataFrame(columns=list(self.schema or {})), schema=self.schema)
+        elif self._writer is not None:
+            self._writer.close()
+        logger.info(f"{self.rows} rows written incrementally to '{self.path}'")
+
 # -------------------------
 # File size utility
 # -------------------------
@@ -114,3 +326,39 @@ def get_size(path: Path) -> int:
     except Exception as e:
         logger.error(f"Error getting size of file '{path}': {e}")
         raise ValueError(f"Invalid file: {path}") from e
+
+# -------------------------
+# Worker budget utilities
+# -------------------------
+def resolve_n_jobs(n_jobs: int) -> int:
+    """Translate a joblib-style n_jobs (-1 = all cores) into a positive core count."""
+    cpu_count = os.cpu_count() or 1
+    if n_jobs is None or n_jobs == 0:
+        return 1
+    if n_jobs < 0:
+        return max(cpu_count + 1 + n_jobs, 1)
+    return n_jobs
+
+
+def allocate_workers(weights: dict, budget: int) -> dict:
+    """
+    Split `budget` workers between jobs proportionally to their weights.
+    Every job gets at least one worker; the remainder goes to the heaviest jobs.
+    """
+    if not weights:
+        return {}
+
+    total = sum(weights.values()) or 1
+    shares = {name: budget * weight / total for name, weight in weights.items()}
+    allocation = {name: max(int(share), 1) for name, share in shares.items()}
+
+    # Hand out leftover workers by largest fractional share
+    leftover = budget - sum(allocation.values())
+    for name in sorted(shares, key=lambda n: shares[n] - int(shares[n]), reverse=True):
+        if leftover <= 0:
+            break
+        allocation[name] += 1
+        leftover -= 1
+
+    logger.info(f"Worker allocation (budget={budget}): {allocation}")
+    return allocation
@@ -0,0 +1,264 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPException
+from pathlib import Path
+from typing import Optional
+from urllib import request
+from urllib.error import HTTPError, URLError
+
+from my_project import logger
+
+
+_COPY_BUFFER = 1 << 20
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with Path(path).open("rb") as f:
+        for chunk in iter(lambda: f.read(_COPY_BUFFER), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class RemoteUnchanged(Exception):
+    """Raised by probe() when the server answers 304 Not Modified."""
+
+
+class RemoteChanged(Exception):
+    """Raised when the source no longer matches the validator its parts were fetched with."""
+
+
+def _range_validator(info: dict) -> Optional[str]:
+    """If-Range value: a strong ETag, else Last-Modified (weak ETags are not allowed there)."""
+    etag = info.get("etag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return info.get("last_modified")
+
+
+class ChunkedDownloader:
+    """
+    HTTP downloader with parallel range requests, resume and sha256 checks.
+
+    The file is split into `chunk_size` byte ranges fetched by `n_workers`
+    threads into `<dest>.parts/`. Each part is appended to, so an interrupted
+    download resumes from the bytes already on disk, as long as the source is
+    unchanged: the parts directory records the ETag / Last-Modified and size
+    they were fetched for (and is discarded when those differ), and every
+    range request carries If-Range, so a source changing mid-download
+    restarts it instead of stitching old and new bytes. Servers without range
+    support fall back to a single streamed request. The assembled file is
+    only moved into place once its sha256 matches `expected_sha256` (if set).
+    """
+
+    def __init__(self, chunk_size: int = 8 << 20, n_workers: int = 4, max_retries: int = 3, timeout: float = 60):
+        self.chunk_size = chunk_size
+        self.n_workers = n_workers
+        self.max_retries = max_retries
+        self.timeout = timeout
+
+    def probe(self, url: str, etag: str = None) -> dict:
+        """Size, range support and validators of `url` from a 1-byte ranged GET."""
+        headers = {"Range": "bytes=0-0"}
+        if etag:
+            headers["If-None-Match"] = etag
+        try:
+            with request.urlopen(request.Request(url, headers=headers), timeout=self.timeout) as response:
+                content_range = response.headers.get("Content-Range", "")
+                accepts_ranges = response.status == 206 and "/" in content_range
+                size = content_range.rsplit("/", 1)[-1] if accepts_ranges else response.headers.get("Content-Length")
+                return {
+                    "url": response.geturl(),  # after redirects
+                    "size": int(size) if size and size != "*" else None,
+                    "accepts_ranges": accepts_ranges,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                }
+        except HTTPError as e:
+            if e.code == 304:
+                raise RemoteUnchanged(url) from None
+            raise
+
+    def _fetch_range(self, url: str, part: Path, start: int, end: int, validator: str = None) -> int:
+        """Fetch bytes [start, end] into `part`, resuming from what is already there."""
+        expected = end - start + 1
+        for attempt in range(1, self.max_retries + 1):
+            have = part.stat().st_size if part.exists() else 0
+            if have == expected:
+                return expected
+            if have > expected:
+                part.unlink()
+                have = 0
+            try:
+                headers = {"Range": f"bytes={start + have}-{end}"}
+                if validator:
+                    headers["If-Range"] = validator
+                with request.urlopen(request.Request(url, headers=headers), timeout=self.timeout) as response:
+                    if response.status == 200 and validator:
+                        # If-Range failed: the server sends the whole, changed file
+                        raise RemoteChanged(url)
+                    if response.status != 206:
+                        raise IOError(f"Server ignored range request for {part.name} (status {response.status})")
+                    with part.open("ab") as f:
+                        shutil.copyfileobj(response, f, _COPY_BUFFER)
+                if part.stat().st_size < expected:
+                    raise IOError(f"connection closed after {part.stat().st_size - have} of {expected - have} bytes")
+            except (OSError, HTTPException) as e:
+                logger.warning(f"Range {start}-{end} attempt {attempt}/{self.max_retries} failed: {e}")
+                if attempt < self.max_retries:
+                    time.sleep(min(2 ** attempt, 30))
+        have = part.stat().st_size if part.exists() else 0
+        if have != expected:
+            raise IOError(f"Could not fetch bytes {start}-{end} of {url} after {self.max_retries} attempts")
+        return expected
+
+    def _download_ranges(self, info: dict, tmp_file: Path) -> None:
+        url, size, validator = info["url"], info["size"], _range_validator(info)
+        parts_dir = tmp_file.with_name(tmp_file.name + ".parts")
+        source = {
+            "url": url, "etag": info.get("etag"), "last_modified": info.get("last_modified"),
+            "size": size, "chunk_size": self.chunk_size,
+        }
+        source_file = parts_dir / "source.json"
+        if parts_dir.exists():
+            try:
+                resumable = validator is not None and json.loads(source_file.read_text(encoding="utf-8")) == source
+            except (OSError, ValueError):
+                resumable = False
+            if not resumable:
+                logger.info(f"Discarding the parts of an earlier download of {url}: the source changed or cannot be verified")
+                shutil.rmtree(parts_dir)
+        parts_dir.mkdir(parents=True, exist_ok=True)
+        source_file.write_text(json.dumps(source), encoding="utf-8")
+        ranges = [(start, min(start + self.chunk_size, size) - 1) for start in range(0, size, self.chunk_size)]
+        parts = [parts_dir / f"{i:06d}.part" for i in range(len(ranges))]
+
+        done = 0
+        with ThreadPoolExecutor(max_workers=self.n_workers) as pool:
+            futures = [
+                pool.submit(self._fetch_range, url, part, start, end, validator)
+                for part, (start, end) in zip(parts, ranges)
+            ]
+            for future in futures:
+                done += future.result()
+                logger.info(f"Downloaded {done / 1e6:.1f}/{size / 1e6:.1f} MB ({100 * done / size:.0f}%)")
+
+        # Stitch the parts together in order
+        with tmp_file.open("wb") as out:
+            for part in parts:
+                with part.open("rb") as f:
+                    shutil.copyfileobj(f, out, _COPY_BUFFER)
+        shutil.rmtree(parts_dir)
+
+    def _download_stream(self, url: str, tmp_file: Path) -> None:
+        with request.urlopen(url, timeout=self.timeout) as response, tmp_file.open("wb") as out:
+            shutil.copyfileobj(response, out, _COPY_BUFFER)
+
+    def download(self, url: str, dest: Path, expected_sha256: str = None, info: dict = None) -> dict:
+        """Download `url` to `dest`; returns the probe info plus the file's sha256."""
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        info = info or self.probe(url)
+        tmp_file = dest.with_name(dest.name + ".download")
+
+        if info["accepts_ranges"] and info["size"]:
+            logger.info(f"Downloading {info['size'] / 1e6:.1f} MB in {self.chunk_size >> 20} MB ranges "
+                        f"with {self.n_workers} workers")
+            try:
+                self._download_ranges(info, tmp_file)
+            except RemoteChanged:
+                # Start over from a fresh probe; the stale parts are discarded against its validators
+                logger.warning(f"{url} changed during the download, starting over")
+                info = self.probe(url)
+                self._download_ranges(info, tmp_file)
+        else:
+            logger.info("Server does not support range requests, downloading in a single stream")
+            self._download_stream(info["url"], tmp_file)
+
+        sha256 = sha256_file(tmp_file)
+        if expected_sha256 and sha256 != expected_sha256.lower():
+            tmp_file.unlink()
+            raise ValueError(f"Checksum mismatch for {url}: expected {expected_sha256}, got {sha256}")
+
+        os.replace(tmp_file, dest)
+        return {**info, "sha256": sha256}
+
+
+class DownloadCache:
+    """
+    Local content cache keyed by URL, revalidated with the server's ETag.
+
+    index.json maps each URL to its cached file, ETag/Last-Modified and sha256.
+    fetch() is safe to call from several threads at once.
+    """
+
+    def __init__(self, cache_dir: Path, downloader: ChunkedDownloader):
+        self.cache_dir = Path(cache_dir)
+        self.index_file = self.cache_dir / "index.json"
+        self.downloader = downloader
+        self._lock = threading.Lock()
+
+    def _load_index(self) -> dict:
+        if self.index_file.exists():
+            return json.loads(self.index_file.read_text(encoding="utf-8"))
+        return {}
+
+    def _save_index(self, index: dict) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.index_file.with_suffix(".tmp")
+        tmp_file.write_text(json.dumps(index, indent=4, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_file, self.index_file)
+
+    def _cache_path(self, url: str) -> Path:
+        name = url.split("?", 1)[0].rstrip("/").rsplit("/", 1)[-1] or "download"
+        return self.cache_dir / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()[:16]}-{name}"
+
+    def _valid_entry(self, entry: Optional[dict], expected_sha256: str = None) -> bool:
+        if not entry or not Path(entry["file"]).exists():
+            return False
+        if expected_sha256 and entry["sha256"] != expected_sha256.lower():
+            return False
+        return Path(entry["file"]).stat().st_size == entry.get("size", Path(entry["file"]).stat().st_size)
+
+    def fetch(self, url: str, expected_sha256: str = None) -> Path:
+        """Return a local path for `url`, downloading only if the cached copy is stale."""
+        with self._lock:
+            entry = self._load_index().get(url)
+        cached = self._valid_entry(entry, expected_sha256)
+
+        try:
+            info = self.downloader.probe(url, etag=entry.get("etag") if cached else None)
+        except RemoteUnchanged:
+            logger.info(f"Source unchanged (304, ETag {entry['etag']}), using cached copy: [{entry['file']}]")
+            return Path(entry["file"])
+        except (URLError, OSError) as e:
+            if cached:
+                logger.warning(f"Could not reach {url} ({e}), using cached copy: [{entry['file']}]")
+                return Path(entry["file"])
+            raise
+
+        # Some servers ignore If-None-Match; compare validators ourselves
+        if cached and info["etag"] and info["etag"] == entry.get("etag"):
+            logger.info(f"Source unchanged (ETag {info['etag']}), using cached copy: [{entry['file']}]")
+            return Path(entry["file"])
+
+        target = self._cache_path(url)
+        result = self.downloader.download(url, target, expected_sha256=expected_sha256, info=info)
+        with self._lock:
+            # Re-read so entries written by other threads meanwhile are kept
+            index = self._load_index()
+            index[url] = {
+                "file": str(target),
+                "etag": result["etag"],
+                "last_modified": result["last_modified"],
+                "sha256": result["sha256"],
+                "size": target.stat().st_size,
+            }
+            self._save_index(index)
+        logger.info(f"Cached {url} at [{target}] (sha256 {result['sha256']})")
+        return target
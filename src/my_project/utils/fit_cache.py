@@ -0,0 +1,109 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Optional
+
+import joblib
+
+from my_project import logger
+from my_project.utils.stage_cache import hash_object
+
+
+class FitResultCache:
+    """
+    Persistent cache of cross-validation fit results.
+
+    One entry per (model, hyperparameters, data fingerprint, fold, ...) key:
+    a small JSON file with the fold score and timings and, optionally, the
+    fitted estimator next to it. Entries are sharded in sub-directories by
+    key prefix and written atomically, so several trainer processes can share
+    one cache. A hit refreshes the entry's mtime; when the cache outgrows
+    `max_size_mb`, the least recently used entries are evicted.
+    """
+
+    def __init__(self, root_dir: Optional[Path], max_size_mb: float = 512, store_estimators: bool = False):
+        self.root_dir = Path(root_dir) if root_dir else None
+        self.max_bytes = int(max_size_mb * (1 << 20))
+        self.store_estimators = store_estimators
+
+    @property
+    def enabled(self) -> bool:
+        return self.root_dir is not None
+
+    def key(self, **parts: Any) -> str:
+        return hash_object(parts)
+
+    def _path(self, key: str, suffix: str) -> Path:
+        return self.root_dir / key[:2] / f"{key}{suffix}"
+
+    # --- lookups ---
+    def get(self, key: str) -> Optional[dict]:
+        if not self.enabled:
+            return None
+        path = self._path(key, ".json")
+        try:
+            result = json.loads(path.read_text(encoding="utf-8"))
+            os.utime(path)  # mark as recently used
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return result
+
+    def get_estimator(self, key: str) -> Optional[Any]:
+        if not (self.enabled and self.store_estimators):
+            return None
+        path = self._path(key, ".joblib")
+        try:
+            estimator = joblib.load(path)
+            os.utime(path)
+        except (FileNotFoundError, EOFError):
+            return None
+        return estimator
+
+    # --- writes ---
+    def _atomic_write(self, path: Path, write) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        write(tmp_file)
+        os.replace(tmp_file, path)
+
+    def put(self, key: str, result: dict, estimator: Any = None) -> None:
+        if not self.enabled:
+            return
+        if estimator is not None and self.store_estimators:
+            self._atomic_write(self._path(key, ".joblib"), lambda tmp: joblib.dump(estimator, tmp))
+        self._atomic_write(
+            self._path(key, ".json"),
+            lambda tmp: tmp.write_text(json.dumps(result, default=str), encoding="utf-8"),
+        )
+
+    def evict(self) -> int:
+        """Delete least recently used entries until the cache fits in max_size_mb; returns bytes freed."""
+        if not (self.enabled and self.root_dir.exists()):
+            return 0
+
+        entries = {}
+        for path in self.root_dir.glob("*/*"):
+            if path.suffix not in (".json", ".joblib"):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue  # evicted by another process meanwhile
+            size, last_used = entries.get(path.stem, (0, 0))
+            entries[path.stem] = (size + stat.st_size, max(last_used, stat.st_mtime))
+
+        total = sum(size for size, _ in entries.values())
+        freed = 0
+        for key, (size, _) in sorted(entries.items(), key=lambda item: item[1][1]):
+            if total - freed <= self.max_bytes:
+                break
+            for suffix in (".json", ".joblib"):
+                try:
+                    self._path(key, suffix).unlink()
+                except FileNotFoundError:
+                    pass
+            freed += size
+
+        if freed:
+            logger.info(f"Fit cache evicted {freed / 1e6:.1f} MB of least recently used entries")
+        return freed
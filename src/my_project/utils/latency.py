@@ -0,0 +1,34 @@
+import time
+from typing import Any, Callable
+
+import numpy as np
+
+
+def measure_latency(fn: Callable, *args: Any, repeats: int = 100, warmup: int = 5) -> dict:
+    """Wall time of fn(*args) over `repeats` calls (after `warmup` untimed calls), in milliseconds."""
+    for _ in range(warmup):
+        fn(*args)
+
+    timings = np.empty(repeats)
+    for i in range(repeats):
+        start = time.perf_counter()
+        fn(*args)
+        timings[i] = time.perf_counter() - start
+    timings *= 1000.0
+
+    return {
+        "p50_ms": round(float(np.percentile(timings, 50)), 4),
+        "p99_ms": round(float(np.percentile(timings, 99)), 4),
+        "mean_ms": round(float(timings.mean()), 4),
+        "repeats": repeats,
+    }
+
+
+def predict_latency(model: Any, x, batch_rows: int = 1000, repeats: int = 200) -> dict:
+    """Single-row and batch predict latency of a fitted model on raw feature rows `x`."""
+    single = measure_latency(model.predict, x.iloc[:1], repeats=repeats)
+    batch_x = x.iloc[:batch_rows]
+    batch = measure_latency(model.predict, batch_x, repeats=max(repeats // 10, 5))
+    batch["rows"] = len(batch_x)
+    batch["per_row_us"] = round(batch["mean_ms"] * 1000.0 / max(len(batch_x), 1), 4)
+    return {"single_row": single, "batch": batch}
@@ -0,0 +1,277 @@
+import functools
+import json
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+from my_project import logger
+from my_project.entity.config_entity import InstrumentationConfig
+
+
+# Period of the RSS sampler that finds the peak of a section
+_RSS_SAMPLE_SECONDS = 0.05
+
+_records = []
+_records_lock = threading.Lock()
+_active = threading.local()
+
+
+def _rss_bytes():
+    """Current RSS from /proc (Linux); None elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _io_bytes():
+    """(read, written) bytes through read/write calls of this process, from /proc/self/io; (None, None) elsewhere."""
+    try:
+        with open("/proc/self/io") as f:
+            counters = dict(line.split(": ") for line in f.read().splitlines())
+        return int(counters["rchar"]), int(counters["wchar"])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+def _children_usage():
+    """(CPU seconds, peak RSS bytes) of terminated child processes, such as process pool workers."""
+    try:
+        import resource
+    except ImportError:
+        return 0.0, None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    # ru_maxrss is in bytes on macOS, kilobytes elsewhere
+    return usage.ru_utime + usage.ru_stime, usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+def _delta(end, start):
+    return None if end is None or start is None else end - start
+
+
+class _Section:
+    """
+    One instrumented block: wall and CPU time, peak RSS, rows processed and
+    bytes read/written between enter and exit. CPU time and I/O are process
+    counters, so sections running at the same time on other threads (stages
+    of the pipeline graph) are included in each other's numbers.
+    """
+
+    def __init__(self, name: str = None, kind: str = "call"):
+        self.name = name
+        self.kind = kind
+        self.rows = 0
+
+    # --- decorator ---
+    def __call__(self, fn):
+        name = self.name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _Section(name, self.kind):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    # --- context manager ---
+    def _sample_rss(self):
+        while not self._stop.wait(_RSS_SAMPLE_SECONDS):
+            rss = _rss_bytes()
+            if rss is not None:
+                self._peak_rss = max(self._peak_rss or 0, rss)
+
+    def __enter__(self):
+        stack = getattr(_active, "stack", None)
+        if stack is None:
+            stack = _active.stack = []
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+
+        self._started_at = time.time()
+        self._rss_start = self._peak_rss = _rss_bytes()
+        self._io_start = _io_bytes()
+        self._children_start = _children_usage()
+        self._cpu_start = time.process_time()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample_rss, name="rss-sampler", daemon=True)
+        self._sampler.start()
+        self._wall_start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall_seconds = time.perf_counter() - self._wall_start
+        cpu_seconds = time.process_time() - self._cpu_start
+        self._stop.set()
+        self._sampler.join()
+        rss_end = _rss_bytes()
+        read_end, written_end = _io_bytes()
+        children_cpu, children_peak = _children_usage()
+        _active.stack.remove(self)
+
+        record = {
+            "name": self.name,
+            "kind": self.kind,
+            "parent": self.parent,
+            "pid": os.getpid(),
+            "thread": threading.current_thread().name,
+            "started_at": datetime.fromtimestamp(self._started_at, timezone.utc).isoformat(),
+            "wall_seconds": round(wall_seconds, 4),
+            "cpu_seconds": round(cpu_seconds + children_cpu - self._children_start[0], 4),
+            "peak_rss_bytes": max(filter(None, (self._peak_rss, rss_end)), default=None),
+            "rss_delta_bytes": _delta(rss_end, self._rss_start),
+            "rows": self.rows or None,
+            "bytes_read": _delta(read_end, self._io_start[0]),
+            "bytes_written": _delta(written_end, self._io_start[1]),
+            "failed": exc_type is not None,
+        }
+        if children_peak and children_peak != self._children_start[1]:
+            record["children_peak_rss_bytes"] = children_peak
+        with _records_lock:
+            _records.append(record)
+        return False
+
+
+def instrument(name: str = None, kind: str = "call") -> _Section:
+    """
+    Measure a block or function call:
+
+        @instrument()                      # named after the function
+        def validate_data(self): ...
+
+        with instrument("split") as section:
+            section.rows += len(chunk)
+    """
+    return _Section(name, kind)
+
+
+def record_rows(n: int) -> None:
+    """Add rows processed to the innermost instrumented section of this thread (no-op outside one)."""
+    stack = getattr(_active, "stack", None)
+    if stack:
+        stack[-1].rows += int(n)
+
+
+def records() -> list:
+    with _records_lock:
+        return list(_records)
+
+
+def drain_records() -> list:
+    """Remove and return the records of this process, e.g. to send them back from a pool worker."""
+    with _records_lock:
+        # A forked worker inherits the parent's records; only its own are sent back
+        own = [record for record in _records if record["pid"] == os.getpid()]
+        _records.clear()
+    return own
+
+
+def merge_records(new_records: list) -> None:
+    """Add records measured in a worker process to this process's report."""
+    with _records_lock:
+        _records.extend(new_records)
+
+
+@contextmanager
+def profile_stage(name: str, profiler: str = None, profile_dir: Path = None):
+    """Opt-in profile dump of one stage: cprofile (<stage>.prof, pstats format) or pyinstrument (<stage>.html)."""
+    if not profiler:
+        yield
+        return
+
+    profile_dir = Path(profile_dir)
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    slug = re.sub(r"[^0-9a-z]+", "_", name.lower()).strip("_")
+
+    if profiler == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            logger.warning("pyinstrument is not installed, profiling with cProfile")
+            profiler = "cprofile"
+        else:
+            session = Profiler()
+            session.start()
+            try:
+                yield
+            finally:
+                session.stop()
+                path = profile_dir / f"{slug}.html"
+                path.write_text(session.output_html(), encoding="utf-8")
+                logger.info(f"Profile of {name} saved at {path}")
+            return
+
+    if profiler != "cprofile":
+        raise ValueError(f"Unknown profiler {profiler!r}, use cprofile or pyinstrument")
+
+    import cProfile
+    session = cProfile.Profile()
+    try:
+        session.enable()
+    except ValueError as e:
+        # Another profiler is active (e.g. a concurrent stage on Python 3.12+)
+        logger.warning(f"Not profiling {name}: {e}")
+        yield
+        return
+    try:
+        yield
+    finally:
+        session.disable()
+        path = profile_dir / f"{slug}.prof"
+        session.dump_stats(path)
+        logger.info(f"Profile of {name} saved at {path} (python -m pstats {path})")
+
+
+def summarize(run_records: list) -> dict:
+    """Totals per section name: calls, wall/CPU seconds, peak RSS, rows and bytes."""
+    summary = {}
+    for record in run_records:
+        totals = summary.setdefault(record["name"], {
+            "kind": record["kind"], "calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0,
+            "peak_rss_bytes": None, "rows": None, "bytes_read": None, "bytes_written": None,
+        })
+        totals["calls"] += 1
+        totals["wall_seconds"] = round(totals["wall_seconds"] + record["wall_seconds"], 4)
+        totals["cpu_seconds"] = round(totals["cpu_seconds"] + record["cpu_seconds"], 4)
+        if record["peak_rss_bytes"] is not None:
+            totals["peak_rss_bytes"] = max(totals["peak_rss_bytes"] or 0, record["peak_rss_bytes"])
+        for key in ("rows", "bytes_read", "bytes_written"):
+            if record[key] is not None:
+                totals[key] = (totals[key] or 0) + record[key]
+    return summary
+
+
+def _metric_key(name: str) -> str:
+    # MLflow metric names allow alphanumerics, _ - . / and spaces
+    return re.sub(r"[^\w\-./ ]", "_", name)
+
+
+def export_run_report(config: InstrumentationConfig, tracking_config=None) -> dict:
+    """Write the sections measured in this run to the JSON report and, if enabled, as MLflow metrics."""
+    run_records = records()
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "summary": summarize(run_records),
+        "sections": run_records,
+    }
+    path = Path(config.report_file)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=4)
+    logger.info(f"Run report saved at {path}")
+
+    if config.mlflow and tracking_config is not None and run_records:
+        from my_project.utils.tracking import MLflowTracker
+
+        metrics = {}
+        for name, totals in report["summary"].items():
+            for key in ("wall_seconds", "cpu_seconds", "peak_rss_bytes", "rows", "bytes_read", "bytes_written"):
+                if totals[key] is not None:
+                    metrics[f"{_metric_key(name)}.{key}"] = totals[key]
+        with MLflowTracker(tracking_config, run_name="pipeline_run") as tracker:
+            tracker.log_metrics(metrics)
+    return report
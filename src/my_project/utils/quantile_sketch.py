@@ -0,0 +1,75 @@
+import numpy as np
+
+
+class KLLSketch:
+    """
+    Mergeable streaming quantile sketch (KLL).
+
+    Values are kept in a hierarchy of compactors; an item stored at level h
+    stands for 2**h original values. When a level outgrows its capacity it is
+    sorted and every other item (random offset) is promoted to the next level.
+    Memory stays O(k log(n / k)) regardless of how many values are added, and
+    two sketches built on different chunks/files can be merged.
+    """
+
+    def __init__(self, k: int = 200, seed: int = 42):
+        self.k = k
+        self.count = 0
+        self._levels = [np.empty(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._levels) - level - 1
+        return max(int(np.ceil(self.k * (2.0 / 3.0) ** depth)), 2)
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self._levels):
+            items = self._levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self._levels):
+                    self._levels.append(np.empty(0, dtype=np.float64))
+                items = np.sort(items)
+                # An odd item out stays behind so the total weight is preserved
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                paired = items[:len(items) - len(keep)]
+                promoted = paired[self._rng.integers(2)::2]
+                self._levels[level] = keep
+                self._levels[level + 1] = np.concatenate([self._levels[level + 1], promoted])
+            level += 1
+
+    def update(self, values) -> "KLLSketch":
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if values.size:
+            self._levels[0] = np.concatenate([self._levels[0], values])
+            self.count += values.size
+            self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty(0, dtype=np.float64))
+        for level, items in enumerate(other._levels):
+            self._levels[level] = np.concatenate([self._levels[level], items])
+        self.count += other.count
+        self._compress()
+        return self
+
+    def quantiles(self, qs) -> np.ndarray:
+        """Approximate quantiles with the same linear interpolation as pandas/numpy."""
+        qs = np.atleast_1d(np.asarray(qs, dtype=np.float64))
+        if not self.count:
+            return np.full(qs.shape, np.nan)
+
+        values = np.concatenate(self._levels)
+        weights = np.concatenate([
+            np.full(len(items), 2.0 ** level) for level, items in enumerate(self._levels)
+        ])
+        order = np.argsort(values, kind="stable")
+        values, weights = values[order], weights[order]
+
+        # Position of each stored item in the (weighted) full ranking, 0..1
+        cumulative = np.cumsum(weights) - weights / 2.0
+        positions = (cumulative - cumulative[0]) / max(cumulative[-1] - cumulative[0], 1e-12)
+        return np.interp(qs, positions, values)
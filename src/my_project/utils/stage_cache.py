@@ -0,0 +1,164 @@
+import hashlib
+import inspect
+import json
+import os
+import threading
+from dataclasses import asdict, is_dataclass
+from pathlib import Path
+from typing import Any, Iterable, List, Optional
+
+from my_project import logger, __version__
+from my_project.entity.config_entity import StageCacheConfig
+from my_project.utils.common import expand_glob
+
+
+_CHUNK_SIZE = 1 << 20
+
+# Stages of one pipeline run may record concurrently (pipeline graph), each
+# through its own StageCache instance
+_MANIFEST_LOCK = threading.Lock()
+
+
+def hash_object(obj: Any) -> str:
+    """Stable sha256 of a config slice (dataclass, ConfigBox, dict, list...)."""
+    if is_dataclass(obj):
+        obj = asdict(obj)
+    payload = json.dumps(obj, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def code_version(modules: Iterable[Any]) -> str:
+    """Hash of the source of the given modules/objects plus the package version."""
+    digest = hashlib.sha256(__version__.encode("utf-8"))
+    for module in modules:
+        digest.update(Path(inspect.getsourcefile(module)).read_bytes())
+    return digest.hexdigest()
+
+
+class StageCache:
+    """
+    Content-addressed cache of pipeline stage runs.
+
+    Each stage is fingerprinted from its input files, config slice and code
+    version. The manifest stores that fingerprint with digests of the outputs
+    the stage produced, so a rerun with the same fingerprint and untouched
+    outputs can be skipped.
+    """
+
+    def __init__(self, config: StageCacheConfig):
+        self.manifest_file = Path(config.manifest_file)
+        self._lock = threading.Lock()
+        self._manifest = self._load()
+
+    # --- manifest persistence ---
+    def _load(self) -> dict:
+        if not self.manifest_file.exists():
+            return {"stages": {}, "files": {}}
+        try:
+            manifest = json.loads(self.manifest_file.read_text(encoding="utf-8"))
+        except json.JSONDecodeError:
+            logger.warning(f"Stage manifest {self.manifest_file} is corrupt, starting fresh")
+            return {"stages": {}, "files": {}}
+        manifest.setdefault("stages", {})
+        manifest.setdefault("files", {})
+        return manifest
+
+    def _save(self) -> None:
+        self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.manifest_file.with_suffix(".tmp")
+        tmp_file.write_text(json.dumps(self._manifest, indent=4, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_file, self.manifest_file)
+
+    # --- hashing ---
+    def digest(self, path: Path) -> Optional[str]:
+        """sha256 of a file (or directory tree); reuses the last digest while size/mtime are unchanged."""
+        path = Path(path)
+        if not path.exists():
+            return None
+        if path.is_dir():
+            digest = hashlib.sha256()
+            for child in sorted(p for p in path.rglob("*") if p.is_file()):
+                child_digest = self.digest(child)
+                if child_digest is None:
+                    continue  # removed since the listing
+                digest.update(str(child.relative_to(path)).encode("utf-8"))
+                digest.update(child_digest.encode("utf-8"))
+            return digest.hexdigest()
+
+        try:
+            stat = path.stat()
+            key = str(path.resolve())
+            cached = self._manifest["files"].get(key)
+            if cached and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+                return cached["sha256"]
+
+            digest = hashlib.sha256()
+            with path.open("rb") as f:
+                for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+        except FileNotFoundError:
+            return None
+        sha256 = digest.hexdigest()
+        self._manifest["files"][key] = {
+            "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256,
+        }
+        return sha256
+
+    def fingerprint(self, inputs: List[Path], config: Any, code: Iterable[Any], extra: Any = None) -> str:
+        """
+        Combine input file digests, the config slice and the code version into
+        one key; `extra` adds state outside the tracked files (e.g. the
+        validators of remote sources). A glob input stands for its matches.
+        """
+        parts = {
+            "inputs": {
+                str(match): self.digest(match)
+                for path in inputs
+                for match in (expand_glob(path) or [path])
+            },
+            "config": hash_object(config),
+            "code": code_version(code),
+        }
+        if extra is not None:
+            parts["extra"] = hash_object(extra)
+        return hash_object(parts)
+
+    # --- lookups ---
+    def is_fresh(self, stage: str, key: str) -> bool:
+        """
+        True when the stage last ran with `key` and all its outputs are
+        unchanged. A missing output makes the stage stale unless it was
+        recorded as optional.
+        """
+        with self._lock:
+            entry = self._manifest["stages"].get(stage)
+            if not entry or entry["key"] != key:
+                return False
+            optional = set(entry.get("optional", []))
+            for path, sha256 in entry["outputs"].items():
+                digest = self.digest(Path(path))
+                if digest != sha256 or (digest is None and path not in optional):
+                    return False
+            return True
+
+    def meta(self, stage: str) -> dict:
+        entry = self._manifest["stages"].get(stage, {})
+        return entry.get("meta", {})
+
+    def record(self, stage: str, key: str, outputs: List[Path], meta: dict = None, optional: List[Path] = None) -> None:
+        """Remember a successful run; `optional` outputs may legitimately not exist."""
+        with self._lock, _MANIFEST_LOCK:
+            entry = {
+                "key": key,
+                "outputs": {str(path): self.digest(Path(path)) for path in outputs},
+                "meta": meta or {},
+            }
+            if optional:
+                entry["optional"] = [str(path) for path in optional]
+            # Merge into the manifest on disk so stages recorded meanwhile are kept
+            files = self._manifest["files"]
+            self._manifest = self._load()
+            self._manifest["files"].update(files)
+            self._manifest["stages"][stage] = entry
+            self._save()
+        logger.info(f"Stage cache updated for '{stage}'")
@@ -0,0 +1,257 @@
+import queue
+import threading
+import time
+from itertools import zip_longest
+from pathlib import Path
+
+from my_project import logger
+from my_project.entity.config_entity import TrackingConfig
+
+
+# Per-request limits of MLflow log_batch (at most 1000 values in total)
+_MAX_PARAMS = 100
+_MAX_TAGS = 100
+_MAX_METRICS = 800
+
+# Set on offline runs once uploaded, so a sync never copies a run twice
+SYNCED_TAG = "mlp.synced_run_id"
+
+# Offline runs read per search_runs call while syncing
+_SYNC_PAGE_SIZE = 100
+
+
+def local_store_uri(path) -> str:
+    """MLflow URI of a local SQLite tracking store (MLflow 3 no longer writes plain ./mlruns)."""
+    path = Path(path).resolve()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return f"sqlite:///{path.as_posix()}"
+
+
+def _chunks(values: list, size: int) -> list:
+    return [values[i:i + size] for i in range(0, len(values), size)]
+
+
+def _experiment_id(client, name: str) -> str:
+    """Id of the experiment called `name`, created (or restored, if it was deleted) as needed."""
+    experiment = client.get_experiment_by_name(name)
+    if experiment is None:
+        return client.create_experiment(name)
+    if experiment.lifecycle_stage == "deleted":
+        client.restore_experiment(experiment.experiment_id)
+    return experiment.experiment_id
+
+
+def _log_batch(client, run_id: str, params: dict, metrics: list, tags: dict) -> None:
+    """Send params, metrics ((key, value, timestamp_ms, step) tuples) and tags in as few log_batch calls as allowed."""
+    from mlflow.entities import Metric, Param, RunTag
+
+    params = [Param(key, str(value)) for key, value in params.items()]
+    metrics = [Metric(key, float(value), timestamp, step) for key, value, timestamp, step in metrics]
+    tags = [RunTag(key, str(value)) for key, value in tags.items()]
+    for param_chunk, metric_chunk, tag_chunk in zip_longest(
+        _chunks(params, _MAX_PARAMS), _chunks(metrics, _MAX_METRICS), _chunks(tags, _MAX_TAGS), fillvalue=[]
+    ):
+        client.log_batch(run_id, metrics=metric_chunk, params=param_chunk, tags=tag_chunk)
+
+
+class MLflowTracker:
+    """
+    One MLflow run whose params, metrics and tags are buffered and sent with
+    log_batch from a background thread, so pipeline stages never wait on the
+    tracking server. The run is created on the first flush.
+
+    mode=offline logs to the local SQLite store instead, uploaded later with
+    sync_offline_runs (`mlp sync-tracking`). In online mode, a run the server
+    fails on is re-logged in full to that local store (fallback_offline).
+
+    The worker is not a daemon thread: end() returns at once, and the
+    interpreter waits for the last batch before exiting.
+    """
+
+    def __init__(self, config: TrackingConfig, run_name: str, tags: dict = None):
+        # mlflow is heavy to import, only runs that track pay for it
+        import mlflow
+
+        self.config = config
+        self.run_name = run_name
+        self.offline = config.mode == "offline"
+        if self.offline:
+            self.tracking_uri = local_store_uri(config.offline_store)
+        else:
+            self.tracking_uri = config.tracking_uri or mlflow.get_tracking_uri()
+        self.run_id = None
+
+        # Everything sent so far, re-logged if the run falls back to the offline store
+        self._sent = {"params": {}, "metrics": [], "tags": {}}
+        self._queue = queue.Queue()
+        self._ended = False
+        self._thread = threading.Thread(target=self._worker, name="mlflow-tracker", daemon=False)
+        self._thread.start()
+        if tags:
+            self.set_tags(tags)
+
+    # --- public API (never blocks on the server) ---
+    def _put(self, kind: str, payload) -> None:
+        if self._ended:
+            logger.warning(f"MLflow run '{self.run_name}' has ended, ignoring {kind}")
+            return
+        self._queue.put((kind, payload))
+
+    def log_params(self, params: dict) -> None:
+        self._put("params", dict(params))
+
+    def log_param(self, key: str, value) -> None:
+        self.log_params({key: value})
+
+    def log_metrics(self, metrics: dict, step: int = 0) -> None:
+        timestamp = int(time.time() * 1000)
+        self._put("metrics", [(key, float(value), timestamp, step) for key, value in metrics.items()])
+
+    def log_metric(self, key: str, value, step: int = 0) -> None:
+        self.log_metrics({key: value}, step=step)
+
+    def set_tags(self, tags: dict) -> None:
+        self._put("tags", dict(tags))
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until everything logged so far is sent; False if the timeout ran out first."""
+        if self._ended:
+            self._thread.join(timeout)
+            return not self._thread.is_alive()
+        done = threading.Event()
+        self._put("flush", done)
+        return done.wait(timeout)
+
+    def end(self, status: str = "FINISHED") -> None:
+        """Close the run after the buffered values are sent, without waiting for it."""
+        self._put("end", status)
+        self._ended = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end("FAILED" if exc_type else "FINISHED")
+
+    # --- background worker ---
+    def _worker(self) -> None:
+        ended = False
+        while not ended:
+            # Collect everything logged within flush_interval_s of the first value into one batch
+            items = [self._queue.get()]
+            deadline = time.monotonic() + self.config.flush_interval_s
+            while items[-1][0] not in ("flush", "end"):
+                try:
+                    items.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+
+            batch, events, status = {"params": {}, "metrics": [], "tags": {}}, [], None
+            for kind, payload in items:
+                if kind == "params":
+                    batch["params"].update(payload)
+                elif kind == "metrics":
+                    batch["metrics"].extend(payload)
+                elif kind == "tags":
+                    batch["tags"].update(payload)
+                elif kind == "flush":
+                    events.append(payload)
+                elif kind == "end":
+                    status, ended = payload, True
+
+            self._send(batch, status)
+            for event in events:
+                event.set()
+
+    def _log(self, batch: dict, status: str = None) -> None:
+        from mlflow.tracking import MlflowClient
+
+        client = MlflowClient(self.tracking_uri)
+        if self.run_id is None:
+            experiment_id = _experiment_id(client, self.config.experiment_name)
+            self.run_id = client.create_run(experiment_id, run_name=self.run_name).info.run_id
+        _log_batch(client, self.run_id, batch["params"], batch["metrics"], batch["tags"])
+        if status:
+            client.set_terminated(self.run_id, status)
+
+    def _send(self, batch: dict, status: str = None) -> None:
+        try:
+            self._log(batch, status)
+        except Exception as e:
+            if self.offline or not self.config.fallback_offline:
+                logger.warning(f"MLflow logging failed for run '{self.run_name}', values dropped: {e}")
+                return
+            logger.warning(f"Tracking server failed ({e}), logging run '{self.run_name}' "
+                           f"to the offline store {self.config.offline_store} instead")
+            self.offline, self.run_id = True, None
+            self.tracking_uri = local_store_uri(self.config.offline_store)
+            batch = {
+                "params": {**self._sent["params"], **batch["params"]},
+                "metrics": self._sent["metrics"] + batch["metrics"],
+                "tags": {**self._sent["tags"], **batch["tags"]},
+            }
+            try:
+                self._log(batch, status)
+            except Exception as e:
+                logger.warning(f"MLflow offline logging failed for run '{self.run_name}', values dropped: {e}")
+                return
+            self._sent = batch
+            return
+
+        self._sent["params"].update(batch["params"])
+        self._sent["metrics"] += batch["metrics"]
+        self._sent["tags"].update(batch["tags"])
+
+
+def sync_offline_runs(config: TrackingConfig, tracking_uri: str = None) -> list:
+    """
+    Upload the finished runs of the offline store to the tracking server
+    (tracking_uri, else the configured or current MLflow URI). Each run is
+    copied once with its params, tags and full metric history. Returns the
+    ids of the uploaded runs on the server.
+    """
+    import mlflow
+    from mlflow.tracking import MlflowClient
+
+    local_uri = local_store_uri(config.offline_store)
+    remote_uri = tracking_uri or config.tracking_uri or mlflow.get_tracking_uri()
+    if remote_uri == local_uri:
+        raise ValueError(f"Tracking URI {remote_uri} is the offline store itself, nothing to sync to")
+
+    local, remote = MlflowClient(local_uri), MlflowClient(remote_uri)
+    experiment = local.get_experiment_by_name(config.experiment_name)
+    if experiment is None:
+        return []
+
+    uploaded = []
+    remote_experiment_id = None
+    page_token = None
+    while True:
+        # Page through the store (oldest first, a stable order) instead of loading every run at once
+        page = local.search_runs(
+            [experiment.experiment_id], max_results=_SYNC_PAGE_SIZE,
+            order_by=["attribute.start_time ASC", "attribute.run_id ASC"], page_token=page_token,
+        )
+        for run in page:
+            if run.info.status == "RUNNING" or SYNCED_TAG in run.data.tags:
+                continue
+            if remote_experiment_id is None:
+                remote_experiment_id = _experiment_id(remote, config.experiment_name)
+
+            remote_run = remote.create_run(remote_experiment_id, start_time=run.info.start_time, run_name=run.info.run_name)
+            metrics = [
+                (m.key, m.value, m.timestamp, m.step)
+                for key in run.data.metrics
+                for m in local.get_metric_history(run.info.run_id, key)
+            ]
+            tags = {k: v for k, v in run.data.tags.items() if k != "mlflow.runName"}
+            _log_batch(remote, remote_run.info.run_id, run.data.params, metrics, tags)
+            remote.set_terminated(remote_run.info.run_id, run.info.status, end_time=run.info.end_time)
+
+            # Marked as soon as it is uploaded: an interrupted sync resumes after it
+            local.set_tag(run.info.run_id, SYNCED_TAG, remote_run.info.run_id)
+            uploaded.append(remote_run.info.run_id)
+            logger.info(f"Synced offline run {run.info.run_id} to {remote_uri} as {remote_run.info.run_id}")
+        page_token = page.token
+        if not page_token:
+            return uploaded
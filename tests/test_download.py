@@ -0,0 +1,177 @@
+"""
+ChunkedDownloader / DownloadCache against a local http.server stand-in.
+
+Run with: python -m pytest tests/test_download.py  (or python -m unittest tests.test_download)
+"""
+import hashlib
+import http.server
+import json
+import re
+import shutil
+import tempfile
+import threading
+import unittest
+from functools import partial
+from pathlib import Path
+from unittest import mock
+
+from my_project.utils.download import ChunkedDownloader, DownloadCache, sha256_file
+
+
+class _Source:
+    """Bytes served by the stand-in, changeable between (and during) requests."""
+
+    def __init__(self, data: bytes):
+        self.lock = threading.Lock()
+        self.data = data
+        self.truncate_next = 0   # next n range responses stop halfway
+        self.change_to = None    # served once the probe is answered
+        self.body_requests = 0
+
+    @property
+    def etag(self) -> str:
+        return f'"{hashlib.md5(self.data).hexdigest()}"'
+
+
+class _RangeHandler(http.server.BaseHTTPRequestHandler):
+    """GET with Range, If-Range and If-None-Match, like a CDN serving the dataset."""
+
+    protocol_version = "HTTP/1.0"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        source = self.server.source
+        with source.lock:
+            data, etag = source.data, source.etag
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+
+            match = re.fullmatch(r"bytes=(\d+)-(\d+)", self.headers.get("Range", ""))
+            if_range = self.headers.get("If-Range")
+            if match and (if_range is None or if_range == etag):
+                start, end = int(match[1]), min(int(match[2]), len(data) - 1)
+                body, status = data[start:end + 1], 206
+            else:
+                body, status = data, 200
+
+            probe = match is not None and match[1] == "0" and match[2] == "0"
+            truncate = not probe and status == 206 and source.truncate_next > 0
+            if truncate:
+                source.truncate_next -= 1
+            if not probe:
+                source.body_requests += 1
+            if probe and source.change_to is not None:
+                source.data, source.change_to = source.change_to, None
+
+        self.send_response(status)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{start + len(body) - 1}/{len(data)}")
+        self.end_headers()
+        self.wfile.write(body[: len(body) // 2] if truncate else body)
+
+
+def _payload(seed: int, size: int = 300_000) -> bytes:
+    return hashlib.sha256(str(seed).encode()).digest() * (size // 32)
+
+
+class DownloadTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.source = _Source(_payload(1))
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _RangeHandler)
+        self.server.source = self.source
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/data.zip"
+        # 64 KB ranges: the 300 KB payload is fetched in 5 parts
+        self.downloader = ChunkedDownloader(chunk_size=64 << 10, n_workers=3, max_retries=3, timeout=10)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _sha256(self, data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def test_parallel_ranges_and_checksum(self):
+        dest = self.tmp_dir / "data.zip"
+        result = self.downloader.download(self.url, dest, expected_sha256=self._sha256(self.source.data))
+        self.assertEqual(dest.read_bytes(), self.source.data)
+        self.assertEqual(result["etag"], self.source.etag)
+        self.assertEqual(self.source.body_requests, 5)
+        self.assertFalse(dest.with_name("data.zip.download.parts").exists())
+
+        with self.assertRaises(ValueError):
+            self.downloader.download(self.url, self.tmp_dir / "bad.zip", expected_sha256="0" * 64)
+        self.assertFalse((self.tmp_dir / "bad.zip").exists())
+
+    def test_resume_after_partial_failure(self):
+        self.source.truncate_next = 2
+        dest = self.tmp_dir / "data.zip"
+        with mock.patch("my_project.utils.download.time.sleep"):  # skip the retry backoff
+            self.downloader.download(self.url, dest)
+        self.assertEqual(dest.read_bytes(), self.source.data)
+
+    def test_stale_parts_of_another_version_are_discarded(self):
+        old = self.source.data
+        dest = self.tmp_dir / "data.zip"
+        # An interrupted download of the old version: its first part is on disk
+        parts_dir = self.tmp_dir / "data.zip.download.parts"
+        parts_dir.mkdir()
+        (parts_dir / "000000.part").write_bytes(old[: 64 << 10])
+        (parts_dir / "source.json").write_text(json.dumps({
+            "url": self.url, "etag": self.source.etag, "last_modified": None,
+            "size": len(old), "chunk_size": 64 << 10,
+        }))
+
+        self.source.data = _payload(2)
+        self.downloader.download(self.url, dest)
+        self.assertEqual(dest.read_bytes(), self.source.data)
+
+    def test_source_changing_mid_download_restarts(self):
+        # The probe sees version 1, the range requests already get version 2
+        self.source.change_to = _payload(2)
+        dest = self.tmp_dir / "data.zip"
+        result = self.downloader.download(self.url, dest)
+        self.assertEqual(dest.read_bytes(), _payload(2))
+        self.assertEqual(result["etag"], self.source.etag)
+
+    def test_cache_revalidates_with_etag(self):
+        cache = DownloadCache(self.tmp_dir / "cache", self.downloader)
+        first = cache.fetch(self.url)
+        requests = self.source.body_requests
+
+        self.assertEqual(cache.fetch(self.url), first)
+        self.assertEqual(self.source.body_requests, requests)  # 304: nothing fetched
+
+        self.source.data = _payload(3)
+        changed = cache.fetch(self.url)
+        self.assertEqual(changed.read_bytes(), _payload(3))
+        index = json.loads((self.tmp_dir / "cache" / "index.json").read_text())
+        self.assertEqual(index[self.url]["etag"], self.source.etag)
+        self.assertEqual(index[self.url]["sha256"], sha256_file(changed))
+
+    def test_server_without_ranges_streams(self):
+        (self.tmp_dir / "static.bin").write_bytes(_payload(4))
+        handler = partial(http.server.SimpleHTTPRequestHandler, directory=str(self.tmp_dir))
+        handler.log_message = lambda *args: None
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            dest = self.tmp_dir / "out" / "static.bin"
+            self.downloader.download(f"http://127.0.0.1:{server.server_port}/static.bin", dest)
+            self.assertEqual(dest.read_bytes(), _payload(4))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()